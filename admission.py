@@ -0,0 +1,163 @@
+# Control de admisión delante del threadpool: límites de ritmo (token bucket) por usuario y por IP y
+# concurrencia acotada por clase de ruta (auth, lecturas, escrituras) con una cola corta. Lo que no
+# cabe se rechaza al instante con 429/503 y Retry-After, antes de ocupar un hilo.
+import asyncio, json, math, threading, time
+from collections import OrderedDict, deque
+from typing import Optional
+import jwt
+from settings import settings
+
+class RateLimiter:
+    """Token bucket por clave: [tokens, última recarga]. O(1) por clave y petición.
+
+    Un bucket sin uso durante burst/rate segundos vuelve a estar lleno, igual que uno nuevo:
+    esas claves se descartan (orden LRU) y la tabla nunca supera maxsize."""
+
+    def __init__(self, rate: float, burst: int, maxsize: int):
+        self.rate, self.burst, self.maxsize = rate, burst, maxsize
+        self.idle = burst / rate
+        self.rejected = 0
+        self._data: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        # 0 si se admite; si no, segundos hasta que haya un token
+        now = time.monotonic()
+        with self._lock:
+            rec = self._data.pop(key, None)
+            tokens = self.burst if rec is None else min(self.burst, rec[0] + (now - rec[1]) * self.rate)
+            wait = 0.0
+            if tokens >= 1: tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._data[key] = [tokens, now]
+            self._evict(now)
+        return wait
+
+    def _evict(self, now: float):
+        while self._data:
+            key, rec = next(iter(self._data.items()))
+            if len(self._data) <= self.maxsize and rec[1] > now - self.idle: break
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+class Gate:
+    """Concurrencia máxima de una clase de rutas con cola FIFO acotada; al liberar, el hueco pasa al primero en cola."""
+
+    def __init__(self, limit: int, queue: int):
+        self.limit, self.queue = limit, queue
+        self.active = 0
+        self.admitted = self.queued = self.rejected = 0
+        self._waiters: deque = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1; self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            return False
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut); self.queued += 1
+        try:
+            await asyncio.wait({fut}, timeout=timeout)
+        except asyncio.CancelledError:
+            # Cliente desconectado: devuelve el hueco si ya se lo habían pasado
+            if fut.done(): self.release()
+            else: self._waiters.remove(fut); fut.cancel()
+            raise
+        if not fut.done():
+            # Tiempo agotado en cola
+            self._waiters.remove(fut); fut.cancel()
+            self.rejected += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"active": self.active, "waiting": len(self._waiters), "admitted": self.admitted, "queued": self.queued, "rejected": self.rejected}
+
+user_limiter = RateLimiter(settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST, settings.RATE_LIMIT_MAX_KEYS)
+ip_limiter = RateLimiter(settings.RATE_LIMIT_IP_PER_SECOND, settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_MAX_KEYS)
+gates = {
+    "auth": Gate(settings.ADMISSION_AUTH_CONCURRENCY, settings.ADMISSION_QUEUE_DEPTH),
+    "read": Gate(settings.ADMISSION_READ_CONCURRENCY, settings.ADMISSION_QUEUE_DEPTH),
+    "write": Gate(settings.ADMISSION_WRITE_CONCURRENCY, settings.ADMISSION_QUEUE_DEPTH),
+}
+# Peticiones en curso o en cola por cliente (usuario o IP); solo claves activas, se borran al llegar a 0
+inflight: dict = {}
+# Sin límites: salud y métricas deben responder justo cuando hay saturación
+EXEMPT = {"/", "/metrics"}
+
+def route_class(method: str, path: str) -> str:
+    if path.startswith("/auth/"): return "auth"
+    return "read" if method in ("GET", "HEAD", "OPTIONS") else "write"
+
+def _subject(scope) -> Optional[str]:
+    # Solo la firma y el sub del token de acceso; validar al usuario sigue siendo cosa de deps
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            auth = value.decode("latin-1")
+            if not auth.startswith("Bearer "): return None
+            try:
+                payload = jwt.decode(auth[7:], settings.SECRET_KEY, algorithms=[settings.JWT_ALG])
+            except jwt.PyJWTError:
+                return None
+            return str(payload.get("sub")) if payload.get("scope") == "access" else None
+    return None
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start", "status": status,
+        "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionMiddleware:
+    """Middleware ASGI: 429 por ritmo (usuario, IP) y 503 cuando la cola de su clase de rutas está llena."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT:
+            return await self.app(scope, receive, send)
+        ip = scope["client"][0] if scope.get("client") else "unknown"
+        user = _subject(scope)
+        if settings.RATE_LIMIT_ENABLED:
+            wait = ip_limiter.take(ip) or (user_limiter.take(user) if user is not None else 0)
+            if wait:
+                return await _reject(send, 429, "Demasiadas peticiones, reintenta más tarde", wait)
+        if not settings.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        # Un solo cliente no puede llenar la cola de todos aunque su ráfaga lo permita
+        client = f"u:{user}" if user is not None else f"ip:{ip}"
+        if inflight.get(client, 0) >= settings.ADMISSION_MAX_PER_CLIENT:
+            return await _reject(send, 429, "Demasiadas peticiones simultáneas", settings.ADMISSION_RETRY_AFTER_SECONDS)
+        inflight[client] = inflight.get(client, 0) + 1
+        try:
+            gate = gates[route_class(scope["method"], scope["path"])]
+            if not await gate.acquire(settings.ADMISSION_QUEUE_TIMEOUT_SECONDS):
+                return await _reject(send, 503, "Servidor saturado, reintenta en unos segundos", settings.ADMISSION_RETRY_AFTER_SECONDS)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                gate.release()
+        finally:
+            inflight[client] -= 1
+            if not inflight[client]: del inflight[client]
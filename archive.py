@@ -0,0 +1,173 @@
+# Archivo de tareas terminadas: las de ARCHIVE_STATUS_IDS (o de cualquier estado, si está vacío) sin
+# cambios en ARCHIVE_AFTER_DAYS días salen de tasks, de la búsqueda y de los contadores a task_archive,
+# en bloques de JSON comprimido de hasta ARCHIVE_BATCH_SIZE tareas de un mismo tablero. La tabla
+# caliente y sus índices se quedan con el trabajo vivo; ?include_archived=true en el listado de
+# tareas (y la exportación) las vuelve a leer bloque a bloque. Archivadas son de solo lectura.
+# Como purge.py: un hilo, un bloque por transacción y, en modo shard, una pasada por shard.
+#   python archive.py run      # archiva ya todo lo pendiente
+#   python archive.py status
+import argparse, json, logging, threading, time, zlib
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Callable, Iterator
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+from pagination import NDJSON
+from settings import settings
+import changes, counters, lean, models, schemas, search, sharding
+
+log = logging.getLogger("archive")
+T, G, B, A = models.Task.__table__, models.Group.__table__, models.Board.__table__, models.TaskArchive.__table__
+FIELDS = tuple(schemas.TaskOut.__fields__)
+
+def encode(rows: list) -> bytes:
+    # [claves, fila, fila...]: las claves una vez por bloque, no por tarea
+    return zlib.compress(json.dumps([FIELDS, *map(list, rows)], ensure_ascii=False, separators=(",", ":")).encode())
+
+def decode(data: bytes) -> Iterator[dict]:
+    keys, *rows = json.loads(zlib.decompress(data))
+    return (dict(zip(keys, r)) for r in rows)
+
+class ArchiveWorker:
+    def __init__(self, batch: int, pause_ms: float, interval: float, after_days: float, status_ids: list):
+        self.batch, self.pause, self.interval = batch, pause_ms / 1000, interval
+        self.after, self.status_ids = timedelta(days=after_days), list(status_ids)
+        self.stats = {"batches": 0, "tasks_archived": 0, "bytes_written": 0, "last_batch_seconds": 0.0}
+        self._wake, self._stop = threading.Event(), threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="archive", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set(); self._wake.set()
+            self._thread.join(); self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception:
+                log.exception("archivo fallido; se reintenta en el siguiente ciclo")
+                worked = False
+            if worked:
+                self._stop.wait(self.pause)
+            else:
+                self._wake.wait(self.interval); self._wake.clear()
+
+    def _candidates(self) -> list:
+        cond = [T.c.updated_at < datetime.now(timezone.utc) - self.after]
+        if self.status_ids: cond.append(T.c.status_id.in_(self.status_ids))
+        return cond
+
+    def pending(self, db: Session) -> int:
+        live = T.join(B, (B.c.id == T.c.board_id) & B.c.deleted_at.is_(None))
+        return db.scalar(select(func.count()).select_from(live).where(*self._candidates()))
+
+    def run_once(self) -> bool:
+        # Un bloque como mucho por BD; False si no queda nada pendiente en ninguna
+        worked = False
+        for sessions in sharding.write_factories():
+            worked = self._run_db(sessions) or worked
+        return worked
+
+    def _run_db(self, sessions) -> bool:
+        with sessions() as db:
+            # Solo tableros vivos: las tareas de los borrados las elimina purge.py
+            live = T.join(B, (B.c.id == T.c.board_id) & B.c.deleted_at.is_(None))
+            board_id = db.scalar(select(T.c.board_id).select_from(live).where(*self._candidates()).limit(1))
+            if board_id is None: return False
+            t0 = time.perf_counter()
+            # La versión sube antes de leer: toma el bloqueo de escritura y las filas ya no cambian hasta el commit
+            if not db.execute(update(B).where(B.c.id == board_id, B.c.deleted_at.is_(None)).values(version=B.c.version + 1)).rowcount:
+                db.rollback(); return True
+            rows = db.execute(
+                select(*(T.c[f] for f in FIELDS)).where(T.c.board_id == board_id, *self._candidates()).order_by(T.c.id).limit(self.batch)
+            ).all()
+            if not rows:
+                db.rollback(); return True
+            ids = [r.id for r in rows]
+            search.unindex_tasks(db, ids); counters.add_tasks(db, ids, sign=-1)
+            db.execute(delete(T).where(T.c.id.in_(ids)))
+            data = encode(rows)
+            db.execute(insert(A).values(board_id=board_id, min_id=ids[0], max_id=ids[-1], count=len(ids), data=data))
+            # Para los clientes que sincronizan por cambios, las archivadas son tareas borradas
+            changes.log(db, ((board_id, "task", i, True) for i in ids))
+            db.commit()
+        self.stats["batches"] += 1
+        self.stats["tasks_archived"] += len(ids)
+        self.stats["bytes_written"] += len(data)
+        self.stats["last_batch_seconds"] = time.perf_counter() - t0
+        return True
+
+    def drain(self):
+        # Archiva todo lo pendiente en el hilo actual (scripts y benchmarks)
+        while self.run_once(): time.sleep(self.pause)
+
+worker = ArchiveWorker(
+    settings.ARCHIVE_BATCH_SIZE, settings.ARCHIVE_PAUSE_MS, settings.ARCHIVE_INTERVAL_SECONDS,
+    settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_STATUS_IDS,
+)
+
+def iter_tasks(db: Session, board_id: int) -> Iterator[dict]:
+    # Archivadas del tablero, descomprimidas bloque a bloque; las de grupos ya eliminados, sin grupo
+    if db.scalar(select(B.c.id).where(B.c.id == board_id, B.c.deleted_at.is_(None))) is None: return
+    groups = set(db.scalars(select(G.c.id).where(G.c.board_id == board_id, G.c.deleted_at.is_(None))))
+    blobs = db.scalars(select(A.c.data).where(A.c.board_id == board_id).order_by(A.c.id).execution_options(yield_per=4))
+    for data in blobs:
+        for t in decode(data):
+            if t["group_id"] not in groups: t["group_id"] = None
+            yield t
+
+def tasks_response(query_fn: Callable, board_id: int, sessions: sessionmaker, ndjson: bool) -> StreamingResponse:
+    # Las del listado normal (mismo orden) y después las archivadas, en una sola transacción de
+    # lectura: una tarea archivada durante la descarga no sale dos veces ni se pierde
+    batch = settings.NDJSON_BATCH_SIZE
+    def join(buf: list, first: bool) -> str:
+        if ndjson: return "\n".join(buf) + "\n"
+        return ("" if first else ",") + ",".join(buf)
+    def gen():
+        if not ndjson: yield "["
+        with sessions() as db:
+            hot = (dict(zip(FIELDS, r)) for r in lean.project(query_fn(db), schemas.TaskOut).yield_per(batch))
+            buf, first = [], True
+            for t in chain(hot, iter_tasks(db, board_id)):
+                buf.append(json.dumps(t, ensure_ascii=False, separators=(",", ":")))
+                if len(buf) >= batch:
+                    yield join(buf, first); buf.clear(); first = False
+            if buf:
+                yield join(buf, first)
+        if not ndjson: yield "]"
+    return StreamingResponse(gen(), media_type=NDJSON if ndjson else "application/json")
+
+def status() -> list:
+    # [(BD, tareas pendientes de archivar, tareas archivadas, bloques, bytes)]
+    out = []
+    for sessions in sharding.write_factories():
+        with sessions() as db:
+            blobs, tasks, size = db.execute(
+                select(func.count(), func.coalesce(func.sum(A.c.count), 0), func.coalesce(func.sum(func.length(A.c.data)), 0))
+            ).one()
+            name = "principal" if db.info.get("shard") is None else f"shard {db.info['shard']}"
+            out.append((name, worker.pending(db), tasks, blobs, size))
+    return out
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Archivo de tareas terminadas")
+    parser.add_argument("command", choices=["run", "status"])
+    args = parser.parse_args()
+    if args.command == "run":
+        worker.drain()
+        print(f"{worker.stats['tasks_archived']} tareas archivadas en {worker.stats['batches']} bloques")
+    else:
+        for name, pending, tasks, blobs, size in status():
+            print(f"{name}: {pending} pendientes, {tasks} archivadas en {blobs} bloques ({size} bytes)")
@@ -0,0 +1,75 @@
+# Cliente ASGI mínimo en proceso: sin red ni dependencias extra
+import asyncio, json
+from contextlib import asynccontextmanager
+
+async def request(app, method: str, path: str, json_body=None, headers=None, query: str = "", client_ip: str = "127.0.0.1"):
+    body = json.dumps(json_body).encode() if json_body is not None else b""
+    raw_headers = [(b"host", b"bench"), (b"content-length", str(len(body)).encode())]
+    if json_body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    for k, v in (headers or {}).items():
+        raw_headers.append((k.lower().encode(), v.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": raw_headers,
+        "client": (client_ip, 50000), "server": ("bench", 80),
+    }
+    sent = False
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Future()  # nunca se desconecta; la app cancela la escucha al terminar
+    status, out_headers, chunks = 0, {}, []
+    async def send(message):
+        nonlocal status, out_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            out_headers = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    await app(scope, receive, send)
+    return status, out_headers, b"".join(chunks)
+
+async def stream(app, method: str, path: str, chunks=(), sink=None, headers=None):
+    # Como request() pero con el cuerpo en tramos y la respuesta entregada a sink(bytes) sin acumularla
+    raw_headers = [(b"host", b"bench")] + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": raw_headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    it, done = iter(chunks), False
+    async def receive():
+        nonlocal done
+        chunk = next(it, None)
+        if chunk is not None:
+            return {"type": "http.request", "body": chunk, "more_body": True}
+        if done: await asyncio.Future()
+        done = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+    status, size, tail = 0, 0, []
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            size += len(body)
+            if sink: sink(body)
+            else: tail[:] = [body]
+    await app(scope, receive, send)
+    return status, size, b"".join(tail)
+
+@asynccontextmanager
+async def lifespan(app):
+    async with app.router.lifespan_context(app):
+        yield
+
+def percentiles(samples, points=(50, 95, 99)):
+    if not samples: return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
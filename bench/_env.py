@@ -0,0 +1,12 @@
+# Prepara el entorno para los benchmarks: BD SQLite temporal y raíz del proyecto en sys.path
+import os, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TMP_DIR = tempfile.mkdtemp(prefix="kanban-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TMP_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+# Todas las peticiones en proceso llegan desde la misma IP: sin límites de ritmo salvo que se pidan
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
@@ -0,0 +1,61 @@
+# Pico de tráfico: un cliente pesado (muchas conexiones desde una IP, búsquedas sin pausa) frente a
+# varios clientes ligeros (GET /boards/ a ritmo normal, una IP cada uno). Latencia de los ligeros y
+# respuestas del pesado sin control de admisión y con límites de ritmo + concurrencia por clase.
+#   python bench/bench_admission.py [segundos] [conexiones del pesado] [clientes ligeros]
+import asyncio, os, sys, time
+from collections import Counter
+# Sin control, los hilos esperan conexión mientras las conexiones esperan hilo para cerrar su sesión:
+# el pool solo se libera por timeout. Se acorta para que la fase termine
+os.environ.setdefault("DB_POOL_TIMEOUT", "3")
+import _env  # noqa: F401
+from _asgi import lifespan, percentiles, request
+from seed import seed
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+HEAVY = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+LIGHT = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+async def call(app, path, query, ip):
+    try:
+        return (await request(app, "GET", path, query=query, client_ip=ip))[0]
+    except Exception as e:  # sin el middleware de errores del servidor, el 500 llega como excepción
+        return type(e).__name__
+
+async def heavy(app, board_id, deadline, statuses):
+    # Ignora Retry-After: reintenta en cuanto recibe la respuesta
+    while time.perf_counter() < deadline:
+        statuses[await call(app, f"/boards/{board_id}/tasks/search", "q=re", "10.0.0.1")] += 1
+        # Un rechazo inmediato no cede el event loop (aquí no hay red): ~1 ms de ida y vuelta
+        await asyncio.sleep(0.001)
+
+async def light(app, n, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        status = await call(app, "/boards/", "limit=20", f"10.1.0.{n}")
+        latencies.append((time.perf_counter() - t0) * 1000)
+        statuses[status] += 1
+        await asyncio.sleep(0.05)
+
+async def phase(app, board_id):
+    latencies, light_st, heavy_st = [], Counter(), Counter()
+    deadline = time.perf_counter() + SECONDS
+    await asyncio.gather(
+        *(heavy(app, board_id, deadline, heavy_st) for _ in range(HEAVY)),
+        *(light(app, n, deadline, latencies, light_st) for n in range(LIGHT)),
+    )
+    p = percentiles(latencies)
+    return p, dict(light_st), dict(heavy_st)
+
+async def main():
+    ids = seed(1, 20, 250)
+    import main as app_module
+    from settings import settings
+    app = app_module.app
+    async with lifespan(app):
+        for label, enabled in (("sin control", False), ("con control", True)):
+            settings.RATE_LIMIT_ENABLED = settings.ADMISSION_ENABLED = enabled
+            p, light_st, heavy_st = await phase(app, ids["boards"][0])
+            print(f"{label:12s} ligeros p50={p['p50']:8.1f}ms p99={p['p99']:8.1f}ms {light_st}  pesado {heavy_st}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# Archivo de tareas: latencia de las consultas sobre la tabla caliente con todas las tareas y después
+# de archivar el 90% (estado 5), tamaño de tasks + índices + FTS frente al de task_archive, y coste
+# de archivar y de volver a leer todo con ?include_archived=true.
+#   python bench/bench_archive.py [tareas] [repeticiones]
+import asyncio, random, sys, time
+import _env  # noqa: F401
+from _asgi import percentiles, request
+from seed import seed
+from sqlalchemy import text
+from database import ReadSessionLocal, engine
+from settings import settings
+import archive, counters, crud, lean, main, schemas
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+BOARDS, GROUPS = 4, 50
+
+def report(name, samples):
+    p = percentiles(samples)
+    print(f"{name:12s} p50={p['p50']:8.2f}ms p95={p['p95']:8.2f}ms p99={p['p99']:8.2f}ms")
+
+def sizes() -> dict:
+    # Bytes en páginas de SQLite (dbstat): la tabla caliente con sus índices y el archivo
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT name, sum(pgsize) FROM dbstat GROUP BY name")).all())
+    hot = sum(v for k, v in rows.items() if k == "tasks" or k.startswith(("ix_tasks", "tasks_fts")))
+    return {"caliente": hot, "archivo": sum(v for k, v in rows.items() if "task_archive" in k)}
+
+async def timed(fn, args, repeat=REPEAT):
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(args[i % len(args)])
+        if asyncio.iscoroutine(out): await out
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+async def page(board_id):
+    # Con limit no pasa por la caché de listados
+    status, _, _ = await request(main.app, "GET", f"/boards/{board_id}/tasks", query="limit=50")
+    assert status == 200
+
+async def group_page(group_id):
+    status, _, _ = await request(main.app, "GET", f"/groups/{group_id}/tasks", query="limit=50")
+    assert status == 200
+
+async def found(board_id):
+    status, _, _ = await request(main.app, "GET", f"/boards/{board_id}/tasks/search", query="q=deploy&limit=50")
+    assert status == 200
+
+def full(board_id):
+    # Listado completo del tablero desde la BD (lo que hace la ruta en cada fallo de caché)
+    with ReadSessionLocal() as db:
+        return len(lean.rows(crud.query_tasks_by_board(db, board_id), schemas.TaskOut))
+
+async def with_archived(board_id):
+    status, _, _ = await request(main.app, "GET", f"/boards/{board_id}/tasks", query="include_archived=true")
+    assert status == 200
+
+async def measure(boards, groups):
+    for name, fn, args in (
+        ("página", page, boards), ("grupo", group_page, groups), ("búsqueda", found, boards), ("completo", full, boards),
+    ):
+        report(name, await timed(fn, args))
+    print("  " + ", ".join(f"{k}={v / 2**20:.1f}MiB" for k, v in sizes().items()))
+
+async def main_():
+    ids = seed(BOARDS, GROUPS, max(1, TASKS // (BOARDS * GROUPS)))
+    # 90% terminadas (estado 5), el resto repartido entre los demás estados
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE tasks SET status_id = CASE WHEN id % 10 = 0 THEN 1 + id % 4 ELSE 5 END")
+        counters.rebuild(conn)
+    boards = ids["boards"]
+    groups = random.Random(1).sample([g for gs in ids["groups"].values() for g in gs], 20)
+    print(f"{BOARDS} tableros de {ids['tasks'] // BOARDS} tareas, {GROUPS} grupos, {REPEAT} lecturas por consulta")
+    print("-- antes: todas en tasks")
+    await measure(boards, groups)
+    # Antigüedad negativa: todas las del estado 5 son candidatas ya
+    worker = archive.ArchiveWorker(settings.ARCHIVE_BATCH_SIZE, 0, 1, -1, [5])
+    t0 = time.perf_counter()
+    worker.drain()
+    elapsed = time.perf_counter() - t0
+    s = worker.stats
+    print(f"-- archivado: {s['tasks_archived']} tareas en {s['batches']} bloques, {elapsed:.1f}s "
+          f"({s['tasks_archived'] / elapsed:.0f} tareas/s), {s['bytes_written'] / 2**20:.1f}MiB comprimidos")
+    print("-- después: 10% en tasks")
+    await measure(boards, groups)
+    # Todo el tablero otra vez, calientes y archivadas (como "completo" antes de archivar)
+    report("+archivadas", await timed(with_archived, boards, repeat=max(4, REPEAT // 10)))
+
+if __name__ == "__main__":
+    asyncio.run(main_())
@@ -0,0 +1,73 @@
+# Rutas síncronas (threadpool de 40 hilos) frente a rutas async (AsyncSession + aiosqlite) con
+# 1000 conexiones concurrentes: 90% GET /boards/{id}/tasks?limit=20 y 10% POST /tasks/ sobre 20
+# tableros, y async con group-commit (las escrituras, enteras en el hilo escritor). Sin control de
+# admisión, que a esta concurrencia respondería 503 en todos los casos.
+#   python bench/bench_async.py [segundos] [conexiones]
+import asyncio, os, random, subprocess, sys, time
+from collections import Counter
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+CONNECTIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+BOARDS = 20
+
+async def worker():
+    import _env  # noqa: F401
+    from _asgi import lifespan, percentiles, request as _request
+    import main
+
+    async def request(*args, **kwargs):
+        try:
+            return await _request(*args, **kwargs)
+        except Exception as e:  # sin el middleware de errores del servidor, el 500 llega como excepción
+            return type(e).__name__, None, b""
+    async with lifespan(main.app):
+        boards = []
+        for n in range(BOARDS):
+            status, _, body = await request(main.app, "POST", "/boards/", {"name": f"bench {n}"})
+            assert status == 200, body
+            board_id = int(body.split(b'"id":')[1].split(b"}")[0])
+            for i in range(50):
+                await request(main.app, "POST", "/tasks/", {"title": f"t{i}", "board_id": board_id, "position": i})
+            boards.append(board_id)
+        reads, writes, errors = [], [], Counter()
+        deadline = time.perf_counter() + SECONDS
+
+        async def loop(n):
+            rnd = random.Random(n)
+            while time.perf_counter() < deadline:
+                board_id = rnd.choice(boards)
+                t0 = time.perf_counter()
+                if rnd.random() < 0.1:
+                    status, _, _ = await request(main.app, "POST", "/tasks/", {"title": "w", "board_id": board_id})
+                    out = writes
+                else:
+                    # Con limit no pasa por la caché de listados: cada lectura consulta la BD
+                    status, _, _ = await request(main.app, "GET", f"/boards/{board_id}/tasks", query="limit=20")
+                    out = reads
+                if status != 200: errors[status] += 1; continue
+                out.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(loop(n) for n in range(CONNECTIONS)))
+    r, w = percentiles(reads), percentiles(writes)
+    print(
+        f"req/s={(len(reads) + len(writes)) / SECONDS:7.1f} "
+        f"lectura p50={r['p50'] * 1000:6.1f}ms p99={r['p99'] * 1000:7.1f}ms "
+        f"escritura p50={w['p50'] * 1000:6.1f}ms p99={w['p99'] * 1000:7.1f}ms errors={dict(errors)}"
+    )
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        asyncio.run(worker())
+    else:
+        print(f"{CONNECTIONS} conexiones, {SECONDS:.0f}s")
+        # Síncronas: como en bench_admission, los hilos esperan conexión mientras las sesiones esperan
+        # hilo para cerrarse y el pool solo se libera por timeout; se acorta para que la fase termine
+        phases = (
+            ("síncronas", {"ASYNC_ROUTES_ENABLED": "false", "DB_POOL_TIMEOUT": "3"}),
+            ("async", {"ASYNC_ROUTES_ENABLED": "true"}),
+            ("async + gc", {"ASYNC_ROUTES_ENABLED": "true", "GROUP_COMMIT_ENABLED": "true"}),
+        )
+        for label, extra in phases:
+            env = {**os.environ, "BENCH_CHILD": "1", "ADMISSION_ENABLED": "false", **extra}
+            print(f"{label:10s}", end=" ", flush=True)
+            subprocess.run([sys.executable, __file__, *sys.argv[1:]], env=env, check=True)
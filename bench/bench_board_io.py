@@ -0,0 +1,58 @@
+# Exportación e importación NDJSON de un tablero grande a través de la app (ASGI en proceso).
+# El pico de memoria (tracemalloc) se mide en una segunda pasada: no debe crecer con el tablero.
+#   python bench/bench_board_io.py [grupos] [tareas_por_grupo]
+import asyncio, json, os, sys, time, tracemalloc
+import _env  # noqa: F401
+from _asgi import stream, lifespan
+from seed import seed
+from main import app
+
+GROUPS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+TASKS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+CHUNK = 64 * 1024
+DUMP = os.path.join(_env.TMP_DIR, "board.ndjson")
+
+def _chunks():
+    with open(DUMP, "rb") as f:
+        while chunk := f.read(CHUNK):
+            yield chunk
+
+async def export(board_id):
+    with open(DUMP, "wb") as f:
+        status, size, _ = await stream(app, "GET", f"/boards/{board_id}/export", sink=f.write)
+    assert status == 200, status
+    return size
+
+async def import_():
+    status, _, body = await stream(app, "POST", "/boards/import", chunks=_chunks(), headers={"content-type": "application/x-ndjson"})
+    assert status == 201, body
+    return json.loads(body)
+
+async def timed(label, coro, rows, size):
+    t0 = time.perf_counter()
+    out = await coro
+    dt = time.perf_counter() - t0
+    print(f"{label:8s} {dt:7.2f}s {rows / dt:10.0f} filas/s {size / dt / 2**20:7.1f} MiB/s")
+    return out
+
+async def traced(label, coro):
+    tracemalloc.start()
+    await coro
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:8s} pico={peak / 2**20:6.1f}MiB")
+
+async def main():
+    ids = seed(1, GROUPS, TASKS)
+    board_id, rows = ids["boards"][0], ids["tasks"]
+    print(f"tablero de {rows} tareas en {GROUPS} grupos")
+    async with lifespan(app):
+        size = await export(board_id)
+        await timed("export", export(board_id), rows, size)
+        result = await timed("import", import_(), rows, size)
+        assert result["tasks"] == rows, result
+        await traced("export", export(board_id))
+        await traced("import", import_())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+# Resincronizar un tablero tras una reconexión: /full (todo) frente a /changes?since= (solo lo cambiado),
+# según cuántas tareas se editaron mientras el cliente estaba desconectado. /full se mide en frío
+# (primera lectura de la versión) y con la caché de listados; changes, con la mediana.
+#   python bench/bench_changes.py [tareas] [repeticiones]
+import asyncio, random, sys, time
+import _env  # noqa: F401
+from _asgi import percentiles, request
+from seed import seed
+from database import ReadSessionLocal, SessionLocal
+import crud, main, models, schemas
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+GROUPS = 20
+
+async def measure(path, query=""):
+    samples, size = [], 0
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        status, _, body = await request(main.app, "GET", path, query=query)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert status == 200, (status, body[:200])
+        size = len(body)
+    # La primera lectura tras los cambios no encuentra /full en la caché de listados
+    return samples[0], percentiles(samples)["p50"], size
+
+async def main_():
+    ids = seed(1, GROUPS, max(1, TASKS // GROUPS))
+    board_id = ids["boards"][0]
+    with ReadSessionLocal() as db:
+        task_ids = [i for (i,) in db.query(models.Task.id).filter(models.Task.board_id == board_id)]
+    # El registro empieza en la versión actual (tareas sembradas sin crud)
+    with SessionLocal() as db:
+        since = crud.board_version(db, board_id)
+    rng = random.Random(3)
+    print(f"{len(task_ids)} tareas; p50 de {REPEAT} lecturas")
+    edited = 0
+    for edits in (1, 10, 100, 1000):
+        # Cada ronda suma ediciones (con repeticiones) a las anteriores: el delta se compacta por tarea
+        with SessionLocal() as db:
+            for _ in range(edits - edited):
+                crud.update_task(db, rng.choice(task_ids[:max(1, edits // 2) * 2]), schemas.TaskUpdate(status_id=rng.randint(1, 5)))
+        edited = edits
+        full_cold, full_ms, full_b = await measure(f"/boards/{board_id}/full")
+        _, delta_ms, delta_b = await measure(f"/boards/{board_id}/changes", f"since={since}")
+        print(f"{edits:5d} ediciones  full={full_cold:7.1f}ms (caché {full_ms:5.2f}ms) {full_b / 1024:7.1f}KiB  "
+              f"changes={delta_ms:6.2f}ms {delta_b / 1024:6.1f}KiB")
+
+if __name__ == "__main__":
+    asyncio.run(main_())
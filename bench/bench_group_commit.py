@@ -0,0 +1,52 @@
+# Escrituras concurrentes con commit por petición frente a group-commit (un escritor, un commit por lote).
+#   python bench/bench_group_commit.py [segundos] [escritores]
+import os, subprocess, sys, threading, time
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+WRITERS = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+def worker():
+    import _env  # noqa: F401
+    from _asgi import percentiles
+    from database import SessionLocal
+    from groupcommit import get_committer, shutdown_committer, write
+    from settings import settings
+    import crud, migrations, schemas
+    migrations.upgrade()
+    with SessionLocal() as db:
+        board_id = crud.create_board(db, schemas.BoardCreate(name="bench")).id
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+
+    def loop():
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                # Igual que un router: sesión por petición y la mutación a través de write()
+                with SessionLocal() as db:
+                    write(crud.create_task, db, task=schemas.TaskCreate(title="w", board_id=board_id))
+            except Exception:
+                with lock: errors[0] += 1
+                continue
+            with lock: latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=loop) for _ in range(WRITERS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    p = percentiles(latencies)
+    extra = ""
+    if settings.GROUP_COMMIT_ENABLED:
+        s = get_committer().stats()
+        extra = f" lote_medio={s['items'] / max(s['batches'], 1):5.1f}"
+        shutdown_committer()
+    print(f"writes/s={len(latencies) / SECONDS:8.1f} p50={p['p50'] * 1000:6.1f}ms p99={p['p99'] * 1000:6.1f}ms errors={errors[0]}{extra}")
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        worker()
+    else:
+        for name, enabled in (("por petición", "false"), ("group-commit", "true")):
+            env = {**os.environ, "BENCH_CHILD": "1", "GROUP_COMMIT_ENABLED": enabled}
+            print(f"{name:13s}", end=" ", flush=True)
+            subprocess.run([sys.executable, __file__, *sys.argv[1:]], env=env, check=True)
@@ -0,0 +1,56 @@
+# Listado de tareas: ORM + response_model (pydantic) frente a tuplas de columnas codificadas a JSON.
+# Informa CPU, pico de memoria y colecciones gen0 (proxy de objetos creados) por cada 10k filas.
+#   python bench/bench_lean_reads.py [filas] [repeticiones]
+import asyncio, gc, sys, time, tracemalloc
+from typing import List
+import _env  # noqa: F401
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from seed import seed
+from database import ReadSessionLocal
+import crud, lean, schemas
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+FIELD = create_response_field(name="Response_list_tasks", type_=List[schemas.TaskOut])
+
+async def orm_path(db, board_id):
+    # Lo que hacía la ruta: instancias ORM, validación del response_model y JSONResponse
+    rows = crud.list_tasks_by_board(db, board_id)
+    content = await serialize_response(field=FIELD, response_content=rows)
+    return JSONResponse(content).body
+
+async def lean_path(db, board_id):
+    return lean.json_response(lean.rows(crud.query_tasks_by_board(db, board_id), schemas.TaskOut), schemas.TaskOut).body
+
+async def measure(name, fn, board_id):
+    with ReadSessionLocal() as db:
+        body = await fn(db, board_id)  # calentamiento
+        gc.collect()
+        gen0 = gc.get_stats()[0]["collections"]
+        cpu = time.process_time()
+        for _ in range(REPEAT):
+            await fn(db, board_id)
+            db.expunge_all()
+        cpu = (time.process_time() - cpu) / REPEAT
+        gen0 = (gc.get_stats()[0]["collections"] - gen0) / REPEAT
+        tracemalloc.start()
+        await fn(db, board_id)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.expunge_all()
+    scale = 10_000 / ROWS
+    print(f"{name:5s} cpu={cpu * 1000 * scale:8.1f}ms pico={peak * scale / 2**20:7.1f}MiB gen0={gen0 * scale:7.1f} cuerpo={len(body)}B")
+    return body
+
+async def main():
+    ids = seed(1, 10, max(1, ROWS // 10))
+    board_id = ids["boards"][0]
+    print(f"{ids['tasks']} filas por listado, {REPEAT} repeticiones (valores por 10k filas)")
+    a = await measure("orm", orm_path, board_id)
+    b = await measure("lean", lean_path, board_id)
+    assert a == b, "las respuestas difieren"
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+# p99 de GET /boards/ con y sin una ráfaga de logins concurrentes.
+#   python bench/bench_login_storm.py [segundos] [lectores] [logins]
+# Para comparar con bcrypt dentro del threadpool: HASH_POOL_ENABLED=false python bench/bench_login_storm.py
+import asyncio, sys, time
+from collections import Counter
+import _env  # noqa: F401
+from _asgi import request, lifespan, percentiles
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+READERS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+LOGINS = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+
+EMAIL, PASSWORD = "storm@example.com", "Storm1234"
+
+async def reader(app, deadline, latencies):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        await request(app, "GET", "/boards/")
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+async def login(app, deadline, statuses, n):
+    while time.perf_counter() < deadline:
+        status, _, _ = await request(app, "POST", "/auth/login", {"email": EMAIL, "password": PASSWORD}, client_ip=f"10.0.0.{n}")
+        statuses[status] += 1
+        if status == 503: await asyncio.sleep(0.05)
+
+async def phase(app, logins):
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + SECONDS
+    await asyncio.gather(
+        *(reader(app, deadline, latencies) for _ in range(READERS)),
+        *(login(app, deadline, statuses, n) for n in range(logins)),
+    )
+    return {"requests": len(latencies), **{k: round(v, 2) if v else v for k, v in percentiles(latencies).items()}}, dict(statuses)
+
+async def main():
+    import main as app_module
+    from settings import settings
+    app = app_module.app
+    async with lifespan(app):
+        await request(app, "POST", "/auth/register", {"email": EMAIL, "password": PASSWORD})
+        for i in range(20):
+            await request(app, "POST", "/boards/", {"name": f"b{i}"})
+        quiet, _ = await phase(app, 0)
+        storm, statuses = await phase(app, LOGINS)
+    print(f"hash pool enabled={settings.HASH_POOL_ENABLED}")
+    print(f"/boards/ ms sin logins:  {quiet}")
+    print(f"/boards/ ms con logins:  {storm}")
+    print(f"login status: {statuses}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+# Compara reordenar con posiciones enteras consecutivas (renumerar todo el grupo)
+# frente a POST /tasks/{id}/move con vecinos (una fila escrita salvo rebalanceo), también
+# sobre tareas dadas de alta sin posición y moviendo junto a la recién creada.
+#   python bench/bench_move.py [n_tareas] [n_movimientos]
+import sys, time, random
+import _env  # noqa: F401
+from sqlalchemy import event
+from database import engine, SessionLocal, Base
+from settings import settings
+import crud, migrations, models, schemas
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+MOVES = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+writes = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, params, context, executemany):
+    global writes
+    if statement.lstrip().upper().startswith("UPDATE"):
+        writes += len(params) if executemany else 1
+
+def seed(db):
+    b = crud.create_board(db, schemas.BoardCreate(name="bench"))
+    g = crud.create_group(db, schemas.GroupCreate(name="col", board_id=b.id))
+    db.bulk_insert_mappings(models.Task, [
+        {"title": f"t{i}", "board_id": b.id, "group_id": g.id, "position": i} for i in range(N)
+    ])
+    db.commit()
+    return g.id
+
+def seed_created(db):
+    # Altas sin posición, como las de un cliente: cada una tras la última del grupo
+    b = crud.create_board(db, schemas.BoardCreate(name="bench"))
+    g = crud.create_group(db, schemas.GroupCreate(name="col", board_id=b.id))
+    for i in range(0, N, settings.BULK_MAX_ITEMS):
+        crud.bulk_create_tasks(db, [
+            schemas.TaskCreate(title=f"t{j}", board_id=b.id, group_id=g.id) for j in range(i, min(N, i + settings.BULK_MAX_ITEMS))
+        ])
+    return g.id
+
+def renumber_scheme(db, group_id):
+    # Lo que hacía el cliente: reordenar en memoria y un PATCH por tarea
+    order = [t.id for t in crud.list_tasks_by_group(db, group_id)]
+    moved = order.pop(random.randrange(len(order)))
+    order.insert(0, moved)
+    for pos, task_id in enumerate(order):
+        crud.update_task(db, task_id, schemas.TaskUpdate(position=pos))
+
+def move_scheme(db, group_id):
+    order = [t.id for t in crud.list_tasks_by_group(db, group_id)]
+    moved = random.choice(order[1:])
+    crud.move_task(db, moved, schemas.TaskMove(before_id=order[0]))
+
+def create_move_scheme(db, group_id):
+    # Alta sin posición y movimiento de otra tarea justo después de ella
+    order = [t.id for t in crud.list_tasks_by_group(db, group_id)]
+    board_id = db.get(models.Group, group_id).board_id
+    fresh = crud.create_task(db, schemas.TaskCreate(title="nueva", board_id=board_id, group_id=group_id))
+    crud.move_task(db, random.choice(order), schemas.TaskMove(after_id=fresh.id))
+
+def run(name, fn, moves, seeder=seed):
+    global writes
+    # BD desde cero en cada esquema: sin tablas ni versión, upgrade() la crea entera
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts"); conn.exec_driver_sql("DROP TABLE IF EXISTS schema_version")
+    migrations.upgrade()
+    with SessionLocal() as db:
+        group_id = seeder(db)
+        writes = 0
+        t0 = time.perf_counter()
+        for _ in range(moves):
+            fn(db, group_id)
+        elapsed = time.perf_counter() - t0
+    print(f"{name:10s} moves={moves:4d} writes/move={writes / moves:8.1f} ms/move={elapsed * 1000 / moves:8.2f}")
+
+if __name__ == "__main__":
+    random.seed(0)
+    run("renumber", renumber_scheme, max(1, MOVES // 10))
+    run("move", move_scheme, MOVES)
+    run("alta+move", create_move_scheme, MOVES, seeder=seed_created)
@@ -0,0 +1,52 @@
+# Latencia de otros escritores mientras se borra un tablero grande: cascada en una transacción
+# frente a soft-delete + purga por lotes.
+#   python bench/bench_purge.py [tareas]
+import sys, threading, time
+import _env  # noqa: F401
+from _asgi import percentiles
+from sqlalchemy import delete
+from seed import seed
+from database import SessionLocal
+import crud, models, purge, schemas, search
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+def cascade(board_id):
+    # Equivalente a db.delete(board) con las FK aplicadas: todo en una transacción
+    with SessionLocal() as db:
+        ids = db.scalars(models.Task.__table__.select().with_only_columns(models.Task.id).where(models.Task.board_id == board_id)).all()
+        search.unindex_tasks(db, ids)
+        db.execute(delete(models.Task).where(models.Task.board_id == board_id))
+        db.execute(delete(models.Group).where(models.Group.board_id == board_id))
+        db.execute(delete(models.Board).where(models.Board.id == board_id))
+        db.commit()
+
+def two_phase(board_id):
+    with SessionLocal() as db:
+        crud.delete_board(db, board_id)
+    purge.worker.drain()
+
+def run(name, fn):
+    ids = seed(2, 100, TASKS // 100)
+    victim, other = ids["boards"]
+    samples, stop = [], threading.Event()
+    def writer():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            with SessionLocal() as db:
+                crud.create_task(db, schemas.TaskCreate(title="w", board_id=other))
+            samples.append(time.perf_counter() - t0)
+    th = threading.Thread(target=writer); th.start()
+    time.sleep(0.5)
+    t0 = time.perf_counter()
+    fn(victim)
+    total = time.perf_counter() - t0
+    stop.set(); th.join()
+    p = percentiles(samples)
+    print(f"{name:10s} borrado={total:6.2f}s escrituras={len(samples):6d} p50={p['p50'] * 1000:7.1f}ms "
+          f"p99={p['p99'] * 1000:7.1f}ms max={max(samples) * 1000:7.1f}ms")
+
+if __name__ == "__main__":
+    print(f"tablero de {TASKS} tareas; un escritor concurrente en otro tablero")
+    run("cascada", cascade)
+    run("dos fases", two_phase)
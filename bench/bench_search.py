@@ -0,0 +1,44 @@
+# Búsqueda en un tablero: índice FTS5 frente a un recorrido LIKE sobre title/description.
+#   python bench/bench_search.py [tareas] [consultas]
+import random, sys, time
+import _env  # noqa: F401
+from _asgi import percentiles
+from seed import WORDS, seed
+from database import ReadSessionLocal, SessionLocal
+import crud, models, schemas, search
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+BOARDS, GROUPS, TAGGED = 10, 100, 1000
+
+def run(name, fn, queries):
+    samples, hits = [], 0
+    with ReadSessionLocal() as db:
+        for board_id, q in queries:
+            t0 = time.perf_counter()
+            hits += len(fn(db, board_id, q))
+            samples.append((time.perf_counter() - t0) * 1000)
+    p = percentiles(samples)
+    print(f"{name:5s} p50={p['p50']:8.2f}ms p95={p['p95']:8.2f}ms p99={p['p99']:8.2f}ms resultados={hits}")
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    ids = seed(BOARDS, GROUPS, max(1, TASKS // (BOARDS * GROUPS)))
+    print(f"{ids['tasks']} tareas sembradas e indexadas en {time.perf_counter() - t0:.1f}s")
+    rng = random.Random(1)
+    # Términos poco frecuentes ("ref00042") añadidos vía crud: también ejercita el índice incremental
+    tagged = rng.sample(range(1, ids["tasks"] + 1), min(TAGGED, ids["tasks"]))
+    with SessionLocal() as db:
+        rows = {t.id: (t.title, t.board_id) for t in db.query(models.Task).filter(models.Task.id.in_(tagged))}
+        crud.bulk_update_tasks(db, [schemas.TaskBulkUpdate(id=i, title=f"{rows[i][0]} ref{n:05d}") for n, i in enumerate(tagged)])
+    boards = {f"ref{n:05d}": rows[i][1] for n, i in enumerate(tagged)}
+    # Frecuentes: una o dos palabras del vocabulario, la última incompleta (como al teclear)
+    common = [
+        (rng.choice(ids["boards"]), " ".join([rng.choice(WORDS) for _ in range(rng.randint(0, 1))] + [rng.choice(WORDS)[:3]]))
+        for _ in range(QUERIES)
+    ]
+    rare = [(boards[ref], ref[:-1]) for ref in rng.sample(sorted(boards), min(QUERIES, len(boards)))]
+    for label, queries in (("frecuentes", common), ("selectivas", rare)):
+        print(f"-- consultas {label}")
+        run("fts5", lambda db, b, q: search.search_tasks(db, b, q, limit=50), queries)
+        run("like", lambda db, b, q: search._search_like(db, b, search._TERM.findall(q), limit=50), queries)
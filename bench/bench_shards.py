@@ -0,0 +1,45 @@
+# Escrituras concurrentes (POST /tasks/ a través de la app) repartidas entre varios tableros, con
+# todo en una BD frente a 2 y 4 shards: cada shard tiene su propio bloqueo de escritura y su fsync.
+# Por defecto SQLITE_SYNCHRONOUS=FULL (un fsync por commit, como un despliegue que no tolera perder
+# transacciones); con NORMAL el commit apenas toca disco y el límite pasa a ser la CPU.
+#   python bench/bench_shards.py [segundos] [escritores] [synchronous]
+import asyncio, os, subprocess, sys, time
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+WRITERS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+SYNCHRONOUS = sys.argv[3] if len(sys.argv) > 3 else "FULL"
+
+async def worker():
+    import _env  # noqa: F401
+    from _asgi import lifespan, percentiles, request
+    import main
+    async with lifespan(main.app):
+        boards = []
+        for n in range(WRITERS):
+            status, _, body = await request(main.app, "POST", "/boards/", {"name": f"bench {n}"})
+            assert status == 200, body
+            boards.append(int(body.split(b'"id":')[1].split(b"}")[0]))
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + SECONDS
+
+        async def loop(board_id):
+            # Un escritor por tablero; con varios shards, tableros consecutivos caen en shards distintos
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                status, _, _ = await request(main.app, "POST", "/tasks/", {"title": "w", "board_id": board_id})
+                if status != 200: errors[0] += 1; continue
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(loop(b) for b in boards))
+    p = percentiles(latencies)
+    print(f"writes/s={len(latencies) / SECONDS:8.1f} p50={p['p50'] * 1000:6.1f}ms p99={p['p99'] * 1000:6.1f}ms errors={errors[0]}")
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        asyncio.run(worker())
+    else:
+        print(f"{WRITERS} escritores, synchronous={SYNCHRONOUS}, {SECONDS:.0f}s")
+        for shards in (0, 2, 4):
+            env = {**os.environ, "BENCH_CHILD": "1", "SHARD_COUNT": str(shards), "SQLITE_SYNCHRONOUS": SYNCHRONOUS}
+            print(f"{'sin shards' if not shards else f'{shards} shards':10s}", end=" ", flush=True)
+            subprocess.run([sys.executable, __file__, *sys.argv[1:]], env=env, check=True)
@@ -0,0 +1,51 @@
+# Lecturas y escrituras concurrentes con el perfil SQLite por defecto (WAL, synchronous=NORMAL...)
+# frente a conexiones sin pragmas (journal rollback, synchronous=FULL).
+#   python bench/bench_sqlite_profile.py [segundos] [escritores] [lectores]
+import os, subprocess, sys, threading, time
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+WRITERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+READERS = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+def worker():
+    import _env  # noqa: F401
+    from database import SessionLocal, ReadSessionLocal
+    import crud, migrations, schemas
+    migrations.upgrade()
+    with SessionLocal() as db:
+        board_id = crud.create_board(db, schemas.BoardCreate(name="bench")).id
+        crud.bulk_create_tasks(db, [schemas.TaskCreate(title=f"t{i}", board_id=board_id, position=i) for i in range(500)])
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+
+    def loop(kind):
+        while time.perf_counter() < deadline:
+            try:
+                if kind == "writes":
+                    with SessionLocal() as db:
+                        crud.create_task(db, schemas.TaskCreate(title="w", board_id=board_id))
+                else:
+                    with ReadSessionLocal() as db:
+                        crud.list_tasks_by_board(db, board_id, limit=100)
+                key = kind
+            except Exception:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=loop, args=("writes",)) for _ in range(WRITERS)]
+    threads += [threading.Thread(target=loop, args=("reads",)) for _ in range(READERS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    print(f"writes/s={counts['writes'] / SECONDS:8.1f} reads/s={counts['reads'] / SECONDS:8.1f} errors={counts['errors']}")
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        worker()
+    else:
+        # Cada perfil en su propio proceso: los pragmas se leen de Settings al importar
+        for name, pragmas in (("sin pragmas", "false"), ("perfil WAL", "true")):
+            env = {**os.environ, "BENCH_CHILD": "1", "SQLITE_PRAGMAS_ENABLED": pragmas}
+            print(f"{name:12s}", end=" ", flush=True)
+            subprocess.run([sys.executable, __file__, *sys.argv[1:]], env=env, check=True)
@@ -0,0 +1,53 @@
+# Arranque en frío: de importar main a la primera respuesta, con 1 y con N workers a la vez.
+#   python bench/bench_startup.py [workers]
+# Cada worker es un proceso nuevo (como uvicorn --workers) contra la misma BD SQLite.
+import json, os, subprocess, sys, tempfile, time
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+def child():
+    t0 = time.perf_counter()
+    import asyncio, uuid
+    import _env  # noqa: F401
+    from _asgi import request, lifespan
+    import main
+    t_import = time.perf_counter()
+    async def run():
+        async with lifespan(main.app):
+            t_startup = time.perf_counter()
+            status, _, _ = await request(main.app, "GET", "/boards/")
+            assert status == 200, status
+            t_first = time.perf_counter()
+            # Primer hashing: el backend bcrypt ya está cargado si hubo precalentado
+            status, _, _ = await request(main.app, "POST", "/auth/register", {"email": f"{uuid.uuid4().hex}@example.com", "password": "Startup1234"})
+            assert status == 200, status
+            t_hash = time.perf_counter()
+        return t_startup, t_first, t_hash
+    t_startup, t_first, t_hash = asyncio.run(run())
+    print(json.dumps({
+        "import": t_import - t0, "startup": t_startup - t_import,
+        "first": t_first - t_startup, "total": t_first - t0, "first_hash": t_hash - t_first,
+    }))
+
+def launch(n, env):
+    procs = [subprocess.Popen([sys.executable, __file__], env={**env, "BENCH_CHILD": "1"}, stdout=subprocess.PIPE, text=True) for _ in range(n)]
+    out = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    assert all(p.returncode == 0 for p in procs)
+    return out
+
+def report(label, runs):
+    worst = {k: max(r[k] for r in runs) * 1000 for k in runs[0]}
+    print(f"{label:26s} import={worst['import']:6.0f}ms arranque={worst['startup']:6.0f}ms "
+          f"1ª resp={worst['first']:6.1f}ms total={worst['total']:6.0f}ms 1er hash={worst['first_hash']:6.0f}ms")
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        child(); sys.exit()
+    db = os.path.join(tempfile.mkdtemp(prefix="kanban-startup-"), "startup.db")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db}", "SECRET_KEY": "bench-secret-key"}
+    print("peor worker de cada escenario")
+    report("BD nueva (migra), 1", launch(1, env))
+    report("esquema al día, 1", launch(1, env))
+    report("sin precalentado, 1", launch(1, {**env, "PREWARM_ENABLED": "false"}))
+    report(f"esquema al día, {WORKERS}", launch(WORKERS, env))
+    report(f"sin precalentado, {WORKERS}", launch(WORKERS, {**env, "PREWARM_ENABLED": "false"}))
@@ -0,0 +1,86 @@
+# Resumen de un tablero (tareas por grupo y estado): contadores de task_counts frente a un GROUP BY
+# sobre tasks y frente a lo que hacía el cliente (descargar /boards/{id}/tasks y contar).
+# También mide lo que cuesta mantener los contadores en cada cambio de estado.
+#   python bench/bench_summary.py [tareas por tablero] [repeticiones]
+import asyncio, json, random, sys, time
+from collections import Counter
+import _env  # noqa: F401
+from _asgi import percentiles, request
+from sqlalchemy import func
+from seed import seed
+from database import ReadSessionLocal, SessionLocal
+import counters, crud, main, models, schemas
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+BOARDS, GROUPS = 4, 50
+
+def report(name, samples):
+    p = percentiles(samples)
+    print(f"{name:10s} p50={p['p50']:8.2f}ms p95={p['p95']:8.2f}ms p99={p['p99']:8.2f}ms")
+
+def counted(board_id):
+    with ReadSessionLocal() as db:
+        return counters.summaries(db, [board_id])[0]["count"]
+
+def group_by(board_id):
+    # Agregado al vuelo: recorre las tareas del tablero en cada lectura
+    T = models.Task
+    with ReadSessionLocal() as db:
+        rows = db.query(T.group_id, T.status_id, func.count()).filter(T.board_id == board_id).group_by(T.group_id, T.status_id).all()
+    return sum(n for *_, n in rows)
+
+async def client_count(board_id):
+    status, _, body = await request(main.app, "GET", f"/boards/{board_id}/tasks")
+    assert status == 200
+    tasks = json.loads(body)
+    return sum(Counter((t["group_id"], t["status_id"]) for t in tasks).values())
+
+async def summary(board_id):
+    status, _, body = await request(main.app, "GET", f"/boards/{board_id}/summary")
+    assert status == 200
+    return json.loads(body)["count"]
+
+async def timed(fn, board_ids):
+    samples, totals = [], set()
+    for i in range(REPEAT):
+        board_id = board_ids[i % len(board_ids)]
+        t0 = time.perf_counter()
+        out = fn(board_id)
+        if asyncio.iscoroutine(out): out = await out
+        samples.append((time.perf_counter() - t0) * 1000)
+        totals.add(out)
+    return samples, totals
+
+def status_changes(ids, n, maintain):
+    # Cambios de estado tarea a tarea por crud; sin contadores si maintain=False
+    rng, update = random.Random(2), counters.update
+    if not maintain: counters.update = lambda *a, **k: None
+    try:
+        samples = []
+        with SessionLocal() as db:
+            for task_id in rng.sample(ids, n):
+                t0 = time.perf_counter()
+                crud.update_task(db, task_id, schemas.TaskUpdate(status_id=rng.randint(1, 5)))
+                samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+    finally:
+        counters.update = update
+
+async def main_():
+    ids = seed(BOARDS, GROUPS, max(1, TASKS // GROUPS))
+    print(f"{BOARDS} tableros de {ids['tasks'] // BOARDS} tareas, {GROUPS} grupos, {REPEAT} lecturas por método")
+    boards = ids["boards"]
+    # "ruta" y "cliente" pasan por HTTP; "contadores" y "group by" solo por la BD
+    for name, fn in (("ruta", summary), ("contadores", counted), ("group by", group_by), ("cliente", client_count)):
+        samples, totals = await timed(fn, boards)
+        assert totals == {ids["tasks"] // BOARDS}, totals
+        report(name, samples)
+    with ReadSessionLocal() as db:
+        task_ids = [i for (i,) in db.query(models.Task.id)]
+    print("-- cambio de estado de una tarea (update_task)")
+    report("sin", status_changes(task_ids, REPEAT * 4, maintain=False))
+    report("con", status_changes(task_ids, REPEAT * 4, maintain=True))
+
+if __name__ == "__main__":
+    asyncio.run(main_())
@@ -0,0 +1,35 @@
+# Crecimiento de memoria y coste por operación del throttle de login con emails aleatorios
+# (credential stuffing), frente al dict sin expulsión que había antes.
+#   python bench/bench_throttle.py [n_fallos] [max_claves]
+import sys, time, tracemalloc, uuid
+import _env  # noqa: F401
+import migrations
+from throttle import MemoryThrottle, SQLiteThrottle
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+MAX_KEYS = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+class DictThrottle:
+    # Comportamiento anterior de routers/auth._failed_cache
+    def __init__(self): self.data = {}
+    def register_failure(self, key):
+        rec = self.data.get(key, {"count": 0, "lock_until": 0}); rec["count"] += 1; self.data[key] = rec
+    def __len__(self): return len(self.data)
+
+def run(name, throttle, n):
+    keys = [f"{uuid.uuid4().hex}@example.com|10.0.0.1" for _ in range(n)]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for k in keys:
+        throttle.register_failure(k)
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(throttle) if hasattr(throttle, "__len__") else "-"
+    print(f"{name:8s} fallos={n:7d} claves={size!s:>7} mem={current / 1e6:7.1f} MB pico={peak / 1e6:7.1f} MB us/op={elapsed * 1e6 / n:6.1f}")
+
+if __name__ == "__main__":
+    migrations.upgrade()
+    run("dict", DictThrottle(), N)
+    run("memory", MemoryThrottle(5, 900, 900, maxsize=MAX_KEYS), N)
+    run("sqlite", SQLiteThrottle(5, 900, 900), min(N, 2_000))
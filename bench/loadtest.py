@@ -0,0 +1,160 @@
+# Escenarios de carga contra main.app en proceso (ASGI) sobre una BD SQLite temporal sembrada.
+# Informa throughput y p50/p95/p99 por endpoint y guarda los resultados en JSON.
+#   python bench/loadtest.py --scenario board_load --concurrency 32 --duration 10 --out run.json
+#   python bench/loadtest.py --scenario drag_drop --baseline base.json --tolerance 0.2
+import argparse, asyncio, json, platform, random, sys, time
+from collections import defaultdict
+import _env  # noqa: F401
+from _asgi import request, lifespan, percentiles
+from seed import seed
+
+PASSWORD = "Bench1234"
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, app, label, method, path, body=None, query="", ip="127.0.0.1"):
+        t0 = time.perf_counter()
+        status, headers, content = await request(app, method, path, body, query=query, client_ip=ip)
+        self.samples[label].append((time.perf_counter() - t0) * 1000)
+        self.statuses[label][status] += 1
+        return status, content
+
+    def report(self, elapsed: float) -> dict:
+        out = {}
+        for label, samples in sorted(self.samples.items()):
+            statuses = dict(self.statuses[label])
+            errors = sum(n for s, n in statuses.items() if s >= 500)
+            out[label] = {
+                "count": len(samples), "errors": errors, "statuses": {str(k): v for k, v in statuses.items()},
+                "rps": round(len(samples) / elapsed, 1), "mean": round(sum(samples) / len(samples), 3),
+                **{k: round(v, 3) for k, v in percentiles(samples).items()},
+            }
+        return out
+
+class Context:
+    def __init__(self, seeded: dict, tasks_by_board: dict, users: list):
+        self.boards = seeded["boards"]
+        self.groups = seeded["groups"]
+        self.tasks = tasks_by_board
+        self.users = users
+
+# --- Escenarios: una iteración = un "usuario" haciendo una acción completa ---
+async def board_load(app, ctx, rec, rng):
+    board_id = rng.choice(ctx.boards)
+    group_id = rng.choice(ctx.groups[board_id])
+    await rec.call(app, "GET /boards/", "GET", "/boards/", query="limit=50")
+    await rec.call(app, "GET /boards/{id}/full", "GET", f"/boards/{board_id}/full")
+    await rec.call(app, "GET /boards/{id}/groups", "GET", f"/boards/{board_id}/groups")
+    await rec.call(app, "GET /boards/{id}/tasks", "GET", f"/boards/{board_id}/tasks", query="limit=500")
+    await rec.call(app, "GET /groups/{id}/tasks", "GET", f"/groups/{group_id}/tasks")
+
+async def drag_drop(app, ctx, rec, rng):
+    board_id = rng.choice(ctx.boards)
+    task_id, anchor_id = rng.sample(ctx.tasks[board_id], 2)
+    where = "before_id" if rng.random() < 0.5 else "after_id"
+    await rec.call(app, "POST /tasks/{id}/move", "POST", f"/tasks/{task_id}/move", {where: anchor_id})
+    if rng.random() < 0.2:
+        await rec.call(app, "PATCH /tasks/{id}", "PATCH", f"/tasks/{task_id}", {"title": "edited"})
+
+async def login_burst(app, ctx, rec, rng):
+    email = rng.choice(ctx.users)
+    await rec.call(app, "POST /auth/login", "POST", "/auth/login", {"email": email, "password": PASSWORD},
+                   ip=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+
+async def mixed(app, ctx, rec, rng):
+    r = rng.random()
+    await (board_load if r < 0.6 else drag_drop if r < 0.95 else login_burst)(app, ctx, rec, rng)
+
+SCENARIOS = {"board_load": board_load, "drag_drop": drag_drop, "login_burst": login_burst, "mixed": mixed}
+
+def prepare(args) -> Context:
+    from sqlalchemy import select, func
+    from database import SessionLocal
+    from security import hash_password
+    import models
+    seeded = seed(args.boards, args.groups, args.tasks, args.seed)
+    with SessionLocal() as db:
+        tasks = {
+            b: db.scalars(select(models.Task.id).where(models.Task.board_id == b).order_by(func.random()).limit(5000)).all()
+            for b in seeded["boards"]
+        }
+        hashed = hash_password(PASSWORD)
+        users = [f"bench{i}@example.com" for i in range(args.users)]
+        db.add_all(models.User(email=e, hashed_password=hashed, is_active=True) for e in users)
+        db.commit()
+    return Context(seeded, tasks, users)
+
+async def run(args) -> dict:
+    import main
+    app = main.app
+    ctx = prepare(args)
+    rec = Recorder()
+    scenario = SCENARIOS[args.scenario]
+    remaining = [args.requests]
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    async def worker(n):
+        rng = random.Random(args.seed * 1000 + n)
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline: return
+            if deadline is None:
+                if remaining[0] <= 0: return
+                remaining[0] -= 1
+            await scenario(app, ctx, rec, rng)
+
+    async with lifespan(app):
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+    return {
+        "meta": {
+            "scenario": args.scenario, "concurrency": args.concurrency, "elapsed_s": round(elapsed, 3),
+            "boards": args.boards, "groups_per_board": args.groups, "tasks_per_group": args.tasks,
+            "python": platform.python_version(), "timestamp": int(time.time()),
+        },
+        "endpoints": rec.report(elapsed),
+    }
+
+def compare(result: dict, baseline: dict, tolerance: float, metric: str = "p95") -> bool:
+    ok = True
+    print(f"\n{'endpoint':28s} {'base ' + metric:>12s} {'actual':>10s} {'delta':>8s}")
+    for label, cur in result["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(label)
+        if not base or not base.get(metric): continue
+        delta = cur[metric] / base[metric] - 1
+        flag = " REGRESION" if delta > tolerance else ""
+        ok = ok and not flag
+        print(f"{label:28s} {base[metric]:12.2f} {cur[metric]:10.2f} {delta:+8.1%}{flag}")
+    return ok
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de carga en proceso para todos los routers")
+    p.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--duration", type=float, default=None, help="segundos (si no, --requests iteraciones)")
+    p.add_argument("--requests", type=int, default=500)
+    p.add_argument("--boards", type=int, default=3)
+    p.add_argument("--groups", type=int, default=200, help="grupos por tablero")
+    p.add_argument("--tasks", type=int, default=50, help="tareas por grupo")
+    p.add_argument("--users", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="fichero JSON de resultados")
+    p.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    p.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento de p95 permitido")
+    args = p.parse_args()
+
+    result = asyncio.run(run(args))
+    print(f"{'endpoint':28s} {'n':>7s} {'rps':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'5xx':>5s}")
+    for label, r in result["endpoints"].items():
+        print(f"{label:28s} {r['count']:7d} {r['rps']:8.1f} {r['p50']:9.2f} {r['p95']:9.2f} {r['p99']:9.2f} {r['errors']:5d}")
+    if args.out:
+        with open(args.out, "w") as f: json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            if not compare(result, json.load(f), args.tolerance): sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Genera tableros realistas en la BD de DATABASE_URL (por defecto, una temporal).
+#   python bench/seed.py --boards 5 --groups 400 --tasks 100
+import argparse, random, time
+import _env  # noqa: F401
+from sqlalchemy import insert
+from database import engine, SessionLocal
+from crud import POSITION_GAP
+import counters, migrations, models, search
+
+WORDS = "api login bug fix refactor deploy cache index query page modal auth token board card column drag drop report export import sync mobile review".split()
+CHUNK = 10_000
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).capitalize()
+
+def seed(boards: int, groups_per_board: int, tasks_per_group: int, seed: int = 0, statuses: int = 5) -> dict:
+    # Inserciones por conjuntos en bloques de CHUNK filas, una transacción por bloque. Sobre la tabla
+    # (Core): el bulk insert del ORM parte el lote cada vez que description alterna entre None y texto
+    rng = random.Random(seed)
+    migrations.upgrade()
+    ids = {"boards": [], "groups": {}, "tasks": 0}
+    with SessionLocal() as db:
+        for b in range(boards):
+            board_id = db.scalar(insert(models.Board).values(name=f"Board {b}", version=0).returning(models.Board.id))
+            group_rows = [{"name": f"Col {g}", "board_id": board_id, "position": g * POSITION_GAP} for g in range(groups_per_board)]
+            group_ids = db.scalars(insert(models.Group).returning(models.Group.id, sort_by_parameter_order=True), group_rows).all()
+            db.commit()
+            ids["boards"].append(board_id)
+            ids["groups"][board_id] = group_ids
+            batch = []
+            for group_id in group_ids:
+                for p in range(tasks_per_group):
+                    batch.append({
+                        "title": _title(rng),
+                        "description": _title(rng) if rng.random() < 0.5 else None,
+                        "board_id": board_id, "group_id": group_id,
+                        "status_id": rng.randint(1, statuses), "position": p * POSITION_GAP,
+                    })
+                    if len(batch) >= CHUNK:
+                        db.execute(insert(models.Task.__table__), batch); db.commit(); ids["tasks"] += len(batch); batch = []
+            if batch:
+                db.execute(insert(models.Task.__table__), batch); db.commit(); ids["tasks"] += len(batch)
+    # Las inserciones directas no pasan por crud: índice de búsqueda y contadores se rehacen al final
+    with engine.begin() as conn:
+        search.rebuild(conn); counters.rebuild(conn)
+    return ids
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Genera tableros, grupos y tareas para benchmarks")
+    p.add_argument("--boards", type=int, default=5)
+    p.add_argument("--groups", type=int, default=400, help="grupos por tablero")
+    p.add_argument("--tasks", type=int, default=100, help="tareas por grupo")
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+    t0 = time.perf_counter()
+    out = seed(a.boards, a.groups, a.tasks, a.seed)
+    print(f"{len(out['boards'])} tableros, {sum(len(g) for g in out['groups'].values())} grupos, "
+          f"{out['tasks']} tareas en {time.perf_counter() - t0:.1f}s -> {engine.url}")
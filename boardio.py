@@ -0,0 +1,128 @@
+# Exportación/importación de un tablero en NDJSON con memoria acotada.
+# Una línea por objeto: {"type": "board"|"group"|"task", ...campos del esquema *Out};
+# primero el tablero, luego sus grupos y después sus tareas.
+import json
+import anyio
+from typing import AsyncIterator
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import sessionmaker
+from database import ReadSessionLocal
+from pagination import NDJSON
+from settings import settings
+import archive, crud, lean, schemas, sharding
+
+_SCHEMAS = {"board": schemas.BoardOut, "group": schemas.GroupOut, "task": schemas.TaskOut}
+
+def _line(kind: str, data: dict) -> str:
+    return json.dumps({"type": kind, **data}, ensure_ascii=False, separators=(",", ":"))
+
+def export_response(board_id: int, sessions: sessionmaker = ReadSessionLocal) -> StreamingResponse:
+    batch = settings.NDJSON_BATCH_SIZE
+    def gen():
+        # Una sola transacción de lectura: instantánea coherente aunque haya escrituras durante la descarga
+        with sessions() as db:
+            b = crud.get_board(db, board_id)
+            if b is None: return
+            yield _line("board", schemas.BoardOut.from_orm(b).dict()) + "\n"
+            buf = []
+            for kind, q in (("group", crud.query_groups_by_board(db, board_id)), ("task", crud.query_tasks_by_board(db, board_id))):
+                keys = tuple(_SCHEMAS[kind].__fields__)
+                for row in lean.project(q, _SCHEMAS[kind]).yield_per(batch):
+                    buf.append(_line(kind, dict(zip(keys, row))))
+                    if len(buf) >= batch:
+                        yield "\n".join(buf) + "\n"; buf.clear()
+            # Las archivadas, como tareas más: al importar vuelven a la tabla caliente
+            for t in archive.iter_tasks(db, board_id):
+                buf.append(_line("task", t))
+                if len(buf) >= batch:
+                    yield "\n".join(buf) + "\n"; buf.clear()
+            if buf:
+                yield "\n".join(buf) + "\n"
+    headers = {"Content-Disposition": f'attachment; filename="board-{board_id}.ndjson"'}
+    return StreamingResponse(gen(), media_type=NDJSON, headers=headers)
+
+class Importer:
+    """Consume líneas y escribe por bloques de IMPORT_CHUNK_SIZE filas, un commit por bloque.
+
+    En memoria solo queda el bloque pendiente y el mapa de ids de grupos (antiguo -> nuevo)."""
+
+    def __init__(self):
+        self.line = 0
+        self.board = None
+        # Sesiones de la BD del tablero (en modo shard, la del shard que le asigna el catálogo)
+        self.sessions = None
+        self.kind, self.pending = None, []
+        self.id_map, self.counts = {}, {"groups": 0, "tasks": 0}
+
+    def _error(self, msg: str):
+        raise HTTPException(status_code=400, detail=f"Línea {self.line}: {msg}")
+
+    def _parse(self, raw: bytes):
+        try:
+            obj = json.loads(raw)
+            kind = obj.pop("type")
+            return kind, _SCHEMAS[kind].parse_obj(obj)
+        except ValidationError as e:  # antes que ValueError: en pydantic v1 es subclase
+            self._error(f"Datos inválidos: {e.errors()[0]['loc'][0]} {e.errors()[0]['msg']}")
+        except (ValueError, AttributeError, TypeError):
+            self._error("JSON inválido")
+        except KeyError:
+            self._error("Tipo desconocido")
+
+    def feed(self, lines: list):
+        for raw in lines:
+            self.line += 1
+            if not raw.strip(): continue
+            kind, item = self._parse(raw)
+            if (kind == "board") != (self.board is None and self.kind is None):
+                self._error("El tablero debe ser la primera línea y la única de su tipo")
+            # Al cambiar de tipo se escribe lo pendiente: los grupos existen antes de remapear sus tareas
+            if kind != self.kind: self.flush()
+            if kind == "task" and item.group_id is not None and item.group_id not in self.id_map:
+                self._error(f"Grupo {item.group_id} no declarado antes de sus tareas")
+            self.kind = kind
+            self.pending.append(item)
+            if len(self.pending) >= settings.IMPORT_CHUNK_SIZE: self.flush()
+
+    def flush(self):
+        if not self.pending: return
+        if self.kind == "board":
+            board_id, self.sessions = sharding.new_board()
+        with self.sessions() as db:
+            if self.kind == "board":
+                self.board = crud.create_board(db, schemas.BoardCreate(name=self.pending[0].name), board_id=board_id)
+            elif self.kind == "group":
+                self.counts["groups"] += crud.import_groups(db, self.board.id, self.pending, self.id_map)
+            else:
+                self.counts["tasks"] += crud.import_tasks(db, self.board.id, self.pending, self.id_map)
+        self.pending = []
+
+    def abort(self):
+        if self.board is not None:
+            with self.sessions() as db:
+                crud.purge_board(db, self.board.id)
+
+    def result(self) -> dict:
+        if self.board is None: raise HTTPException(status_code=400, detail="Importación vacía")
+        return {"board": schemas.BoardOut.from_orm(self.board), **self.counts}
+
+async def import_stream(stream: AsyncIterator[bytes]) -> dict:
+    # Trocea el cuerpo en líneas según llega; cada tramo se procesa en el threadpool (E/S de BD síncrona)
+    importer, buf = Importer(), b""
+    try:
+        async for chunk in stream:
+            *lines, buf = (buf + chunk).split(b"\n")
+            if len(buf) > settings.IMPORT_MAX_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"Línea de más de {settings.IMPORT_MAX_LINE_BYTES} bytes")
+            if lines: await run_in_threadpool(importer.feed, lines)
+        await run_in_threadpool(importer.feed, [buf])
+        await run_in_threadpool(importer.flush)
+    except BaseException:
+        # Blindado: si el cliente se desconecta la limpieza debe terminar igualmente
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(importer.abort)
+        raise
+    return importer.result()
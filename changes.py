@@ -0,0 +1,70 @@
+# Registro de cambios por tablero para la sincronización incremental (GET /boards/{id}/changes?since=).
+# crud añade una fila por objeto tocado, con la versión del tablero que deja la mutación y en la misma
+# transacción. Al leer se compacta: de cada objeto cuenta solo su último cambio.
+# La retención está acotada: purge.py recorta lo anterior a las últimas CHANGES_RETENTION_VERSIONS
+# versiones y sube boards.changes_since; quien pida una versión anterior debe recargar el tablero.
+from typing import Iterable, Optional
+from sqlalchemy import and_, delete, false, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+import lean, models, schemas
+
+C, B = models.BoardChange.__table__, models.Board.__table__
+
+def log(db: Session, entries: Iterable):
+    # entries: (board_id, kind, row_id, deleted); la versión es la que ya dejó _touch_board
+    entries = list(entries)
+    if not entries: return
+    versions = dict(db.execute(select(B.c.id, B.c.version).where(B.c.id.in_({e[0] for e in entries}))).all())
+    db.execute(insert(C), [
+        {"board_id": b, "version": versions[b], "kind": kind, "row_id": row_id, "deleted": deleted}
+        for b, kind, row_id, deleted in entries if b in versions
+    ])
+
+def log_rows(db: Session, board_id: int, kind: str, model, from_id: int):
+    # Por conjuntos: filas nuevas del tablero (id >= from_id) insertadas sin pasar por log
+    t = model.__table__
+    version = select(B.c.version).where(B.c.id == board_id).scalar_subquery()
+    rows = select(t.c.board_id, version, literal(kind), t.c.id, false()).where(t.c.board_id == board_id, t.c.id >= from_id)
+    db.execute(insert(C).from_select(["board_id", "version", "kind", "row_id", "deleted"], rows))
+
+def since(db: Session, board, version: int, max_rows: int) -> Optional[dict]:
+    # None: la versión ya no está en el registro (o el delta es mayor que max_rows) y toca recargar
+    if version < board.changes_since or version > board.version: return None
+    out = {"version": board.version, "board": None, "groups": [], "tasks": [], "deleted_groups": [], "deleted_tasks": []}
+    if version == board.version: return out
+    last = (
+        select(func.max(C.c.id)).where(C.c.board_id == board.id, C.c.version > version)
+        .group_by(C.c.kind, C.c.row_id)
+    )
+    latest = db.execute(select(C.c.kind, C.c.row_id, C.c.deleted).where(C.c.id.in_(last)).limit(max_rows + 1)).all()
+    if len(latest) > max_rows: return None
+    upserts = {"board": [], "group": [], "task": []}
+    for kind, row_id, deleted in latest:
+        if deleted: out[f"deleted_{kind}s"].append(row_id)
+        else: upserts[kind].append(row_id)
+    if upserts["board"]: out["board"] = {"id": board.id, "name": board.name}
+    for kind, model, schema in (("group", models.Group, schemas.GroupOut), ("task", models.Task, schemas.TaskOut)):
+        if not upserts[kind]: continue
+        q = db.query(model).filter(model.id.in_(upserts[kind]), model.board_id == board.id)
+        if kind == "group": q = q.filter(model.deleted_at.is_(None))
+        found = lean.dicts(lean.rows(q.order_by(model.id.asc()), schema), schema)
+        out[f"{kind}s"] = found
+        # Lo que ya no está (borrado o movido a otro tablero después del cambio) cuenta como borrado
+        gone = set(upserts[kind]) - {r["id"] for r in found}
+        out[f"deleted_{kind}s"] = sorted(out[f"deleted_{kind}s"] + list(gone))
+    return out
+
+def trim(db: Session, keep_versions: int, batch: int) -> int:
+    # Un lote: borra entradas más viejas que las últimas keep_versions de su tablero y sube el suelo
+    old = and_(C.c.board_id == B.c.id, C.c.version <= B.c.version - keep_versions)
+    rows = db.execute(select(C.c.id, C.c.board_id).select_from(C.join(B, old)).limit(batch)).all()
+    if rows:
+        db.execute(delete(C).where(C.c.id.in_([r.id for r in rows])))
+        floor = B.c.version - keep_versions
+        db.execute(update(B).where(B.c.id.in_({r.board_id for r in rows}), B.c.changes_since < floor).values(changes_since=floor))
+    return len(rows)
+
+def drop_board(db: Session, board_id: int, batch: int) -> int:
+    ids = db.scalars(select(C.c.id).where(C.c.board_id == board_id).limit(batch)).all()
+    if ids: db.execute(delete(C).where(C.c.id.in_(ids)))
+    return len(ids)
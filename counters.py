@@ -0,0 +1,117 @@
+# Contadores de tareas por (tablero, grupo, estado) en task_counts, mantenidos por crud en la misma
+# transacción que la mutación: los resúmenes leen unas pocas filas en vez de recorrer las tareas.
+#   python counters.py check     # compara con un GROUP BY sobre tasks
+#   python counters.py rebuild   # los recalcula desde cero
+import argparse
+from collections import Counter
+from typing import Iterable, List
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from database import board_engines
+import models
+
+# Clave de "sin grupo"/"sin estado": NULL no cuenta para la clave primaria ni para ON CONFLICT
+NONE = -2**31
+
+_UPSERT = (
+    "INSERT INTO task_counts (board_id, group_key, status_key, count) {source} "
+    "ON CONFLICT (board_id, group_key, status_key) DO UPDATE SET count = task_counts.count + excluded.count"
+)
+_GROUPED = (
+    f"SELECT board_id, coalesce(group_id, {NONE}), coalesce(status_id, {NONE}), {{sign}} * count(*) "
+    "FROM tasks WHERE {where} GROUP BY 1, 2, 3"
+)
+
+def key(t) -> tuple:
+    if isinstance(t, tuple): return t
+    get = t.get if isinstance(t, dict) else lambda k: getattr(t, k)
+    return get("board_id"), get("group_id"), get("status_id")
+
+def update(db: Session, removed: Iterable = (), added: Iterable = ()):
+    # Filas o claves antes/después del cambio; los que se compensan (mismo grupo y estado) no escriben
+    deltas = Counter(key(t) for t in added)
+    deltas.subtract(key(t) for t in removed)
+    rows = [
+        {"b": b, "g": NONE if g is None else g, "s": NONE if s is None else s, "n": n}
+        for (b, g, s), n in deltas.items() if n
+    ]
+    if rows: db.execute(text(_UPSERT.format(source="VALUES (:b, :g, :s, :n)")), rows)
+
+def _from_tasks(db: Session, where: str, params: dict, sign: int):
+    sql = text(_UPSERT.format(source=_GROUPED.format(sign=sign, where=where)))
+    if "ids" in params: sql = sql.bindparams(bindparam("ids", expanding=True))
+    db.execute(sql, params)
+
+def add_tasks(db: Session, ids: List[int], sign: int = 1):
+    # Por conjuntos y leyendo las filas actuales: sign=-1 antes de borrarlas o cambiarlas
+    if ids: _from_tasks(db, "id IN :ids", {"ids": list(ids)}, sign)
+
+def add_board(db: Session, board_id: int, from_id: int = 0):
+    # Filas nuevas de un tablero (id >= from_id) insertadas sin pasar por update
+    _from_tasks(db, "board_id = :b AND id >= :f", {"b": board_id, "f": from_id}, 1)
+
+def drop_board(db: Session, board_id: int):
+    db.execute(text("DELETE FROM task_counts WHERE board_id = :b"), {"b": board_id})
+
+def _status(s: int):
+    return None if s == NONE else s
+
+def summaries(db: Session, board_ids: List[int]) -> List[dict]:
+    # Grupos vivos en su orden, más el cubo group_id=None: tareas sin grupo o de grupos borrados
+    if not board_ids: return []
+    out = {b: {"board_id": b, "count": 0, "statuses": Counter(), "groups": {}} for b in board_ids}
+    G = models.Group
+    for group_id, board_id in db.query(G.id, G.board_id).filter(G.board_id.in_(board_ids), G.deleted_at.is_(None)).order_by(G.position.asc(), G.id.asc()):
+        out[board_id]["groups"][group_id] = Counter()
+    for board_id in board_ids:
+        out[board_id]["groups"][None] = Counter()
+    rows = db.execute(
+        text(
+            "SELECT c.board_id, g.id, c.status_key, sum(c.count) FROM task_counts c "
+            "LEFT JOIN groups g ON g.id = c.group_key AND g.deleted_at IS NULL "
+            "WHERE c.board_id IN :ids AND c.count <> 0 GROUP BY 1, 2, 3"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(board_ids)},
+    )
+    for board_id, group_id, status, n in rows:
+        s = out[board_id]
+        s["count"] += n; s["statuses"][_status(status)] += n
+        s["groups"][group_id][_status(status)] += n
+    def statuses(c: Counter):
+        return [{"status_id": k, "count": v} for k, v in sorted(c.items(), key=lambda kv: (kv[0] is not None, kv[0] or 0))]
+    return [
+        {
+            "board_id": s["board_id"], "count": s["count"], "statuses": statuses(s["statuses"]),
+            "groups": [{"group_id": g, "count": sum(c.values()), "statuses": statuses(c)} for g, c in s["groups"].items()],
+        }
+        for s in out.values()
+    ]
+
+def rebuild(conn) -> int:
+    conn.exec_driver_sql("DELETE FROM task_counts")
+    conn.exec_driver_sql(_UPSERT.format(source=_GROUPED.format(sign=1, where="1")))
+    return conn.exec_driver_sql("SELECT count(*) FROM task_counts").scalar()
+
+def check(conn) -> list:
+    # Claves cuyo contador no coincide con las tareas: [(board_id, group_key, status_key, contador, real)]
+    counted = {tuple(r[:3]): r[3] for r in conn.exec_driver_sql("SELECT board_id, group_key, status_key, count FROM task_counts WHERE count <> 0")}
+    actual = {tuple(r[:3]): r[3] for r in conn.exec_driver_sql(_GROUPED.format(sign=1, where="1"))}
+    return [(*k, counted.get(k, 0), actual.get(k, 0)) for k in sorted(counted.keys() | actual.keys()) if counted.get(k, 0) != actual.get(k, 0)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contadores de tareas por tablero, grupo y estado")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        for e in board_engines():
+            with e.begin() as conn:
+                print(f"{e.url}: {rebuild(conn)} contadores")
+    else:
+        wrong = []
+        for e in board_engines():
+            with e.connect() as conn:
+                wrong += check(conn)
+        for row in wrong[:20]:
+            print("tablero %s grupo %s estado %s: %s contadas, %s reales" % row)
+        if wrong: raise SystemExit(f"{len(wrong)} contadores desajustados")
+        print("contadores al día")
@@ -1,97 +1,569 @@
+from typing import List
+from datetime import datetime, timezone
+from sqlalchemy import func, and_, or_, exists, select, insert, update, delete
 from sqlalchemy.orm import Session
-import models, schemas
+from events import broker
+import changes, counters, lean, models, purge, schemas, search, sharding
+
+# Separación entre posiciones consecutivas: deja hueco para insertar sin renumerar
+POSITION_GAP = 1024
+
+_TASK_FIELDS = ("title", "description", "board_id", "group_id", "status_id", "position")
+_GROUP_FIELDS = ("name", "board_id", "position")
+
+class InvalidTarget(Exception):
+    """Tablero o grupo destino inexistente o borrado (404) o grupo de otro tablero (400)."""
+
+    def __init__(self, detail: str, status_code: int = 404):
+        super().__init__(detail)
+        self.detail, self.status_code = detail, status_code
+
+def _commit(db: Session):
+    # En modo group-commit el escritor confirma varias mutaciones juntas: aquí solo flush
+    if db.info.get("group_commit"): db.flush()
+    else: db.commit()
+
+# -------------------------
+# Eventos de cambio (siempre después del commit)
+# -------------------------
+def _data(obj, fields):
+    return {"id": obj.id, **{f: getattr(obj, f) for f in fields}}
+
+def _emit(board_id, *events):
+    if board_id is not None and broker.watching(board_id):
+        broker.publish(board_id, list(events))
+
+def _emit_grouped(pairs):
+    # [(board_id, evento)] -> un mensaje por tablero
+    by_board = {}
+    for board_id, ev in pairs:
+        by_board.setdefault(board_id, []).append(ev)
+    for board_id, evs in by_board.items():
+        _emit(board_id, *evs)
 
 # -------------------------
 # Boards
 # -------------------------
-def create_board(db: Session, board: schemas.BoardCreate):
-    b = models.Board(name=board.name)
-    db.add(b); db.commit(); db.refresh(b)
+def _touch_board(db: Session, *board_ids):
+    # Sube la versión de cada tablero afectado; se confirma con el resto de la transacción
+    ids = {i for i in board_ids if i is not None}
+    if ids:
+        db.query(models.Board).filter(models.Board.id.in_(ids)).update(
+            {models.Board.version: models.Board.version + 1}, synchronize_session=False
+        )
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def _board_alive(board_id):
+    # Subconsulta constante (no correlacionada): SQLite la evalúa una vez por consulta
+    B = models.Board
+    return exists().where(B.id == board_id, B.deleted_at.is_(None))
+
+def _group_alive(group_id):
+    G, B = models.Group, models.Board
+    return exists().where(G.id == group_id, G.deleted_at.is_(None), B.id == G.board_id, B.deleted_at.is_(None))
+
+def _new_id(db: Session, table: str):
+    # Rango del shard o, sin shards, secuencia de tareas (sharding.new_ids); None y lo pone la BD
+    ids = sharding.new_ids(db, table, 1)
+    return ids[0] if ids else None
+
+def _get_live(db: Session, model, obj_id: int):
+    obj = db.get(model, obj_id)
+    return obj if obj is not None and obj.deleted_at is None else None
+
+def create_board(db: Session, board: schemas.BoardCreate, board_id: int = None):
+    # board_id: en modo shard el id lo asigna el catálogo (sharding.new_board)
+    b = models.Board(id=board_id, name=board.name)
+    db.add(b); _commit(db); db.refresh(b)
     return b
 
-def list_boards(db: Session):
-    return db.query(models.Board).order_by(models.Board.id.asc()).all()
+def query_boards(db: Session, after=None, limit=None):
+    q = db.query(models.Board).filter(models.Board.deleted_at.is_(None))
+    if after is not None: q = q.filter(models.Board.id > after[0])
+    return q.order_by(models.Board.id.asc()).limit(limit)
+
+def list_boards(db: Session, after=None, limit=None):
+    return query_boards(db, after, limit).all()
+
+def get_board(db: Session, board_id: int):
+    return _get_live(db, models.Board, board_id)
+
+def board_version(db: Session, board_id: int):
+    return db.scalar(select(models.Board.version).where(models.Board.id == board_id, models.Board.deleted_at.is_(None)))
+
+def group_board_version(db: Session, group_id: int):
+    # (board_id, version) del tablero del grupo, o None
+    row = db.execute(
+        select(models.Board.id, models.Board.version).join(models.Group, models.Group.board_id == models.Board.id)
+        .where(models.Group.id == group_id, models.Group.deleted_at.is_(None), models.Board.deleted_at.is_(None))
+    ).first()
+    return tuple(row) if row else None
+
+def get_board_full(db: Session, board: models.Board):
+    # Tablero, grupos ordenados y tareas anidadas con dos consultas de columnas (sin instancias ORM)
+    groups = lean.dicts(lean.rows(query_groups_by_board(db, board.id), schemas.GroupOut), schemas.GroupOut)
+    by_group = {g["id"]: g.setdefault("tasks", []) for g in groups}
+    loose = []
+    for t in lean.dicts(lean.rows(query_tasks_by_board(db, board.id), schemas.TaskOut), schemas.TaskOut):
+        by_group.get(t["group_id"], loose).append(t)
+    return {"name": board.name, "id": board.id, "groups": groups, "tasks": loose}
 
 def update_board(db: Session, board_id: int, payload: schemas.BoardUpdate):
-    b = db.get(models.Board, board_id)
+    b = _get_live(db, models.Board, board_id)
     if not b: return None
     if payload.name is not None: b.name = payload.name
-    db.commit(); db.refresh(b); return b
+    _touch_board(db, b.id); changes.log(db, [(b.id, "board", b.id, False)])
+    _commit(db); db.refresh(b)
+    _emit(b.id, {"type": "board.updated", "data": {"id": b.id, "name": b.name}})
+    return b
 
 def delete_board(db: Session, board_id: int) -> bool:
-    b = db.get(models.Board, board_id)
+    # Fase 1: solo se marca; grupos y tareas los elimina purge.py por lotes
+    b = _get_live(db, models.Board, board_id)
     if not b: return False
-    db.delete(b); db.commit(); return True
+    b.deleted_at = _now(); _touch_board(db, board_id); _commit(db)
+    _emit(board_id, {"type": "board.deleted", "data": {"id": board_id}})
+    purge.wake()
+    return True
 
 # -------------------------
 # Groups
 # -------------------------
 def create_group(db: Session, group: schemas.GroupCreate):
-    g = models.Group(name=group.name, board_id=group.board_id, position=group.position or 0)
-    db.add(g); db.commit(); db.refresh(g); return g
+    g = models.Group(id=_new_id(db, "groups"), name=group.name, board_id=group.board_id, position=group.position or 0)
+    db.add(g); _touch_board(db, g.board_id); db.flush()
+    changes.log(db, [(g.board_id, "group", g.id, False)]); _commit(db); db.refresh(g)
+    _emit(g.board_id, {"type": "group.created", "data": _data(g, _GROUP_FIELDS)})
+    return g
+
+def query_groups_by_board(db: Session, board_id: int):
+    G = models.Group
+    return db.query(G).filter(G.board_id == board_id, G.deleted_at.is_(None), _board_alive(board_id)).order_by(G.position.asc())
 
 def list_groups_by_board(db: Session, board_id: int):
-    return db.query(models.Group).filter(models.Group.board_id == board_id).order_by(models.Group.position.asc()).all()
+    return query_groups_by_board(db, board_id).all()
 
 def update_group(db: Session, group_id: int, payload: schemas.GroupUpdate):
-    g = db.get(models.Group, group_id)
+    g = _get_live(db, models.Group, group_id)
     if not g: return None
     if payload.name is not None: g.name = payload.name
     if payload.position is not None: g.position = payload.position
-    db.commit(); db.refresh(g); return g
+    _touch_board(db, g.board_id); changes.log(db, [(g.board_id, "group", g.id, False)])
+    _commit(db); db.refresh(g)
+    _emit(g.board_id, {"type": "group.updated", "data": _data(g, _GROUP_FIELDS)})
+    return g
 
 def delete_group(db: Session, group_id: int) -> bool:
-    g = db.get(models.Group, group_id)
+    # Fase 1: solo se marca; purge.py desasigna sus tareas (como ondelete=SET NULL) y borra la fila
+    g = _get_live(db, models.Group, group_id)
     if not g: return False
-    db.delete(g); db.commit(); return True
+    board_id = g.board_id
+    g.deleted_at = _now(); _touch_board(db, board_id)
+    changes.log(db, [(board_id, "group", group_id, True)]); _commit(db)
+    _emit(board_id, {"type": "group.deleted", "data": {"id": group_id}})
+    purge.wake()
+    return True
 
 # -------------------------
 # Tasks
 # -------------------------
 def create_task(db: Session, task: schemas.TaskCreate):
+    # Versión del tablero antes de validar: con el bloqueo de escritura tomado, tablero y grupo no
+    # pueden marcarse como borrados (ni purgarse) entre la comprobación y el INSERT
+    B = models.Board
+    if not db.query(B).filter(B.id == task.board_id, B.deleted_at.is_(None)).update({B.version: B.version + 1}, synchronize_session=False):
+        raise InvalidTarget("Tablero no encontrado")
+    _check_target(db, task.board_id, task.group_id)
     t = models.Task(
+        id=_new_id(db, "tasks"),
         title=task.title,
         description=task.description,
         board_id=task.board_id,
         group_id=task.group_id,
         status_id=task.status_id,
-        position=task.position or 0,
+        position=task.position if task.position is not None else _next_position(db, task.board_id, task.group_id),
     )
-    db.add(t); db.commit(); db.refresh(t); return t
+    db.add(t); db.flush()
+    search.index_tasks(db, [t]); counters.update(db, added=[t])
+    changes.log(db, [(t.board_id, "task", t.id, False)]); _commit(db); db.refresh(t)
+    _emit(t.board_id, {"type": "task.created", "data": _data(t, _TASK_FIELDS)})
+    return t
 
-def list_tasks_by_board(db: Session, board_id: int):
-    return (
-        db.query(models.Task)
-        .filter(models.Task.board_id == board_id)
-        .order_by(models.Task.group_id.asc().nullsfirst(), models.Task.position.asc(), models.Task.id.asc())
-        .all()
-    )
+def _after_position(after):
+    # Keyset sobre (position, id)
+    T = models.Task
+    position, task_id = after
+    return or_(T.position > position, and_(T.position == position, T.id > task_id))
 
-def list_tasks_by_group(db: Session, group_id: int):
-    return (
-        db.query(models.Task)
-        .filter(models.Task.group_id == group_id)
-        .order_by(models.Task.position.asc(), models.Task.id.asc())
-        .all()
-    )
+def query_tasks_by_board(db: Session, board_id: int, after=None, limit=None):
+    T = models.Task
+    q = db.query(T).filter(T.board_id == board_id, _board_alive(board_id))
+    if after is not None:
+        group_id, rest = after[0], after[1:]
+        if group_id is None:
+            q = q.filter(or_(T.group_id.isnot(None), and_(T.group_id.is_(None), _after_position(rest))))
+        else:
+            q = q.filter(or_(T.group_id > group_id, and_(T.group_id == group_id, _after_position(rest))))
+    return q.order_by(T.group_id.asc().nullsfirst(), T.position.asc(), T.id.asc()).limit(limit)
+
+def list_tasks_by_board(db: Session, board_id: int, after=None, limit=None):
+    return query_tasks_by_board(db, board_id, after, limit).all()
+
+def query_tasks_by_group(db: Session, group_id: int, after=None, limit=None):
+    q = db.query(models.Task).filter(models.Task.group_id == group_id, _group_alive(group_id))
+    if after is not None: q = q.filter(_after_position(after))
+    return q.order_by(models.Task.position.asc(), models.Task.id.asc()).limit(limit)
+
+def list_tasks_by_group(db: Session, group_id: int, after=None, limit=None):
+    return query_tasks_by_group(db, group_id, after, limit).all()
+
+def _task_changes(task_id: int, old_board_id: int, board_id: int) -> list:
+    # Al cambiar de tablero, para el de origen la tarea desaparece
+    if old_board_id == board_id: return [(board_id, "task", task_id, False)]
+    return [(old_board_id, "task", task_id, True), (board_id, "task", task_id, False)]
 
 def update_task(db: Session, task_id: int, payload: schemas.TaskUpdate):
     t = db.get(models.Task, task_id)
     if not t: return None
-    for field in ("title","description","status_id","group_id","board_id","position"):
+    old_board_id, old_key = t.board_id, counters.key(t)
+    board_id = payload.board_id if payload.board_id is not None else t.board_id
+    # "group_id": null explícito saca la tarea del grupo (p. ej. al cambiarla de tablero)
+    group_id = payload.group_id if "group_id" in payload.__fields_set__ else t.group_id
+    # Como create_task: primero el bloqueo de escritura, después la validación del destino
+    _touch_board(db, old_board_id, board_id)
+    _check_target(db, board_id, group_id)
+    for field in ("title","description","status_id","position"):
         val = getattr(payload, field, None)
         if val is not None: setattr(t, field, val)
-    db.commit(); db.refresh(t); return t
+    t.board_id, t.group_id = board_id, group_id
+    search.index_tasks(db, [t]); counters.update(db, removed=[old_key], added=[t])
+    changes.log(db, _task_changes(t.id, old_board_id, t.board_id))
+    _commit(db); db.refresh(t)
+    event = {"type": "task.updated", "data": _data(t, _TASK_FIELDS)}
+    _emit_grouped([(old_board_id, event), (t.board_id, event)] if old_board_id != t.board_id else [(t.board_id, event)])
+    return t
+
+def _siblings(db: Session, board_id: int, group_id, exclude_id: int):
+    q = db.query(models.Task).filter(models.Task.id != exclude_id)
+    if group_id is None:
+        return q.filter(models.Task.board_id == board_id, models.Task.group_id.is_(None))
+    return q.filter(models.Task.group_id == group_id)
+
+def _rebalance(db: Session, board_id: int, group_id, exclude_id: int):
+    # Solo cuando no queda hueco entre vecinos: renumera el grupo con POSITION_GAP
+    siblings = _siblings(db, board_id, group_id, exclude_id).order_by(models.Task.position.asc(), models.Task.id.asc()).all()
+    for i, s in enumerate(siblings, start=1):
+        s.position = i * POSITION_GAP
+    db.flush()
+    return [[s.id, s.position] for s in siblings]
+
+def _neighbour(db: Session, task: models.Task, anchor: models.Task, after: bool):
+    # Hermana inmediatamente después (o antes) de anchor, sin contar la propia tarea
+    T = models.Task
+    q = _siblings(db, anchor.board_id, anchor.group_id, task.id)
+    if after:
+        return (
+            q.filter(or_(T.position > anchor.position, and_(T.position == anchor.position, T.id > anchor.id)))
+            .order_by(T.position.asc(), T.id.asc()).first()
+        )
+    return (
+        q.filter(or_(T.position < anchor.position, and_(T.position == anchor.position, T.id < anchor.id)))
+        .order_by(T.position.desc(), T.id.desc()).first()
+    )
+
+def _position_near(db: Session, task: models.Task, anchor: models.Task, after: bool, reordered: list) -> int:
+    for _ in range(2):
+        other = _neighbour(db, task, anchor, after)
+        if after:
+            lo, hi = anchor.position, (other.position if other else None)
+        else:
+            lo, hi = (other.position if other else None), anchor.position
+        if lo is None: return hi - POSITION_GAP
+        if hi is None: return lo + POSITION_GAP
+        if hi - lo > 1: return (lo + hi) // 2
+        reordered[:] = _rebalance(db, anchor.board_id, anchor.group_id, task.id)
+    raise RuntimeError("no se pudo calcular la posición")
+
+def _next_position(db: Session, board_id: int, group_id) -> int:
+    # Tras la última del grupo (o de las sin grupo del tablero): las altas no empatan en 0
+    last = _siblings(db, board_id, group_id, exclude_id=0).with_entities(func.max(models.Task.position)).scalar()
+    return 0 if last is None else last + POSITION_GAP
+
+def _position_last(db: Session, task: models.Task, board_id: int, group_id) -> int:
+    q = _siblings(db, board_id, group_id, task.id).with_entities(func.max(models.Task.position))
+    last = q.scalar()
+    return 0 if last is None else last + POSITION_GAP
 
 def move_task(db: Session, task_id: int, move: schemas.TaskMove):
     t = db.get(models.Task, task_id)
     if not t: return None
-    if move.board_id is not None: t.board_id = move.board_id
-    if move.group_id is not None: t.group_id = move.group_id
-    if move.position is not None: t.position = move.position
-    db.commit(); db.refresh(t); return t
+    old_board_id, old_key, reordered = t.board_id, counters.key(t), []
+    anchors = [db.get(models.Task, i) for i in (move.after_id, move.before_id) if i is not None]
+    if None in anchors or t in anchors: return None
+    anchor = anchors[0] if anchors else None
+    if anchor is not None:
+        board_id, group_id = anchor.board_id, anchor.group_id
+    else:
+        group_id = move.group_id if "group_id" in move.__fields_set__ else t.group_id
+        # Si solo llega el grupo, el tablero es el del grupo (como en bulk_move_tasks)
+        board_id = move.board_id
+        if board_id is None and move.group_id is not None:
+            board_id = db.scalar(select(models.Group.board_id).where(models.Group.id == move.group_id))
+        if board_id is None: board_id = t.board_id
+    # Como create_task: primero el bloqueo de escritura, después la validación del destino
+    _touch_board(db, old_board_id, board_id)
+    _check_target(db, board_id, group_id)
+    if len(anchors) == 2 and _neighbour(db, t, anchors[0], after=True) is not anchors[1]:
+        # Con los dos vecinos, la tarea va entre ellos: tienen que ser contiguos en el mismo grupo
+        raise InvalidTarget("before_id y after_id no son vecinos contiguos", 400)
+    if anchor is not None:
+        # Orden por vecinos: una sola fila escrita salvo rebalanceo del grupo
+        t.position = _position_near(db, t, anchor, after=move.after_id is not None, reordered=reordered)
+    elif move.position is not None:
+        t.position = move.position
+    else:
+        # Sin vecinos ni posición: al final del grupo destino
+        t.position = _position_last(db, t, board_id, group_id)
+    t.board_id, t.group_id = board_id, group_id
+    # El índice solo guarda el tablero: mover dentro del mismo no lo toca
+    if old_board_id != t.board_id: search.index_tasks(db, [t])
+    counters.update(db, removed=[old_key], added=[t])
+    changes.log(db, [*_task_changes(t.id, old_board_id, t.board_id), *((t.board_id, "task", i, False) for i, _ in reordered)])
+    _commit(db); db.refresh(t)
+    events = [(t.board_id, {"type": "task.moved", "data": {"id": t.id, "board_id": t.board_id, "group_id": t.group_id, "position": t.position}})]
+    if old_board_id != t.board_id:
+        events.append((old_board_id, events[0][1]))
+    if reordered:
+        events.append((t.board_id, {"type": "group.reordered", "data": {"group_id": t.group_id, "positions": reordered}}))
+    _emit_grouped(events)
+    return t
 
 def delete_task(db: Session, task_id: int) -> bool:
     t = db.get(models.Task, task_id)
     if not t: return False
-    db.delete(t); db.commit(); return True
+    board_id = t.board_id
+    _touch_board(db, board_id)
+    counters.update(db, removed=[t]); changes.log(db, [(board_id, "task", task_id, True)])
+    db.delete(t); search.unindex_tasks(db, [task_id]); _commit(db)
+    _emit(board_id, {"type": "task.deleted", "data": {"id": task_id}})
+    return True
+
+# -------------------------
+# Lotes (una transacción, escrituras por conjuntos)
+# -------------------------
+def _fail(n: int, error: str, id=None):
+    return {"index": n, "ok": False, "id": id, "error": error}
+
+def _lookup_targets(db: Session, board_ids, group_ids):
+    B, G = models.Board, models.Group
+    boards = set(db.scalars(select(B.id).where(B.id.in_(board_ids), B.deleted_at.is_(None))))
+    groups = dict(db.execute(select(G.id, G.board_id).where(G.id.in_(group_ids), G.deleted_at.is_(None))).all())
+    return boards, groups
+
+def _target_error(boards, groups, board_id, group_id):
+    if board_id not in boards: return "Tablero no encontrado"
+    if group_id is not None:
+        if group_id not in groups: return "Grupo no encontrado"
+        if groups[group_id] != board_id: return "El grupo no pertenece al tablero"
+    return None
+
+def _check_target(db: Session, board_id: int, group_id):
+    # Mismas reglas que los lotes (_target_error) para las escrituras de una sola tarea
+    boards, groups = _lookup_targets(db, {board_id}, {group_id} - {None})
+    err = _target_error(boards, groups, board_id, group_id)
+    if err: raise InvalidTarget(err, 400 if board_id in boards and group_id in groups else 404)
+
+def _insert_ids(db: Session, model, rows: list) -> list:
+    # INSERT de Core sobre la tabla: el bulk insert del ORM parte el lote cada vez que cambia qué columnas llegan a None
+    t = model.__table__
+    ids = sharding.new_ids(db, t.name, len(rows))
+    if ids: rows = [{**r, "id": i} for r, i in zip(rows, ids)]
+    return db.scalars(insert(t).returning(t.c.id, sort_by_parameter_order=True), rows).all()
+
+def _load_rows(db: Session, model, ids, fields):
+    # Solo filas vivas y solo las columnas públicas (las que viajan en resultados y eventos)
+    table = model.__table__
+    q = select(table.c.id, *(table.c[f] for f in fields)).where(table.c.id.in_(ids))
+    if "deleted_at" in table.c: q = q.where(table.c.deleted_at.is_(None))
+    return {r["id"]: dict(r) for r in db.execute(q).mappings()}
+
+def bulk_create_tasks(db: Session, items: List[schemas.TaskCreate]):
+    boards, groups = _lookup_targets(db, {i.board_id for i in items}, {i.group_id for i in items if i.group_id is not None})
+    results, rows, next_position = [None] * len(items), [], {}
+    for n, it in enumerate(items):
+        err = _target_error(boards, groups, it.board_id, it.group_id)
+        if err: results[n] = _fail(n, err); continue
+        # Sin posición, tras la última del grupo, contando las del propio lote
+        key = (it.board_id, it.group_id)
+        if key not in next_position: next_position[key] = _next_position(db, *key)
+        position = it.position if it.position is not None else next_position[key]
+        next_position[key] = max(next_position[key], position + POSITION_GAP)
+        rows.append((n, {**it.dict(include=set(_TASK_FIELDS)), "position": position}))
+    if rows:
+        ids = _insert_ids(db, models.Task, [r for _, r in rows])
+        for (n, r), task_id in zip(rows, ids):
+            results[n] = {"index": n, "ok": True, "id": task_id, "task": {**r, "id": task_id}}
+        _touch_board(db, *{r["board_id"] for _, r in rows})
+        search.index_tasks(db, (r["task"] for r in results if r["ok"]))
+        counters.update(db, added=[r for _, r in rows])
+        changes.log(db, ((r["board_id"], "task", results[n]["id"], False) for n, r in rows))
+        _commit(db)
+        _emit_grouped((r["board_id"], {"type": "task.created", "data": {**r, "id": results[n]["id"]}}) for n, r in rows)
+    return results
+
+def _bulk_apply_tasks(db: Session, items, changes_of, kind: str):
+    # Lee todas las filas de una vez, valida destinos y escribe con un UPDATE executemany
+    current = _load_rows(db, models.Task, {i.id for i in items}, _TASK_FIELDS)
+    merged = {}
+    for n, it in enumerate(items):
+        if it.id in current: merged[n] = {**current[it.id], **changes_of(it, current[it.id])}
+    boards, groups = _lookup_targets(
+        db, {r["board_id"] for r in merged.values()}, {r["group_id"] for r in merged.values() if r["group_id"] is not None}
+    )
+    results, updates, touched, events = [None] * len(items), [], set(), []
+    for n, it in enumerate(items):
+        if n not in merged: results[n] = _fail(n, "Tarea no encontrada", it.id); continue
+        row = merged[n]
+        err = _target_error(boards, groups, row["board_id"], row["group_id"])
+        if err: results[n] = _fail(n, err, it.id); continue
+        updates.append({k: row[k] for k in ("id",) + _TASK_FIELDS})
+        touched.update((current[it.id]["board_id"], row["board_id"]))
+        results[n] = {"index": n, "ok": True, "id": it.id, "task": row}
+        events += [(b, {"type": kind, "data": row}) for b in {current[it.id]["board_id"], row["board_id"]}]
+    if updates:
+        db.execute(update(models.Task), updates)
+        _touch_board(db, *touched)
+        final = {u["id"]: u for u in updates}  # un id repetido queda con su último cambio
+        search.index_tasks(db, final.values())
+        counters.update(db, removed=[current[i] for i in final], added=final.values())
+        changes.log(db, (c for i, u in final.items() for c in _task_changes(i, current[i]["board_id"], u["board_id"])))
+        _commit(db)
+        _emit_grouped(events)
+    return results
+
+def bulk_update_tasks(db: Session, items: List[schemas.TaskBulkUpdate]):
+    return _bulk_apply_tasks(db, items, lambda it, row: it.dict(include=set(_TASK_FIELDS), exclude_none=True), "task.updated")
+
+def bulk_move_tasks(db: Session, items: List[schemas.TaskBulkMove]):
+    group_boards = dict(db.execute(
+        select(models.Group.id, models.Group.board_id).where(models.Group.id.in_({i.group_id for i in items if i.group_id is not None}))
+    ).all())
+    next_position = {}
+    def changes(it, row):
+        group_id = it.group_id if it.group_id is not None else row["group_id"]
+        # Si solo llega el grupo, el tablero es el del grupo
+        board_id = it.board_id if it.board_id is not None else group_boards.get(it.group_id, row["board_id"])
+        if it.position is not None:
+            return {"board_id": board_id, "group_id": group_id, "position": it.position}
+        key = (board_id, group_id)
+        if key not in next_position: next_position[key] = _next_position(db, board_id, group_id)
+        position = next_position[key]
+        next_position[key] += POSITION_GAP
+        return {"board_id": board_id, "group_id": group_id, "position": position}
+    return _bulk_apply_tasks(db, items, changes, "task.moved")
+
+def bulk_delete_tasks(db: Session, ids: List[int]):
+    current = dict(db.execute(select(models.Task.id, models.Task.board_id).where(models.Task.id.in_(ids))).all())
+    if current:
+        counters.add_tasks(db, list(current), sign=-1)
+        changes.log(db, ((b, "task", i, True) for i, b in current.items()))
+        db.execute(delete(models.Task).where(models.Task.id.in_(current)))
+        _touch_board(db, *current.values())
+        search.unindex_tasks(db, list(current))
+        _commit(db)
+        _emit_grouped((b, {"type": "task.deleted", "data": {"id": i}}) for i, b in current.items())
+    return [
+        {"index": n, "ok": True, "id": i} if i in current else _fail(n, "Tarea no encontrada", i)
+        for n, i in enumerate(ids)
+    ]
+
+def bulk_create_groups(db: Session, items: List[schemas.GroupCreate]):
+    boards, _ = _lookup_targets(db, {i.board_id for i in items}, ())
+    results, rows = [None] * len(items), []
+    for n, it in enumerate(items):
+        if it.board_id not in boards: results[n] = _fail(n, "Tablero no encontrado"); continue
+        rows.append((n, {"name": it.name, "board_id": it.board_id, "position": it.position or 0}))
+    if rows:
+        ids = _insert_ids(db, models.Group, [r for _, r in rows])
+        for (n, r), group_id in zip(rows, ids):
+            results[n] = {"index": n, "ok": True, "id": group_id, "group": {**r, "id": group_id}}
+        _touch_board(db, *{r["board_id"] for _, r in rows})
+        changes.log(db, ((r["board_id"], "group", results[n]["id"], False) for n, r in rows))
+        _commit(db)
+        _emit_grouped((r["board_id"], {"type": "group.created", "data": results[n]["group"]}) for n, r in rows)
+    return results
+
+def bulk_update_groups(db: Session, items: List[schemas.GroupBulkUpdate]):
+    current = _load_rows(db, models.Group, {i.id for i in items}, _GROUP_FIELDS)
+    results, updates = [None] * len(items), []
+    for n, it in enumerate(items):
+        if it.id not in current: results[n] = _fail(n, "Grupo no encontrado", it.id); continue
+        row = {**current[it.id], **it.dict(include={"name", "position"}, exclude_none=True)}
+        updates.append({"id": it.id, "name": row["name"], "position": row["position"]})
+        results[n] = {"index": n, "ok": True, "id": it.id, "group": row}
+    if updates:
+        db.execute(update(models.Group), updates)
+        _touch_board(db, *{current[u["id"]]["board_id"] for u in updates})
+        changes.log(db, ((current[i]["board_id"], "group", i, False) for i in {u["id"] for u in updates}))
+        _commit(db)
+        _emit_grouped((r["group"]["board_id"], {"type": "group.updated", "data": r["group"]}) for r in results if r["ok"])
+    return results
+
+def bulk_delete_groups(db: Session, ids: List[int]):
+    G = models.Group
+    current = dict(db.execute(select(G.id, G.board_id).where(G.id.in_(ids), G.deleted_at.is_(None))).all())
+    if current:
+        # Solo se marcan: purge.py desasigna las tareas y borra las filas
+        db.execute(update(G.__table__).where(G.id.in_(current)).values(deleted_at=_now()))
+        _touch_board(db, *current.values())
+        changes.log(db, ((b, "group", i, True) for i, b in current.items()))
+        _commit(db)
+        _emit_grouped((b, {"type": "group.deleted", "data": {"id": i}}) for i, b in current.items())
+        purge.wake()
+    return [
+        {"index": n, "ok": True, "id": i} if i in current else _fail(n, "Grupo no encontrado", i)
+        for n, i in enumerate(ids)
+    ]
+
+# -------------------------
+# Importación por bloques (un commit por bloque; ids remapeados)
+# -------------------------
+def import_groups(db: Session, board_id: int, items: List[schemas.GroupOut], id_map: dict) -> int:
+    rows = [{"name": g.name, "board_id": board_id, "position": g.position or 0} for g in items]
+    ids = _insert_ids(db, models.Group, rows)
+    id_map.update(zip((g.id for g in items), ids))
+    _touch_board(db, board_id); changes.log_rows(db, board_id, "group", models.Group, min(ids)); _commit(db)
+    return len(ids)
+
+def import_tasks(db: Session, board_id: int, items: List[schemas.TaskOut], id_map: dict) -> int:
+    rows = [
+        {"title": t.title, "description": t.description, "board_id": board_id,
+         "group_id": None if t.group_id is None else id_map[t.group_id], "status_id": t.status_id, "position": t.position or 0}
+        for t in items
+    ]
+    t = models.Task.__table__
+    ids = sharding.new_ids(db, t.name, len(rows))
+    if ids: rows = [{**r, "id": i} for r, i in zip(rows, ids)]
+    # La primera fila toma el bloqueo de escritura: los ids desde first_id hasta el commit son de este bloque
+    first_id = db.scalar(insert(t).returning(t.c.id), rows[0])
+    if len(rows) > 1: db.execute(insert(t), rows[1:])
+    search.index_board(db, board_id, from_id=first_id)
+    counters.add_board(db, board_id, from_id=first_id)
+    _touch_board(db, board_id); changes.log_rows(db, board_id, "task", models.Task, first_id); _commit(db)
+    return len(rows)
+
+def purge_board(db: Session, board_id: int):
+    # Deshace una importación a medias: se marca como borrado y purge.py elimina las filas por lotes
+    db.execute(update(models.Board.__table__).where(models.Board.id == board_id).values(deleted_at=_now()))
+    _commit(db)
+    purge.wake()
+
+# -------------------------
+# Users
+# -------------------------
+def query_users(db: Session, after=None, limit=None):
+    q = db.query(models.User)
+    if after is not None: q = q.filter(models.User.id > after[0])
+    return q.order_by(models.User.id.asc()).limit(limit)
@@ -1,13 +1,135 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from settings import settings
 
+def is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and url not in ("sqlite://", "sqlite:///:memory:")
+
 DATABASE_URL = settings.DATABASE_URL
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_FILE = is_sqlite_file(DATABASE_URL)
+connect_args = {"check_same_thread": False} if IS_SQLITE else {}
+
+def _pool_args(size: int, url: str) -> dict:
+    # SQLite en memoria usa un pool de una conexión y no admite tamaños
+    if url.startswith("sqlite") and not is_sqlite_file(url): return {}
+    return {"pool_size": size, "max_overflow": settings.DB_MAX_OVERFLOW, "pool_timeout": settings.DB_POOL_TIMEOUT}
+
+def _sqlite_pragmas(read_only: bool):
+    pragmas = []
+    if settings.SQLITE_PRAGMAS_ENABLED:
+        pragmas += [
+            f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+            f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+            f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+            f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+            f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+def _configure_sqlite(target, read_only: bool, begin: Optional[str] = None):
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_conn, record):
+        if begin:
+            # BEGIN explícito: pysqlite no abre transacción para SELECT ni soporta SAVEPOINT por su cuenta
+            dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        for pragma in _sqlite_pragmas(read_only):
+            cur.execute(pragma)
+        cur.close()
+
+    if begin:
+        @event.listens_for(target, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql(begin)
+
+def make_engine(pool_size: int, read_only: bool = False, begin: Optional[str] = None, url: str = DATABASE_URL):
+    e = create_engine(url, echo=False, connect_args=connect_args, future=True, **_pool_args(pool_size, url))
+    if is_sqlite_file(url):
+        _configure_sqlite(e, read_only, begin)
+    return e
+
+def async_url(url: str) -> str:
+    # Mismo fichero con el driver asíncrono: sqlite:///app.db -> sqlite+aiosqlite:///app.db
+    if not is_sqlite_file(url) or not url.startswith("sqlite:"):
+        raise RuntimeError("ASYNC_ROUTES_ENABLED solo admite una BD SQLite en fichero")
+    return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+
+def make_async_engine(pool_size: int, read_only: bool = False, begin: Optional[str] = None, url: str = DATABASE_URL):
+    # Mismos pragmas y BEGIN que make_engine: los eventos van al sync_engine y el adaptador de aiosqlite los ejecuta
+    # aiosqlite usa NullPool por defecto (una conexión y un hilo por sesión): aquí, pool como el síncrono
+    e = create_async_engine(async_url(url), echo=False, poolclass=AsyncAdaptedQueuePool, **_pool_args(pool_size, url))
+    _configure_sqlite(e.sync_engine, read_only, begin)
+    return e
+
+class AsyncPrimarySession(Session):
+    """Session síncrona detrás de AsyncSessionLocal: los eventos de sesión (deps.py) se registran en su clase."""
+
+def _async_sessions(bind, info: Optional[dict] = None, sync_session_class=Session):
+    # expire_on_commit=False: lo devuelto se serializa fuera de la sesión, sin cargas perezosas
+    return async_sessionmaker(bind=bind, autoflush=False, expire_on_commit=False, info=info or {}, sync_session_class=sync_session_class)
+
+engine = make_engine(settings.DB_POOL_SIZE)
+
+# Lecturas (GET): conexiones query_only que nunca piden el bloqueo de escritura; con WAL no esperan a los escritores
+read_engine = make_engine(settings.DB_READ_POOL_SIZE, read_only=True, begin="BEGIN") if IS_SQLITE_FILE else engine
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, future=True)
+
+# Solo con rutas async (aiosqlite es opcional para el resto)
+ASYNC = settings.ASYNC_ROUTES_ENABLED
+async_engine = make_async_engine(settings.DB_POOL_SIZE) if ASYNC else None
+async_read_engine = make_async_engine(settings.DB_READ_POOL_SIZE, read_only=True, begin="BEGIN") if ASYNC else None
+AsyncSessionLocal = _async_sessions(async_engine, sync_session_class=AsyncPrimarySession) if ASYNC else None
+AsyncReadSessionLocal = _async_sessions(async_read_engine) if ASYNC else None
+
+def shard_url(n: int) -> str:
+    # Por defecto junto a la principal: app.db -> app-shard1.db
+    if settings.SHARD_URL_TEMPLATE: return settings.SHARD_URL_TEMPLATE.format(n=n)
+    root, ext = os.path.splitext(DATABASE_URL)
+    return f"{root}-shard{n}{ext}"
+
+class Shard:
+    """Un fichero de tableros (modo shard, ver sharding.py): engines y sesiones como los de la principal.
+
+    Sus sesiones llevan info["shard"]; por ahí group-commit y las lecturas en streaming eligen la BD."""
+
+    def __init__(self, n: int):
+        self.n, self.url = n, shard_url(n)
+        self.engine = make_engine(settings.DB_POOL_SIZE, url=self.url)
+        self.read_engine = (
+            make_engine(settings.DB_READ_POOL_SIZE, read_only=True, begin="BEGIN", url=self.url) if is_sqlite_file(self.url) else self.engine
+        )
+        info = {"shard": n}
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, future=True, info=info)
+        self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine, future=True, info=info)
+        if ASYNC:
+            self.async_engine = make_async_engine(settings.DB_POOL_SIZE, url=self.url)
+            self.async_read_engine = make_async_engine(settings.DB_READ_POOL_SIZE, read_only=True, begin="BEGIN", url=self.url)
+            self.AsyncSessionLocal = _async_sessions(self.async_engine, info)
+            self.AsyncReadSessionLocal = _async_sessions(self.async_read_engine, info)
+
+# Vacío sin modo shard: tableros, grupos y tareas viven en la principal
+SHARDS = {n: Shard(n) for n in range(1, settings.SHARD_COUNT + 1)}
+
+def board_engines() -> list:
+    # Engines de escritura donde viven los tableros (CLIs de mantenimiento)
+    return [s.engine for s in SHARDS.values()] or [engine]
+
+def all_engines() -> set:
+    return {engine, read_engine, *(e for s in SHARDS.values() for e in (s.engine, s.read_engine))}
+
+def async_engines() -> list:
+    if not ASYNC: return []
+    return [async_engine, async_read_engine, *(e for s in SHARDS.values() for e in (s.async_engine, s.async_read_engine))]
 
 Base = declarative_base()
 
@@ -17,3 +139,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def prewarm(n: int):
+    # Abre n conexiones por pool (pragmas incluidos) y las devuelve: la primera petición no las paga
+    for e in all_engines():
+        conns = [e.connect() for _ in range(n)]
+        for c in conns: c.close()
+
+async def prewarm_async(n: int):
+    for e in async_engines():
+        conns = [await e.connect() for _ in range(n)]
+        for c in conns: await c.close()
+
+async def dispose_async():
+    # Cada conexión de aiosqlite es un hilo: sin cerrarlas, el proceso no termina
+    for e in async_engines(): await e.dispose()
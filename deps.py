@@ -1,13 +1,44 @@
+import time
 from fastapi import Depends, HTTPException, status, Request
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
-from database import get_db
-import models
+from cache import TTLCache
+from database import AsyncPrimarySession, get_async_read_db, get_read_db, SessionLocal
+import models, schemas
 from settings import settings
 
 SECRET_KEY = settings.SECRET_KEY
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.User:
+# Usuario autenticado por id: evita un SELECT por petición para revisar is_active
+user_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+def invalidate_user(user_id: int):
+    user_cache.pop(user_id)
+
+@event.listens_for(AsyncPrimarySession, "after_flush")
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_users(session, flush_context):
+    # Cualquier cambio (p.ej. desactivar) o borrado de un usuario lo saca de la caché, pero tras el
+    # commit: antes, una lectura concurrente aún vería la fila anterior y la volvería a cachear
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.User) and obj.id is not None:
+            session.info.setdefault("changed_users", set()).add(obj.id)
+
+@event.listens_for(AsyncPrimarySession, "after_commit")
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        invalidate_user(user_id)
+
+@event.listens_for(AsyncPrimarySession, "after_rollback")
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_users", None)
+
+def _token_user_id(request: Request) -> tuple:
+    # (id, exp) del token de acceso de la petición
     auth = request.headers.get("Authorization", "")
     if not auth.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales requeridas")
@@ -18,8 +49,22 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
     if payload.get("scope") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    user_id = int(payload.get("sub"))
-    user = db.get(models.User, user_id)
-    if not user or not user.is_active:
+    return int(payload.get("sub")), payload["exp"]
+
+def _cache_user(user_id: int, exp: float, row) -> schemas.UserOut:
+    if not row or not row.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario inactivo o no encontrado")
+    user = schemas.UserOut.from_orm(row)
+    # Nunca más allá del exp del token con el que se cargó
+    user_cache.set(user_id, user, ttl=exp - time.time())
     return user
+
+def get_current_user(request: Request, db: Session = Depends(get_read_db)) -> schemas.UserOut:
+    user_id, exp = _token_user_id(request)
+    user = user_cache.get(user_id)
+    return user if user is not None else _cache_user(user_id, exp, db.get(models.User, user_id))
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> schemas.UserOut:
+    user_id, exp = _token_user_id(request)
+    user = user_cache.get(user_id)
+    return user if user is not None else _cache_user(user_id, exp, await db.get(models.User, user_id))
@@ -0,0 +1,95 @@
+import asyncio, json, threading
+from contextlib import contextmanager
+from typing import Dict, List, Set
+from settings import settings
+
+class Subscriber:
+    """Cola acotada de un cliente WebSocket, ligada al event loop que la consume."""
+
+    def __init__(self, maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, message: str):
+        # Solo desde su loop. Consumidor lento: se vacía la cola y se le pide resincronizar
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+RESYNC = json.dumps({"events": [{"type": "resync"}]})
+
+class LocalBackplane:
+    """Difusión entre workers. En local entrega directamente al broker de este proceso;
+    un backplane real (Redis, NOTIFY...) publicaría aquí y llamaría a deliver al recibir."""
+
+    def __init__(self):
+        self.broker = None
+
+    def publish(self, board_id: int, message: str):
+        self.broker.deliver(board_id, message)
+
+class Broker:
+    """Pub/sub en proceso con un conjunto de suscriptores por tablero."""
+
+    def __init__(self, backplane=None, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subs: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self.backplane = backplane or LocalBackplane()
+        self.backplane.broker = self
+        self._local = threading.local()
+
+    def subscribe(self, board_id: int) -> Subscriber:
+        sub = Subscriber(self.queue_size)
+        with self._lock:
+            self._subs.setdefault(board_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, board_id: int, sub: Subscriber):
+        with self._lock:
+            subs = self._subs.get(board_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs: del self._subs[board_id]
+
+    def watching(self, board_id: int) -> bool:
+        return board_id in self._subs
+
+    @contextmanager
+    def capture(self):
+        # Retiene lo publicado en este hilo hasta que el llamador confirme (group-commit)
+        buf = []
+        self._local.buf = buf
+        try:
+            yield buf
+        finally:
+            self._local.buf = None
+
+    def publish_captured(self, captured: list):
+        for board_id, events in captured:
+            self.publish(board_id, events)
+
+    def publish(self, board_id: int, events: List[dict]):
+        # Se llama desde los hilos del threadpool tras el commit; serializa una sola vez
+        if not events: return
+        buf = getattr(self._local, "buf", None)
+        if buf is not None:
+            buf.append((board_id, events)); return
+        self.backplane.publish(board_id, json.dumps({"board_id": board_id, "events": events}, default=str))
+
+    def deliver(self, board_id: int, message: str):
+        with self._lock:
+            subs = list(self._subs.get(board_id, ()))
+        for sub in subs:
+            sub.loop.call_soon_threadsafe(sub.push, message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"boards": len(self._subs), "subscribers": sum(len(s) for s in self._subs.values())}
+
+broker = Broker(queue_size=settings.WS_QUEUE_SIZE)
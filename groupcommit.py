@@ -0,0 +1,135 @@
+import asyncio, queue, threading, time, weakref
+from concurrent.futures import Future
+from typing import Callable, Optional
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SHARDS, DATABASE_URL, engine, is_sqlite_file, make_engine
+from events import broker
+from settings import settings
+
+class _Item:
+    __slots__ = ("fn", "kwargs", "future")
+
+    def __init__(self, fn: Callable, kwargs: dict):
+        self.fn, self.kwargs, self.future = fn, kwargs, Future()
+
+class GroupCommitter:
+    """Un único hilo escritor que agrupa mutaciones concurrentes en una transacción (un fsync).
+
+    Cada mutación corre en su propio SAVEPOINT: si falla (o devuelve un resultado vacío) se deshace
+    solo ella y su llamador recibe la excepción (o el resultado); el resto del lote se confirma
+    normalmente. En modo shard hay uno por shard."""
+
+    def __init__(self, window_ms: float, max_batch: int, shard: Optional[int] = None):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = self.items = 0
+        url, default = (DATABASE_URL, engine) if shard is None else (SHARDS[shard].url, SHARDS[shard].engine)
+        # Conexión propia con BEGIN IMMEDIATE: toma el bloqueo de escritura al empezar y permite SAVEPOINT
+        bind = make_engine(1, begin="BEGIN IMMEDIATE", url=url) if is_sqlite_file(url) else default
+        # expire_on_commit=False: los objetos devueltos siguen legibles tras cerrar la sesión
+        info = {} if shard is None else {"shard": shard}
+        self._sessions = sessionmaker(bind=bind, autoflush=False, expire_on_commit=False, future=True, info=info)
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"group-commit-{shard or 0}", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, fn: Callable, **kwargs) -> Future:
+        item = _Item(fn, kwargs)
+        self._queue.put(item)
+        return item.future
+
+    def submit(self, fn: Callable, **kwargs):
+        return self.enqueue(fn, **kwargs).result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Item) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                # Lo ya encolado se toma sin esperar; después, como mucho hasta el fin de la ventana
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic())) if self.window else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None); break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None: return
+            self._apply(self._collect(first))
+
+    def _apply(self, batch: list):
+        done = []
+        with self._sessions() as db:
+            db.info["group_commit"] = True
+            for item in batch:
+                with broker.capture() as captured:
+                    sp = db.begin_nested()
+                    try:
+                        result = item.fn(db=db, **item.kwargs)
+                        # None/False = no encontrado: lo que la función llegara a escribir no entra en el lote
+                        if result: sp.commit()
+                        else: sp.rollback()
+                    except Exception as exc:
+                        sp.rollback()
+                        item.future.set_exception(exc)
+                        continue
+                done.append((item, result, list(captured)))
+            try:
+                db.commit()
+            except Exception as exc:
+                for item, _, _ in done: item.future.set_exception(exc)
+                return
+        self.batches += 1
+        self.items += len(batch)
+        for item, result, captured in done:
+            broker.publish_captured(captured)
+            item.future.set_result(result)
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items, "queued": self._queue.qsize()}
+
+# Por shard (None = la BD principal)
+_committers: dict = {}
+_lock = threading.Lock()
+
+def get_committer(shard: Optional[int] = None) -> GroupCommitter:
+    with _lock:
+        if shard not in _committers:
+            _committers[shard] = GroupCommitter(settings.GROUP_COMMIT_WINDOW_MS, settings.GROUP_COMMIT_MAX_BATCH, shard)
+        return _committers[shard]
+
+def shutdown_committer():
+    with _lock:
+        for c in _committers.values(): c.stop()
+        _committers.clear()
+
+def write(fn: Callable, db: Session, **kwargs):
+    # Punto único de escritura de los routers: directo o a través del escritor agrupado de su BD
+    if settings.GROUP_COMMIT_ENABLED:
+        return get_committer(db.info.get("shard")).submit(fn, **kwargs)
+    return fn(db=db, **kwargs)
+
+# Rutas async: una transacción de escritura a la vez por BD y event loop (ver write_async)
+_async_writers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+async def write_async(fn: Callable, db: AsyncSession, **kwargs):
+    # Igual que write() para las rutas async: la función de crud corre con la Session síncrona de db
+    # (run_sync: cada consulta espera al driver sin bloquear el event loop); con group-commit se
+    # espera el Future del escritor, tampoco en un hilo
+    shard = db.info.get("shard")
+    if settings.GROUP_COMMIT_ENABLED:
+        return await asyncio.wrap_future(get_committer(shard).enqueue(fn, **kwargs))
+    # SQLite admite un escritor: sin cola propia, cientos de corrutinas compiten por el bloqueo con
+    # busy_timeout (reintentos con espera, sin orden) mientras la que lo tiene espera turno en el loop
+    locks = _async_writers.setdefault(asyncio.get_running_loop(), {})
+    async with locks.setdefault(shard, asyncio.Lock()):
+        return await db.run_sync(lambda s: fn(db=s, **kwargs))
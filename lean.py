@@ -0,0 +1,31 @@
+import json
+from typing import Iterable, Type
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Query
+
+# Lectura ligera para listados: solo las columnas del esquema de salida como tuplas Core,
+# codificadas directamente a JSON. Sin instancias ORM ni validación pydantic por fila;
+# el response_model de la ruta sigue documentando la respuesta en OpenAPI.
+
+class JSONBytes(Response):
+    media_type = "application/json"
+
+def project(q: Query, schema: Type[BaseModel]) -> Query:
+    # Misma consulta (filtros, orden, límite) con las columnas en el orden de los campos del esquema
+    model = q.column_descriptions[0]["entity"]
+    return q.with_entities(*(getattr(model, f) for f in schema.__fields__))
+
+def rows(q: Query, schema: Type[BaseModel]) -> list:
+    return project(q, schema).all()
+
+def dicts(rows: Iterable, schema: Type[BaseModel]) -> list:
+    keys = tuple(schema.__fields__)
+    return [dict(zip(keys, r)) for r in rows]
+
+def encode(obj) -> bytes:
+    # Mismo formato que JSONResponse
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+def json_response(rows: Iterable, schema: Type[BaseModel]) -> JSONBytes:
+    return JSONBytes(content=encode(dicts(rows, schema)))
@@ -0,0 +1,27 @@
+from typing import Callable, Hashable
+from fastapi import Response
+from cache import BytesLRU
+import lean
+from settings import settings
+
+# Listados serializados por (board_id, version, ...): cada escritura sube la versión y los ids
+# de tablero no se reutilizan, así que una clave nunca sirve datos anteriores al último commit
+list_cache = BytesLRU(maxbytes=settings.LIST_CACHE_MAX_BYTES, maxsize=settings.LIST_CACHE_MAX_ENTRIES)
+
+def _store(key: Hashable, data) -> bytes:
+    # lean.encode: los mismos bytes (UTF-8 sin escapar) que el listado sin caché
+    body = lean.encode(data)
+    if settings.LIST_CACHE_ENABLED:
+        list_cache.set(key, body)
+    return body
+
+def cached_json(key: Hashable, build: Callable) -> Response:
+    body = list_cache.get(key) if settings.LIST_CACHE_ENABLED else None
+    if body is None: body = _store(key, build())
+    return Response(content=body, media_type="application/json")
+
+async def cached_json_async(db, key: Hashable, build: Callable) -> Response:
+    # Rutas async: en un fallo, build(session) corre con la Session síncrona de db (run_sync)
+    body = list_cache.get(key) if settings.LIST_CACHE_ENABLED else None
+    if body is None: body = _store(key, await db.run_sync(build))
+    return Response(content=body, media_type="application/json")
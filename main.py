@@ -1,18 +1,53 @@
 import asyncio
+import anyio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import users, boards, groups, tasks, auth
+from database import dispose_async, prewarm, prewarm_async
+from security import prewarm_hashing, shutdown_hash_pool
+from groupcommit import shutdown_committer
+from purge import worker as purge_worker
+from archive import worker as archive_worker
+from settings import settings
+import migrations, search
+from admission import AdmissionMiddleware
+from metrics import MetricsMiddleware
+from routers import ws, metrics
+# Mismas rutas en versión async (AsyncSession) o síncrona (threadpool), según ASYNC_ROUTES_ENABLED
+if settings.ASYNC_ROUTES_ENABLED:
+    from routers.aio import users, boards, groups, tasks, auth
+else:
+    from routers import users, boards, groups, tasks, auth
+
+def _startup():
+    # Con el esquema al día solo cuesta una lectura; si no, migra (o se niega a arrancar)
+    if not migrations.is_current():
+        if not settings.MIGRATE_ON_STARTUP:
+            raise RuntimeError("Esquema desactualizado: ejecuta python migrations.py upgrade")
+        migrations.upgrade()
+    if settings.PREWARM_ENABLED:
+        prewarm(settings.DB_PREWARM_CONNECTIONS)
+        prewarm_hashing()
+        search.fts_enabled()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # startup...
+    await anyio.to_thread.run_sync(_startup)
+    if settings.PREWARM_ENABLED:
+        await prewarm_async(settings.DB_PREWARM_CONNECTIONS)
+    purge_worker.start()
+    if settings.ARCHIVE_ENABLED: archive_worker.start()
     try:
         yield
     except asyncio.CancelledError:
         # apagado normal: evita ruido en los logs
         pass
+    finally:
+        shutdown_hash_pool()
+        shutdown_committer()
+        purge_worker.stop()
+        archive_worker.stop()
+        await dispose_async()
 
 
 app = FastAPI(title="Kanban Backend", version="1.0.0", lifespan=lifespan)
@@ -21,8 +56,8 @@ app = FastAPI(title="Kanban Backend", version="1.0.0", lifespan=lifespan)
 def root():
     return {"message": "API funcionando 🚀"}
 
-# Crea tablas al iniciar
-Base.metadata.create_all(bind=engine)
+# Límites de ritmo y de concurrencia; dentro de CORS para que los 429/503 lleven sus cabeceras
+app.add_middleware(AdmissionMiddleware)
 
 # CORS (ajusta origins en producción)
 app.add_middleware(
@@ -37,9 +72,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tiempos por petición (Server-Timing) y agregados para /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Routers
 app.include_router(users.router, tags=["users"])
 app.include_router(boards.router, tags=["boards"])
 app.include_router(groups.router, tags=["groups"])
 app.include_router(tasks.router, tags=["tasks"])
 app.include_router(auth.router, tags=["auth"])
+app.include_router(ws.router, tags=["ws"])
+app.include_router(metrics.router, tags=["metrics"])
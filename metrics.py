@@ -0,0 +1,195 @@
+import logging, time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+import anyio.to_thread
+import fastapi.routing
+from sqlalchemy import event
+from database import all_engines, async_engines
+from settings import settings
+
+log = logging.getLogger("kanban.metrics")
+
+# Límites de los buckets del histograma de latencia, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestStats:
+    __slots__ = ("start", "first_sql", "sql_count", "sql_time", "serialize_time", "statements")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_sql: Optional[float] = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def n_plus_one(self) -> Optional[Tuple[str, int]]:
+        # La sentencia más repetida, si supera el umbral
+        if not self.statements: return None
+        stmt, n = max(self.statements.items(), key=lambda kv: kv[1])
+        return (stmt, n) if n >= settings.N_PLUS_ONE_THRESHOLD else None
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+class RouteMetrics:
+    __slots__ = ("buckets", "count", "total", "sql_count", "sql_time", "n_plus_one", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = self.sql_time = 0.0
+        self.sql_count = self.n_plus_one = 0
+        self.statuses: Dict[str, int] = {}
+
+    def observe(self, seconds: float, status: int, stats: RequestStats, n_plus_one: bool):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound: self.buckets[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.sql_count += stats.sql_count
+        self.sql_time += stats.sql_time
+        self.n_plus_one += n_plus_one
+        cls = f"{status // 100}xx"
+        self.statuses[cls] = self.statuses.get(cls, 0) + 1
+
+# (método, ruta plantilla) -> métricas; solo se escribe desde el event loop
+routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+# --- SQL: eventos del engine, acumulados en la petición en curso ---
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_t0 = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None: return
+    now = time.perf_counter()
+    if stats.first_sql is None: stats.first_sql = context._metrics_t0
+    stats.sql_count += 1
+    stats.sql_time += now - context._metrics_t0
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+for _engine in [*all_engines(), *(e.sync_engine for e in async_engines())]:
+    event.listen(_engine, "before_cursor_execute", _before_execute)
+    event.listen(_engine, "after_cursor_execute", _after_execute)
+
+# --- Validación/serialización del response_model: FastAPI la resuelve por nombre en fastapi.routing ---
+_serialize_response = fastapi.routing.serialize_response
+
+async def _timed_serialize_response(*args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        return await _serialize_response(*args, **kwargs)
+    finally:
+        stats = _current.get()
+        if stats is not None: stats.serialize_time += time.perf_counter() - t0
+
+fastapi.routing.serialize_response = _timed_serialize_response
+
+def _server_timing(stats: RequestStats, total: float, n1) -> bytes:
+    # wait: hasta la primera consulta (threadpool + dependencias); app: el resto sin SQL ni serialización
+    wait = (stats.first_sql - stats.start) if stats.first_sql else 0.0
+    app = max(0.0, total - wait - stats.sql_time - stats.serialize_time)
+    parts = [
+        f"total;dur={total * 1000:.2f}",
+        f"wait;dur={wait * 1000:.2f}",
+        f'sql;dur={stats.sql_time * 1000:.2f};desc="{stats.sql_count} queries"',
+        f"serialize;dur={stats.serialize_time * 1000:.2f}",
+        f"app;dur={app * 1000:.2f}",
+    ]
+    if n1: parts.append(f'n1;desc="{n1[1]}x same statement"')
+    return ", ".join(parts).encode()
+
+class MetricsMiddleware:
+    """Middleware ASGI: Server-Timing por petición y agregados por ruta para /metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                n1 = stats.n_plus_one()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - stats.start, n1)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "<unmatched>")
+            n1 = stats.n_plus_one()
+            if n1:
+                log.warning("posible N+1 en %s %s: %d x %s", key[0], key[1], n1[1], n1[0][:200])
+            routes.setdefault(key, RouteMetrics()).observe(time.perf_counter() - stats.start, status, stats, bool(n1))
+
+def render_prometheus() -> str:
+    # Importes tardíos: solo para exponer los contadores de otros módulos
+    from deps import user_cache
+    from events import broker
+    from listcache import list_cache
+    from purge import worker as purge_worker
+    from archive import worker as archive_worker
+    import admission
+    lines = [
+        "# HELP http_request_duration_seconds Latencia por ruta",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, path), m in sorted(routes.items()):
+        labels = f'method="{method}",route="{path}"'
+        for bound, n in zip(BUCKETS, m.buckets):
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+        lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.count}')
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.total:.6f}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.count}")
+    for name, help_, attr in (
+        ("http_sql_statements_total", "Sentencias SQL por ruta", "sql_count"),
+        ("http_sql_seconds_total", "Tiempo en SQL por ruta", "sql_time"),
+        ("http_n_plus_one_total", "Peticiones con patrón N+1", "n_plus_one"),
+    ):
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} counter"]
+        for (method, path), m in sorted(routes.items()):
+            lines.append(f'{name}{{method="{method}",route="{path}"}} {getattr(m, attr)}')
+    lines += ["# HELP http_responses_total Respuestas por clase de estado", "# TYPE http_responses_total counter"]
+    for (method, path), m in sorted(routes.items()):
+        for cls, n in sorted(m.statuses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{path}",status="{cls}"}} {n}')
+
+    pool = anyio.to_thread.current_default_thread_limiter().statistics()
+    gauges = {
+        "threadpool_busy_threads": pool.borrowed_tokens,
+        "threadpool_waiting_tasks": pool.tasks_waiting,
+        "threadpool_size": pool.total_tokens,
+        "ws_subscribers": broker.stats()["subscribers"],
+    }
+    for prefix, stats in (("auth_user_cache", user_cache.stats()), ("list_cache", list_cache.stats())):
+        for k, v in stats.items():
+            gauges[f"{prefix}_{k}"] = v
+    for name, gate in admission.gates.items():
+        for k, v in gate.stats().items():
+            gauges[f"admission_{name}_{k}"] = v
+    gauges["admission_clients_inflight"] = len(admission.inflight)
+    for name, limiter in (("user", admission.user_limiter), ("ip", admission.ip_limiter)):
+        gauges[f"rate_limit_{name}_keys"] = len(limiter)
+        gauges[f"rate_limit_{name}_rejected"] = limiter.rejected
+    purge = purge_worker.stats
+    for k in ("pending_boards", "pending_groups", "last_batch_seconds"):
+        gauges[f"purge_{k}"] = purge[k]
+    gauges["archive_last_batch_seconds"] = archive_worker.stats["last_batch_seconds"]
+    for name, value in gauges.items():
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    for k in ("batches", "boards_deleted", "groups_deleted", "tasks_deleted", "tasks_detached", "changes_trimmed"):
+        lines += [f"# TYPE purge_{k}_total counter", f"purge_{k}_total {purge[k]}"]
+    for k in ("batches", "tasks_archived", "bytes_written"):
+        lines += [f"# TYPE archive_{k}_total counter", f"archive_{k}_total {archive_worker.stats[k]}"]
+    return "\n".join(lines) + "\n"
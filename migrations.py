@@ -0,0 +1,156 @@
+# Esquema versionado: la versión vive en schema_version y MIGRATIONS lleva de una a la siguiente.
+#   python migrations.py upgrade   # aplica los pasos pendientes (también lo hace el lifespan)
+#   python migrations.py status
+# En modo shard se migran la principal y cada shard; a los shards se les fija además su rango de ids.
+# Una BD vacía se crea con la forma actual de models y se marca en la última versión; las creadas
+# antes del versionado (versión 0) pasan por todos los pasos, que por eso comprueban antes de alterar.
+import argparse, logging
+from datetime import datetime, timezone
+from sqlalchemy import inspect, update
+from sqlalchemy.schema import CreateTable
+from database import SHARDS, Base, DATABASE_URL, is_sqlite_file, engine, make_engine
+import counters, models, search, sharding
+
+log = logging.getLogger("migrations")
+
+def _base(conn):
+    # Tablas que falten, ya con su forma actual
+    Base.metadata.create_all(conn)
+
+def _board_group_columns(conn):
+    # Columnas añadidas a tablas que create_all no altera
+    insp = inspect(conn)
+    for table, column, ddl in (
+        ("boards", "version", "INTEGER NOT NULL DEFAULT 0"),
+        ("boards", "deleted_at", "DATETIME"),
+        ("groups", "deleted_at", "DATETIME"),
+    ):
+        if column not in {c["name"] for c in insp.get_columns(table)}:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+def _task_indexes(conn):
+    # Solo los de columnas ya presentes: el de updated_at llega con su columna en el paso 8
+    columns = {c["name"] for c in inspect(conn).get_columns("tasks")}
+    for index in models.Task.__table__.indexes:
+        if {c.name for c in index.columns} <= columns:
+            index.create(conn, checkfirst=True)
+
+def _search_index(conn):
+    if search.ensure_index(conn):
+        search.rebuild(conn)
+
+def _task_counts(conn):
+    models.TaskCount.__table__.create(conn, checkfirst=True)
+    counters.rebuild(conn)
+
+def _change_log(conn):
+    # El registro empieza vacío: cada tablero existente solo puede sincronizar desde su versión actual
+    if "changes_since" not in {c["name"] for c in inspect(conn).get_columns("boards")}:
+        conn.exec_driver_sql("ALTER TABLE boards ADD COLUMN changes_since INTEGER NOT NULL DEFAULT 0")
+    conn.exec_driver_sql("UPDATE boards SET changes_since = version")
+    models.BoardChange.__table__.create(conn, checkfirst=True)
+
+def _shard_catalog(conn):
+    for model in (models.BoardShard, models.MovedRow):
+        model.__table__.create(conn, checkfirst=True)
+
+def _task_archive(conn):
+    # Las tareas existentes cuentan su antigüedad desde la migración
+    if "updated_at" not in {c["name"] for c in inspect(conn).get_columns("tasks")}:
+        conn.exec_driver_sql("ALTER TABLE tasks ADD COLUMN updated_at DATETIME")
+        conn.execute(update(models.Task.__table__).values(updated_at=datetime.now(timezone.utc)))
+    _task_indexes(conn)
+    for model in (models.TaskArchive, models.ShardSequence):
+        model.__table__.create(conn, checkfirst=True)
+
+def _board_autoincrement(conn):
+    # SQLite solo añade AUTOINCREMENT recreando la tabla. Sin PRAGMA foreign_keys, el DROP no toca
+    # grupos ni tareas; copiar los ids deja sqlite_sequence en el mayor
+    if conn.dialect.name != "sqlite": return
+    sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'boards'").scalar()
+    if "AUTOINCREMENT" in sql.upper(): return
+    table = models.Board.__table__
+    conn.exec_driver_sql(str(CreateTable(table).compile(conn)).replace("CREATE TABLE boards", "CREATE TABLE boards_new", 1))
+    columns = ", ".join(c.name for c in table.c)
+    conn.exec_driver_sql(f"INSERT INTO boards_new ({columns}) SELECT {columns} FROM boards")
+    conn.exec_driver_sql("DROP TABLE boards")
+    conn.exec_driver_sql("ALTER TABLE boards_new RENAME TO boards")
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+def _login_failures(conn):
+    # Antes la creaba SQLiteThrottle al importarse routers.auth
+    models.LoginFailure.__table__.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    (1, "tablas base", _base),
+    (2, "version y deleted_at en tableros y grupos", _board_group_columns),
+    (3, "índices de tareas por tablero y grupo", _task_indexes),
+    (4, "índice de búsqueda FTS5", _search_index),
+    (5, "contadores de tareas por tablero, grupo y estado", _task_counts),
+    (6, "registro de cambios por tablero", _change_log),
+    (7, "catálogo de shards", _shard_catalog),
+    (8, "updated_at de tareas y archivo de tareas", _task_archive),
+    (9, "ids de tablero sin reutilizar (AUTOINCREMENT)", _board_autoincrement),
+    (10, "intentos de login fallidos (LOGIN_THROTTLE_BACKEND=sqlite)", _login_failures),
+]
+LATEST = MIGRATIONS[-1][0]
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_version"): return 0
+    return conn.exec_driver_sql("SELECT max(version) FROM schema_version").scalar() or 0
+
+def _stamp(conn, version: int):
+    conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+    conn.exec_driver_sql("DELETE FROM schema_version")
+    conn.exec_driver_sql(f"INSERT INTO schema_version (version) VALUES ({int(version)})")
+
+def _targets() -> list:
+    # (url, engine, shard) de cada BD: la principal y, en modo shard, los ficheros de tableros
+    return [(DATABASE_URL, engine, None), *((s.url, s.engine, n) for n, s in SHARDS.items())]
+
+def is_current() -> bool:
+    # Una lectura por BD: es lo único que paga cada worker al arrancar con el esquema ya al día
+    for _, e, _ in _targets():
+        with e.connect() as conn:
+            if current_version(conn) < LATEST: return False
+    return True
+
+def upgrade() -> int:
+    # Versión de la principal (todas quedan en la misma)
+    return [_upgrade(*target) for target in _targets()][0]
+
+def _upgrade(url: str, default, shard) -> int:
+    # SQLite: BEGIN IMMEDIATE toma el bloqueo de escritura, así que con varios workers arrancando
+    # a la vez solo uno migra; los demás esperan (busy_timeout) y encuentran la versión ya al día
+    bind = make_engine(1, begin="BEGIN IMMEDIATE", url=url) if is_sqlite_file(url) else default
+    try:
+        with bind.begin() as conn:
+            version = current_version(conn)
+            if version == 0 and not inspect(conn).get_table_names():
+                Base.metadata.create_all(conn)
+                search.ensure_index(conn)
+                version = LATEST
+                log.info("esquema creado en la versión %s", version)
+            for n, description, step in MIGRATIONS:
+                if n > version:
+                    log.info("migración %s: %s", n, description)
+                    step(conn)
+                    version = n
+            if shard is not None: sharding.prepare(conn, shard)
+            _stamp(conn, version)
+        return version
+    finally:
+        if bind is not default: bind.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Migraciones del esquema")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    args = parser.parse_args()
+    if args.command == "upgrade":
+        print(f"esquema en la versión {upgrade()}")
+    else:
+        for url, e, _ in _targets():
+            with e.connect() as conn:
+                print(f"{url}: versión {current_version(conn)} de {LATEST}")
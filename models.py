@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Index, LargeBinary
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, timezone
 from database import Base
 
+def _now():
+    return datetime.now(timezone.utc)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -18,6 +21,14 @@ class Board(Base):
     __tablename__ = "boards"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
+    # Se incrementa con cada cambio en el tablero, sus grupos o sus tareas (ETag)
+    version = Column(Integer, nullable=False, default=0)
+    # Borrado en dos fases: marcado al instante, filas eliminadas después por purge.py
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Versión más antigua desde la que board_changes está completo (changes?since=)
+    changes_since = Column(Integer, nullable=False, default=0)
+    # Ids sin reutilizar tras la purga: (id, version) identifica un estado del tablero (caché, ETag)
+    __table_args__ = {"sqlite_autoincrement": True}
 
 class Group(Base):
     __tablename__ = "groups"
@@ -25,13 +36,81 @@ class Group(Base):
     name = Column(String, nullable=False)
     board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
     position = Column(Integer, default=0)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
 class Task(Base):
     __tablename__ = "tasks"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
-    group_id = Column(Integer, ForeignKey("groups.id", ondelete="SET NULL"), nullable=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="SET NULL"), nullable=True, index=True)
     status_id = Column(Integer, nullable=True)
     position = Column(Integer, default=0)
+    # Último cambio (también los de Core y los UPDATE en lote): antigüedad para archive.py
+    updated_at = Column(DateTime(timezone=True), nullable=True, default=_now, onupdate=_now)
+    __table_args__ = (Index("ix_tasks_status_updated", "status_id", "updated_at"),)
+
+class TaskArchive(Base):
+    # Tareas archivadas (archive.py): bloques de hasta ARCHIVE_BATCH_SIZE tareas de un tablero como
+    # JSON comprimido, fuera de tasks y de sus índices. En la misma BD (o shard) que el tablero
+    __tablename__ = "task_archive"
+    id = Column(Integer, primary_key=True)
+    board_id = Column(Integer, nullable=False, index=True)
+    min_id = Column(Integer, nullable=False)
+    # Índice: la secuencia de tareas no reutiliza ids archivados (sharding.new_ids)
+    max_id = Column(Integer, nullable=False, index=True)
+    count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+class TaskCount(Base):
+    # Tareas por (tablero, grupo, estado); crud los mantiene en la misma transacción (counters.py)
+    __tablename__ = "task_counts"
+    board_id = Column(Integer, primary_key=True)
+    # counters.NONE: sin grupo / sin estado
+    group_key = Column(Integer, primary_key=True)
+    status_key = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class BoardChange(Base):
+    # Registro de cambios para la sincronización incremental (changes.py); solo se añade y se recorta
+    __tablename__ = "board_changes"
+    id = Column(Integer, primary_key=True)
+    board_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    # board | group | task
+    kind = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    __table_args__ = (Index("ix_board_changes_board_version", "board_id", "version"),)
+
+class LoginFailure(Base):
+    # Intentos fallidos compartidos entre workers (LOGIN_THROTTLE_BACKEND=sqlite)
+    __tablename__ = "login_failures"
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    window_start = Column(Integer, nullable=False)
+    lock_until = Column(Integer, nullable=False, default=0)
+
+class BoardShard(Base):
+    # Catálogo del modo shard (en la BD principal): en qué fichero vive cada tablero
+    __tablename__ = "board_shards"
+    board_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, nullable=False, index=True)
+    # El id de tablero sale de aquí y no se reutiliza tras la purga
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class ShardSequence(Base):
+    # En cada shard: siguiente id de grupos y de tareas, dentro del rango del shard (sharding.new_ids).
+    # Sin shards, solo el de tareas, para no reutilizar los ids de las archivadas
+    __tablename__ = "shard_sequences"
+    name = Column(String, primary_key=True)
+    next = Column(Integer, nullable=False)
+
+class MovedRow(Base):
+    # Grupos y tareas de un tablero movido de shard: sus bits altos ya no indican dónde están
+    __tablename__ = "moved_rows"
+    # group | task
+    kind = Column(String, primary_key=True)
+    row_id = Column(Integer, primary_key=True)
+    shard = Column(Integer, nullable=False)
@@ -0,0 +1,51 @@
+import heapq, json
+from contextlib import ExitStack
+from operator import itemgetter
+from typing import Callable, Optional, Sequence
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from database import ReadSessionLocal
+import lean
+from settings import settings
+
+NDJSON = "application/x-ndjson"
+
+# Cursor keyset: claves de orden separadas por comas, vacío = NULL (p.ej. ",1024,57")
+def encode_cursor(keys: Sequence) -> str:
+    return ",".join("" if k is None else str(k) for k in keys)
+
+def parse_cursor(cursor: Optional[str], size: int):
+    if cursor is None: return None
+    parts = cursor.split(",")
+    try:
+        if len(parts) != size: raise ValueError
+        return tuple(None if p == "" else int(p) for p in parts)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def set_next_cursor(response: Response, rows: list, limit: Optional[int], keys: Callable):
+    # Solo hay página siguiente si la actual vino llena
+    if limit and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(keys(rows[-1]))
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get("accept", "")
+
+def ndjson_response(query_fn: Callable, schema: type[BaseModel], batch: int = None, sessions: Sequence = (ReadSessionLocal,)) -> StreamingResponse:
+    # La sesión vive dentro del generador: la de la dependencia se cierra antes de enviar el cuerpo.
+    # Con varias fábricas de sesión (una por shard) las filas se mezclan por id
+    batch = batch or settings.NDJSON_BATCH_SIZE
+    def gen():
+        keys = tuple(schema.__fields__)
+        with ExitStack() as stack:
+            streams = [lean.project(query_fn(stack.enter_context(f())), schema).yield_per(batch) for f in sessions]
+            rows = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=itemgetter(keys.index("id")))
+            buf = []
+            for row in rows:
+                buf.append(json.dumps(dict(zip(keys, row)), ensure_ascii=False, separators=(",", ":")))
+                if len(buf) >= batch:
+                    yield "\n".join(buf) + "\n"; buf.clear()
+            if buf:
+                yield "\n".join(buf) + "\n"
+    return StreamingResponse(gen(), media_type=NDJSON)
@@ -0,0 +1,132 @@
+# Fase 2 del borrado de tableros y grupos: crud solo marca deleted_at (oculto en los listados al
+# instante) y este hilo elimina después las filas hijas en lotes por conjuntos. Cada lote es una
+# transacción corta: el bloqueo de escritura se suelta entre lotes y los demás escritores no esperan.
+# En modo shard cada pasada recorre todos los shards.
+import logging, threading, time
+from sqlalchemy import delete, func, select, update
+from settings import settings
+import changes, counters, models, search, sharding
+
+log = logging.getLogger("purge")
+T, G, B, A = models.Task.__table__, models.Group.__table__, models.Board.__table__, models.TaskArchive.__table__
+
+class PurgeWorker:
+    def __init__(self, batch: int, pause_ms: float, interval: float):
+        self.batch, self.pause, self.interval = batch, pause_ms / 1000, interval
+        self.stats = {
+            "batches": 0, "boards_deleted": 0, "groups_deleted": 0, "tasks_deleted": 0, "tasks_detached": 0,
+            "changes_trimmed": 0, "pending_boards": 0, "pending_groups": 0, "last_batch_seconds": 0.0,
+        }
+        self._wake, self._stop = threading.Event(), threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="purge", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set(); self._wake.set()
+            self._thread.join(); self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once() or self.trim_changes() > 0
+            except Exception:
+                log.exception("purga fallida; se reintenta en el siguiente ciclo")
+                worked = False
+            if worked:
+                self._stop.wait(self.pause)
+            else:
+                self._wake.wait(self.interval); self._wake.clear()
+
+    def trim_changes(self) -> int:
+        # Un lote del registro de cambios fuera de la retención (por BD); se recorta con la purga en reposo
+        n = 0
+        for sessions in sharding.write_factories():
+            with sessions() as db:
+                n += changes.trim(db, settings.CHANGES_RETENTION_VERSIONS, self.batch)
+                db.commit()
+        self.stats["changes_trimmed"] += n
+        return n
+
+    def run_once(self) -> bool:
+        # Un lote como mucho por BD; False si no queda nada pendiente en ninguna
+        pending, worked = {"pending_boards": 0, "pending_groups": 0}, False
+        for sessions in sharding.write_factories():
+            worked = self._run_db(sessions, pending) or worked
+        self.stats.update(pending)
+        return worked
+
+    def _run_db(self, sessions, pending: dict) -> bool:
+        with sessions() as db:
+            pending["pending_boards"] += db.scalar(select(func.count()).where(B.c.deleted_at.isnot(None)))
+            pending["pending_groups"] += db.scalar(select(func.count()).where(G.c.deleted_at.isnot(None)))
+            board_id = db.scalar(select(B.c.id).where(B.c.deleted_at.isnot(None)).limit(1))
+            group_id = None if board_id is not None else db.scalar(select(G.c.id).where(G.c.deleted_at.isnot(None)).limit(1))
+            if board_id is None and group_id is None: return False
+            t0 = time.perf_counter()
+            gone = self._board_batch(db, board_id) if board_id is not None else self._group_batch(db, group_id)
+            db.commit()
+            shard = db.info.get("shard")
+        # Tablero eliminado del todo: sale del catálogo (salvo que sea el origen de un move)
+        if gone and shard is not None: sharding.forget_board(board_id, shard)
+        self.stats["batches"] += 1
+        self.stats["last_batch_seconds"] = time.perf_counter() - t0
+        return True
+
+    def _board_batch(self, db, board_id: int) -> bool:
+        # Primero las tareas (las archivadas después), luego los grupos y por último la fila del tablero
+        ids = db.scalars(select(T.c.id).where(T.c.board_id == board_id).limit(self.batch)).all()
+        if ids:
+            search.unindex_tasks(db, ids); counters.add_tasks(db, ids, sign=-1)
+            db.execute(delete(T).where(T.c.id.in_(ids)))
+            self.stats["tasks_deleted"] += len(ids)
+            return False
+        # Bloques de hasta ARCHIVE_BATCH_SIZE tareas: por lote, las mismas tareas que en tasks
+        rows = db.execute(select(A.c.id, A.c.count).where(A.c.board_id == board_id).limit(max(1, self.batch // settings.ARCHIVE_BATCH_SIZE))).all()
+        if rows:
+            db.execute(delete(A).where(A.c.id.in_([r.id for r in rows])))
+            self.stats["tasks_deleted"] += sum(r.count for r in rows)
+            return False
+        ids = db.scalars(select(G.c.id).where(G.c.board_id == board_id).limit(self.batch)).all()
+        if ids:
+            db.execute(delete(G).where(G.c.id.in_(ids)))
+            self.stats["groups_deleted"] += len(ids)
+            return False
+        if changes.drop_board(db, board_id, self.batch): return False
+        counters.drop_board(db, board_id)
+        db.execute(delete(B).where(B.c.id == board_id))
+        self.stats["boards_deleted"] += 1
+        return True
+
+    def _group_batch(self, db, group_id: int) -> bool:
+        # Las tareas pasan a no tener grupo (ondelete=SET NULL); la versión de sus tableros sube por lote
+        rows = dict(db.execute(select(T.c.id, T.c.board_id).where(T.c.group_id == group_id).limit(self.batch)).all())
+        ids = list(rows)
+        if ids:
+            counters.add_tasks(db, ids, sign=-1)
+            db.execute(update(T).where(T.c.id.in_(ids)).values(group_id=None))
+            counters.add_tasks(db, ids)
+            db.execute(update(B).where(B.c.id.in_(set(rows.values()))).values(version=B.c.version + 1))
+            changes.log(db, ((b, "task", i, False) for i, b in rows.items()))
+            self.stats["tasks_detached"] += len(ids)
+            return False
+        db.execute(delete(G).where(G.c.id == group_id))
+        self.stats["groups_deleted"] += 1
+        return False
+
+    def drain(self):
+        # Purga todo lo pendiente en el hilo actual (scripts y benchmarks)
+        while self.run_once() or self.trim_changes(): time.sleep(self.pause)
+
+worker = PurgeWorker(settings.PURGE_BATCH_SIZE, settings.PURGE_PAUSE_MS, settings.PURGE_INTERVAL_SECONDS)
+
+def wake():
+    worker.wake()
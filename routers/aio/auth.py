@@ -0,0 +1,124 @@
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Body, Response, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+import models, schemas
+from security import (
+    verify_and_update_password_async, hash_password_async, HashingBusy,
+    create_access_token, create_refresh_token,
+    set_refresh_cookie, clear_refresh_cookie,
+    password_policy_ok, decode_token
+)
+from deps import invalidate_user
+from throttle import MemoryThrottle, get_login_throttle
+from routers.auth import _hashing_busy, _key
+
+router = APIRouter()
+
+async def _throttled(method: str, email: str, ip: str):
+    # SQLiteThrottle usa el engine síncrono de la principal: al threadpool
+    throttle = get_login_throttle()
+    fn = getattr(throttle, method)
+    if isinstance(throttle, MemoryThrottle): return fn(_key(email, ip))
+    return await anyio.to_thread.run_sync(fn, _key(email, ip))
+
+@router.post("/auth/register", response_model=schemas.RegisterOut, summary="Registro con política de contraseña y hashing")
+async def register(payload: schemas.RegisterIn = Body(...), db: AsyncSession = Depends(get_async_db)):
+    if not password_policy_ok(payload.password):
+        raise HTTPException(status_code=400, detail="La contraseña no cumple la política mínima")
+    # Hash antes de tocar la BD: la sesión no retiene una conexión del pool mientras bcrypt trabaja
+    try:
+        hashed = await hash_password_async(payload.password)
+    except HashingBusy:
+        raise _hashing_busy()
+    existing = await db.scalar(select(models.User).where(models.User.email == payload.email.lower()))
+    if existing:
+        raise HTTPException(status_code=409, detail="El email ya está registrado")
+    user = models.User(
+        email=payload.email.lower(),
+        hashed_password=hashed,
+        is_active=True,
+        is_verified=False,
+    )
+    db.add(user); await db.commit(); await db.refresh(user)
+    return schemas.RegisterOut(id=user.id, email=user.email, is_verified=user.is_verified)
+
+@router.post("/auth/login", response_model=schemas.TokenOut, summary="Login seguro con bloqueo por intentos y refresh cookie")
+async def login(response: Response, request: Request, payload: schemas.LoginIn = Body(...), db: AsyncSession = Depends(get_async_db)):
+    ip = request.client.host if request.client else "unknown"
+    if await _throttled("is_locked", payload.email, ip):
+        raise HTTPException(status_code=423, detail="Cuenta/IP temporalmente bloqueada por intentos fallidos")
+
+    user = await db.scalar(select(models.User).where(models.User.email == payload.email.lower()))
+    valid, new_hash = False, None
+    if user:
+        hashed = user.hashed_password
+        # Devuelve la conexión al pool durante bcrypt; sin carga perezosa en async, se recarga explícitamente
+        await db.rollback()
+        try:
+            valid, new_hash = await verify_and_update_password_async(payload.password, hashed)
+        except HashingBusy:
+            raise _hashing_busy()
+        if valid: await db.refresh(user)
+    if not user or not valid:
+        await _throttled("register_failure", payload.email, ip)
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="Usuario inactivo")
+
+    await _throttled("clear", payload.email, ip)
+
+    access, access_jti = create_access_token(user.id)
+    refresh, refresh_jti, refresh_exp = create_refresh_token(user.id)
+    user.refresh_jti = refresh_jti
+    if new_hash:
+        # Rehash con el coste actual aprovechando que tenemos la contraseña en claro
+        user.hashed_password = new_hash
+    await db.commit()
+
+    set_refresh_cookie(response, refresh, refresh_exp)
+    return {"access_token": access, "token_type": "bearer"}
+
+@router.post("/auth/refresh", response_model=schemas.RefreshOut, summary="Rotar refresh y obtener nuevo access")
+async def refresh_token(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    cookie = request.cookies.get("refresh_token")
+    if not cookie:
+        raise HTTPException(status_code=401, detail="Refresh token requerido")
+    try:
+        payload = decode_token(cookie)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Refresh token inválido")
+    if payload.get("scope") != "refresh":
+        raise HTTPException(status_code=401, detail="Refresh token inválido")
+
+    user_id = int(payload.get("sub"))
+    jti = payload.get("jti")
+    user = await db.get(models.User, user_id)
+    if not user or not user.is_active or user.refresh_jti != jti:
+        raise HTTPException(status_code=401, detail="Refresh token no reconocido")
+
+    access, _ = create_access_token(user.id)
+    new_refresh, new_jti, new_exp = create_refresh_token(user.id)
+    user.refresh_jti = new_jti
+    await db.commit()
+
+    set_refresh_cookie(response, new_refresh, new_exp)
+    return {"access_token": access, "token_type": "bearer"}
+
+@router.post("/auth/logout", status_code=204, summary="Logout: invalidar refresh actual")
+async def logout(response: Response, request: Request, db: AsyncSession = Depends(get_async_db)):
+    cookie = request.cookies.get("refresh_token")
+    if cookie:
+        try:
+            payload = decode_token(cookie)
+            user_id = int(payload.get("sub"))
+            user = await db.get(models.User, user_id)
+            if user:
+                user.refresh_jti = None
+                await db.commit()
+            invalidate_user(user_id)
+        except Exception:
+            pass
+    clear_refresh_cookie(response)
+    return None
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import boardio, changes, counters, crud, lean, schemas, sharding
+from database import get_async_read_db
+from sharding import get_async_board_db, get_async_board_read_db, get_async_new_board_db
+from groupcommit import write_async
+from listcache import cached_json_async
+from pagination import parse_cursor, set_next_cursor, wants_ndjson, ndjson_response
+from routers.boards import _etag, _not_modified, import_board
+from settings import settings
+
+router = APIRouter()
+
+@router.post("/boards/", response_model=schemas.BoardOut, summary="Crear un tablero")
+async def create_board(board: schemas.BoardCreate = Body(...), db: AsyncSession = Depends(get_async_new_board_db)):
+    return await write_async(crud.create_board, db, board=board, board_id=db.info.get("board_id"))
+
+@router.get("/boards/", response_model=List[schemas.BoardOut], summary="Listar tableros")
+async def list_boards(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # En modo shard, la misma página en cada shard y mezcla por id
+    cursor = parse_cursor(after, 1)
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut, sessions=sharding.read_factories())
+    rows = await sharding.gather_async(
+        db, lambda s: lean.rows(crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut), key=lambda b: b.id, limit=limit
+    )
+    r = lean.json_response(rows, schemas.BoardOut)
+    set_next_cursor(r, rows, limit, lambda b: (b.id,))
+    return r
+
+@router.get("/boards/summary", response_model=List[schemas.BoardSummary], summary="Contadores de tareas de cada tablero")
+async def list_board_summaries(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Paginado como /boards/: el cursor es el id del último tablero
+    cursor = parse_cursor(after, 1)
+    def page(s):
+        return counters.summaries(s, [b.id for b in lean.rows(crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut)])
+    rows = await sharding.gather_async(db, page, key=lambda b: b["board_id"], limit=limit)
+    r = lean.JSONBytes(lean.encode(rows))
+    set_next_cursor(r, rows, limit, lambda b: (b["board_id"],))
+    return r
+
+@router.get("/boards/{board_id}/summary", response_model=schemas.BoardSummary, summary="Contadores de tareas por grupo y estado")
+async def get_board_summary(board_id: int = Path(...), db: AsyncSession = Depends(get_async_board_read_db)):
+    def run(s):
+        return counters.summaries(s, [board_id])[0] if crud.get_board(db=s, board_id=board_id) else None
+    summary = await db.run_sync(run)
+    if summary is None: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return lean.JSONBytes(lean.encode(summary))
+
+# La importación ya era async: lee el cuerpo en streaming y escribe por bloques
+router.add_api_route(
+    "/boards/import", import_board, methods=["POST"], response_model=schemas.BoardImportResult, status_code=201,
+    summary="Importar un tablero (NDJSON)",
+)
+
+@router.get("/boards/{board_id}/export", summary="Exportar un tablero completo (NDJSON)")
+async def export_board(board_id: int = Path(...), db: AsyncSession = Depends(get_async_board_read_db)):
+    if not await db.run_sync(crud.get_board, board_id=board_id): raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return boardio.export_response(board_id, sharding.read_factory(db))
+
+@router.get("/boards/{board_id}/full", response_model=schemas.BoardFull, summary="Tablero completo con grupos y tareas (ETag)")
+async def get_board_full(request: Request, board_id: int = Path(...), db: AsyncSession = Depends(get_async_board_read_db)):
+    b = await db.run_sync(crud.get_board, board_id=board_id)
+    if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    etag = _etag(b)
+    # Sin cambios desde la última lectura: no se consultan grupos ni tareas
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    r = await cached_json_async(db, ("full", b.id, b.version), lambda s: crud.get_board_full(db=s, board=b))
+    r.headers["ETag"] = etag
+    return r
+
+@router.get("/boards/{board_id}/changes", response_model=schemas.BoardChanges, summary="Cambios desde una versión del tablero")
+async def get_board_changes(board_id: int = Path(...), since: int = Query(..., ge=0), db: AsyncSession = Depends(get_async_board_read_db)):
+    b = await db.run_sync(crud.get_board, board_id=board_id)
+    if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    out = await db.run_sync(changes.since, b, since, settings.CHANGES_MAX_ROWS)
+    # 410: la versión ya no está en el registro (o el delta es demasiado grande); recargar /full
+    if out is None: raise HTTPException(status_code=410, detail="Versión fuera del registro de cambios: recarga el tablero completo")
+    r = lean.JSONBytes(lean.encode(out))
+    r.headers["ETag"] = _etag(b)
+    return r
+
+@router.patch("/boards/{board_id}", response_model=schemas.BoardOut, summary="Actualizar tablero")
+async def update_board(board_id: int = Path(...), payload: schemas.BoardUpdate = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    b = await write_async(crud.update_board, db, board_id=board_id, payload=payload)
+    if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return b
+
+@router.delete("/boards/{board_id}", status_code=204, summary="Eliminar tablero")
+async def delete_board(board_id: int = Path(...), db: AsyncSession = Depends(get_async_board_db)):
+    ok = await write_async(crud.delete_board, db, board_id=board_id)
+    if not ok: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return None
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Body
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+import crud, lean, schemas
+from sharding import get_async_board_db, get_async_board_read_db
+from groupcommit import write_async
+from listcache import cached_json_async
+from routers.groups import _check_bulk_size
+
+router = APIRouter()
+
+@router.post("/groups/", response_model=schemas.GroupOut, summary="Crear un grupo dentro de un tablero")
+async def create_group(group: schemas.GroupCreate = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    return await write_async(crud.create_group, db, group=group)
+
+# Rutas /groups/bulk antes de /groups/{group_id} para que no las capture el parámetro
+@router.post("/groups/bulk", response_model=List[schemas.GroupBulkResult], summary="Crear grupos en lote")
+async def bulk_create_groups(items: List[schemas.GroupCreate] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(items)
+    return await write_async(crud.bulk_create_groups, db, items=items)
+
+@router.patch("/groups/bulk", response_model=List[schemas.GroupBulkResult], summary="Actualizar grupos en lote")
+async def bulk_update_groups(items: List[schemas.GroupBulkUpdate] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(items)
+    return await write_async(crud.bulk_update_groups, db, items=items)
+
+@router.delete("/groups/bulk", response_model=List[schemas.BulkResult], summary="Eliminar grupos en lote")
+async def bulk_delete_groups(ids: List[int] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(ids)
+    return await write_async(crud.bulk_delete_groups, db, ids=ids)
+
+@router.get("/boards/{board_id}/groups", response_model=List[schemas.GroupOut], summary="Listar grupos de un tablero")
+async def list_groups(board_id: int = Path(...), db: AsyncSession = Depends(get_async_board_read_db)):
+    version = await db.run_sync(crud.board_version, board_id=board_id)
+    rows = lambda s: lean.rows(crud.query_groups_by_board(s, board_id), schemas.GroupOut)
+    if version is None:
+        return lean.json_response(await db.run_sync(rows), schemas.GroupOut)
+    return await cached_json_async(db, ("groups", board_id, version), lambda s: lean.dicts(rows(s), schemas.GroupOut))
+
+@router.patch("/groups/{group_id}", response_model=schemas.GroupOut, summary="Actualizar un grupo")
+async def update_group(group_id: int = Path(...), payload: schemas.GroupUpdate = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    g = await write_async(crud.update_group, db, group_id=group_id, payload=payload)
+    if not g: raise HTTPException(status_code=404, detail="Grupo no encontrado")
+    return g
+
+@router.delete("/groups/{group_id}", status_code=204, summary="Eliminar un grupo")
+async def delete_group(group_id: int = Path(...), db: AsyncSession = Depends(get_async_board_db)):
+    ok = await write_async(crud.delete_group, db, group_id=group_id)
+    if not ok: raise HTTPException(status_code=404, detail="Grupo no encontrado")
+    return None
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import archive, crud, lean, schemas, search, sharding
+from sharding import get_async_board_db, get_async_board_read_db
+from groupcommit import write_async
+from listcache import cached_json_async
+from pagination import parse_cursor, set_next_cursor, wants_ndjson, ndjson_response
+from routers.tasks import _check_anchor, _check_bulk_size, _page, _rows, _target_errors
+from settings import settings
+
+router = APIRouter()
+
+@router.post("/tasks/", response_model=schemas.TaskOut, summary="Crear una tarea")
+async def create_task(task: schemas.TaskCreate = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    with _target_errors():
+        return await write_async(crud.create_task, db, task=task)
+
+# Rutas /tasks/bulk antes de /tasks/{task_id} para que no las capture el parámetro
+@router.post("/tasks/bulk", response_model=List[schemas.TaskBulkResult], summary="Crear tareas en lote")
+async def bulk_create_tasks(items: List[schemas.TaskCreate] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(items)
+    return await write_async(crud.bulk_create_tasks, db, items=items)
+
+@router.patch("/tasks/bulk", response_model=List[schemas.TaskBulkResult], summary="Actualizar tareas en lote")
+async def bulk_update_tasks(items: List[schemas.TaskBulkUpdate] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(items)
+    return await write_async(crud.bulk_update_tasks, db, items=items)
+
+@router.post("/tasks/bulk-move", response_model=List[schemas.TaskBulkResult], summary="Mover tareas en lote")
+async def bulk_move_tasks(items: List[schemas.TaskBulkMove] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(items)
+    return await write_async(crud.bulk_move_tasks, db, items=items)
+
+@router.delete("/tasks/bulk", response_model=List[schemas.BulkResult], summary="Eliminar tareas en lote")
+async def bulk_delete_tasks(ids: List[int] = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_bulk_size(ids)
+    return await write_async(crud.bulk_delete_tasks, db, ids=ids)
+
+@router.get("/boards/{board_id}/tasks", response_model=List[schemas.TaskOut], summary="Listar tareas por tablero (y archivadas)")
+async def list_tasks_by_board(
+    request: Request, board_id: int = Path(...),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+    db: AsyncSession = Depends(get_async_board_read_db),
+):
+    cursor = parse_cursor(after, 3)
+    if include_archived:
+        # Las archivadas siguen a las del listado normal, sin orden común con ellas: sin cursor
+        if cursor is not None or limit is not None:
+            raise HTTPException(status_code=400, detail="include_archived no admite limit ni after")
+        return archive.tasks_response(lambda s: crud.query_tasks_by_board(s, board_id), board_id, sharding.read_factory(db), wants_ndjson(request))
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_tasks_by_board(s, board_id, after=cursor, limit=limit), schemas.TaskOut, sessions=[sharding.read_factory(db)])
+    if cursor is None and limit is None:
+        version = await db.run_sync(crud.board_version, board_id=board_id)
+        if version is not None:
+            return await cached_json_async(db, ("tasks", board_id, version), lambda s: lean.dicts(_rows(crud.query_tasks_by_board(s, board_id)), schemas.TaskOut))
+    rows = await db.run_sync(lambda s: _rows(crud.query_tasks_by_board(s, board_id, after=cursor, limit=limit)))
+    return _page(rows, limit, lambda t: (t.group_id, t.position, t.id))
+
+@router.get("/boards/{board_id}/tasks/search", response_model=List[schemas.TaskOut], summary="Buscar tareas del tablero")
+async def search_tasks(
+    response: Response, board_id: int = Path(...), q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_board_read_db),
+):
+    # Resultados por relevancia (bm25): el cursor es el desplazamiento dentro del ranking
+    offset = (parse_cursor(after, 1) or (0,))[0]
+    def run(s):
+        if crud.board_version(db=s, board_id=board_id) is None: return None
+        return search.search_tasks(s, board_id, q, limit=limit, offset=offset)
+    rows = await db.run_sync(run)
+    if rows is None: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    set_next_cursor(response, rows, limit, lambda t: (offset + limit,))
+    return rows
+
+@router.get("/groups/{group_id}/tasks", response_model=List[schemas.TaskOut], summary="Listar tareas por grupo")
+async def list_tasks_by_group(
+    request: Request, group_id: int = Path(...),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_board_read_db),
+):
+    cursor = parse_cursor(after, 2)
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_tasks_by_group(s, group_id, after=cursor, limit=limit), schemas.TaskOut, sessions=[sharding.read_factory(db)])
+    if cursor is None and limit is None:
+        board_version = await db.run_sync(crud.group_board_version, group_id=group_id)
+        if board_version is not None:
+            return await cached_json_async(
+                db, ("group_tasks", *board_version, group_id), lambda s: lean.dicts(_rows(crud.query_tasks_by_group(s, group_id)), schemas.TaskOut)
+            )
+    rows = await db.run_sync(lambda s: _rows(crud.query_tasks_by_group(s, group_id, after=cursor, limit=limit)))
+    return _page(rows, limit, lambda t: (t.position, t.id))
+
+@router.patch("/tasks/{task_id}", response_model=schemas.TaskOut, summary="Actualizar una tarea")
+async def update_task(task_id: int = Path(...), payload: schemas.TaskUpdate = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    with _target_errors():
+        t = await write_async(crud.update_task, db, task_id=task_id, payload=payload)
+    if not t: raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return t
+
+@router.post("/tasks/{task_id}/move", response_model=schemas.TaskOut, summary="Mover una tarea y reordenar")
+async def move_task(task_id: int = Path(...), move: schemas.TaskMove = Body(...), db: AsyncSession = Depends(get_async_board_db)):
+    _check_anchor(task_id, move)
+    with _target_errors():
+        t = await write_async(crud.move_task, db, task_id=task_id, move=move)
+    if not t: raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return t
+
+@router.delete("/tasks/{task_id}", status_code=204, summary="Eliminar una tarea")
+async def delete_task(task_id: int = Path(...), db: AsyncSession = Depends(get_async_board_db)):
+    ok = await write_async(crud.delete_task, db, task_id=task_id)
+    if not ok: raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return None
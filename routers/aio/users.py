@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_async_read_db
+from deps import get_current_user_async
+from pagination import parse_cursor, set_next_cursor, wants_ndjson, ndjson_response
+from settings import settings
+import crud, schemas
+
+router = APIRouter()
+
+@router.get("/users/me", response_model=schemas.UserOut, summary="Usuario autenticado")
+async def me(user=Depends(get_current_user_async)):
+    return {"id": user.id, "email": user.email, "is_verified": user.is_verified, "is_active": user.is_active}
+
+@router.get("/users/", response_model=List[schemas.UserOut], summary="Listar usuarios (demo)")
+async def list_users(
+    request: Request, response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    cursor = parse_cursor(after, 1)
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_users(s, after=cursor, limit=limit), schemas.UserOut)
+    users = await db.run_sync(lambda s: crud.query_users(s, after=cursor, limit=limit).all())
+    set_next_cursor(response, users, limit, lambda u: (u.id,))
+    return [{"id": u.id, "email": u.email, "is_verified": u.is_verified, "is_active": u.is_active} for u in users]
@@ -1,53 +1,49 @@
-from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Body, Response, Request, status
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
 from security import (
-    verify_password, hash_password,
+    verify_and_update_password, hash_password, HashingBusy,
     create_access_token, create_refresh_token,
     set_refresh_cookie, clear_refresh_cookie,
     password_policy_ok, decode_token
 )
-from settings import settings
+from deps import invalidate_user
+from throttle import get_login_throttle
 
 router = APIRouter()
 
-_failed_cache = {}
-
 def _key(email: str, ip: str) -> str:
     return f"{email.lower()}|{ip}"
 
 def _register_failure(email: str, ip: str):
-    k = _key(email, ip)
-    rec = _failed_cache.get(k, {"count": 0, "lock_until": 0})
-    rec["count"] += 1
-    if rec["count"] >= settings.MAX_FAILED_LOGINS:
-        rec["lock_until"] = int(datetime.now(timezone.utc).timestamp()) + settings.LOCKOUT_MINUTES * 60
-    _failed_cache[k] = rec
+    get_login_throttle().register_failure(_key(email, ip))
 
 def _clear_failures(email: str, ip: str):
-    _failed_cache.pop(_key(email, ip), None)
+    get_login_throttle().clear(_key(email, ip))
 
 def _is_locked(email: str, ip: str):
-    rec = _failed_cache.get(_key(email, ip))
-    if not rec: return None
-    now = int(datetime.now(timezone.utc).timestamp())
-    if rec.get("lock_until", 0) > now:
-        return rec["lock_until"]
-    return None
+    return get_login_throttle().is_locked(_key(email, ip))
+
+def _hashing_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Servicio de autenticación saturado, reintenta en unos segundos", headers={"Retry-After": "1"})
 
 @router.post("/auth/register", response_model=schemas.RegisterOut, summary="Registro con política de contraseña y hashing")
 def register(payload: schemas.RegisterIn = Body(...), db: Session = Depends(get_db)):
     if not password_policy_ok(payload.password):
         raise HTTPException(status_code=400, detail="La contraseña no cumple la política mínima")
+    # Hash antes de tocar la BD: la sesión no retiene una conexión del pool mientras bcrypt trabaja
+    try:
+        hashed = hash_password(payload.password)
+    except HashingBusy:
+        raise _hashing_busy()
     existing = db.query(models.User).filter(models.User.email == payload.email.lower()).first()
     if existing:
         raise HTTPException(status_code=409, detail="El email ya está registrado")
     user = models.User(
         email=payload.email.lower(),
-        hashed_password=hash_password(payload.password),
+        hashed_password=hashed,
         is_active=True,
         is_verified=False,
     )
@@ -62,7 +58,16 @@ def login(response: Response, request: Request, payload: schemas.LoginIn = Body(
         raise HTTPException(status_code=423, detail="Cuenta/IP temporalmente bloqueada por intentos fallidos")
 
     user = db.query(models.User).filter(models.User.email == payload.email.lower()).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        hashed = user.hashed_password
+        # Devuelve la conexión al pool durante bcrypt; el usuario se recarga al volver a usarlo
+        db.rollback()
+        try:
+            valid, new_hash = verify_and_update_password(payload.password, hashed)
+        except HashingBusy:
+            raise _hashing_busy()
+    if not user or not valid:
         _register_failure(payload.email, ip)
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     if not user.is_active:
@@ -73,6 +78,9 @@ def login(response: Response, request: Request, payload: schemas.LoginIn = Body(
     access, access_jti = create_access_token(user.id)
     refresh, refresh_jti, refresh_exp = create_refresh_token(user.id)
     user.refresh_jti = refresh_jti
+    if new_hash:
+        # Rehash con el coste actual aprovechando que tenemos la contraseña en claro
+        user.hashed_password = new_hash
     db.commit()
 
     set_refresh_cookie(response, refresh, refresh_exp)
@@ -115,8 +123,8 @@ def logout(response: Response, request: Request, db: Session = Depends(get_db)):
             if user:
                 user.refresh_jti = None
                 db.commit()
+            invalidate_user(user_id)
         except Exception:
             pass
-    from security import clear_refresh_cookie
     clear_refresh_cookie(response)
     return None
@@ -1,27 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Body
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-import crud, schemas
-from database import get_db
+from typing import List, Optional
+import boardio, changes, counters, crud, lean, schemas, sharding
+from database import get_read_db
+from sharding import get_board_db, get_board_read_db, get_new_board_db
+from groupcommit import write
+from listcache import cached_json
+from pagination import parse_cursor, set_next_cursor, wants_ndjson, ndjson_response
+from settings import settings
 
 router = APIRouter()
 
 @router.post("/boards/", response_model=schemas.BoardOut, summary="Crear un tablero")
-def create_board(board: schemas.BoardCreate = Body(...), db: Session = Depends(get_db)):
-    return crud.create_board(db=db, board=board)
+def create_board(board: schemas.BoardCreate = Body(...), db: Session = Depends(get_new_board_db)):
+    return write(crud.create_board, db, board=board, board_id=db.info.get("board_id"))
 
 @router.get("/boards/", response_model=List[schemas.BoardOut], summary="Listar tableros")
-def list_boards(db: Session = Depends(get_db)):
-    return crud.list_boards(db=db)
+def list_boards(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    # En modo shard, la misma página en cada shard y mezcla por id
+    cursor = parse_cursor(after, 1)
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut, sessions=sharding.read_factories())
+    rows = sharding.gather(db, lambda s: lean.rows(crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut), key=lambda b: b.id, limit=limit)
+    r = lean.json_response(rows, schemas.BoardOut)
+    set_next_cursor(r, rows, limit, lambda b: (b.id,))
+    return r
+
+@router.get("/boards/summary", response_model=List[schemas.BoardSummary], summary="Contadores de tareas de cada tablero")
+def list_board_summaries(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    # Paginado como /boards/: el cursor es el id del último tablero
+    cursor = parse_cursor(after, 1)
+    def page(s):
+        return counters.summaries(s, [b.id for b in lean.rows(crud.query_boards(s, after=cursor, limit=limit), schemas.BoardOut)])
+    rows = sharding.gather(db, page, key=lambda b: b["board_id"], limit=limit)
+    r = lean.JSONBytes(lean.encode(rows))
+    set_next_cursor(r, rows, limit, lambda b: (b["board_id"],))
+    return r
+
+@router.get("/boards/{board_id}/summary", response_model=schemas.BoardSummary, summary="Contadores de tareas por grupo y estado")
+def get_board_summary(board_id: int = Path(...), db: Session = Depends(get_board_read_db)):
+    if not crud.get_board(db=db, board_id=board_id): raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return lean.JSONBytes(lean.encode(counters.summaries(db, [board_id])[0]))
+
+@router.post("/boards/import", response_model=schemas.BoardImportResult, status_code=201, summary="Importar un tablero (NDJSON)")
+async def import_board(request: Request):
+    # Cuerpo NDJSON tal como lo genera /boards/{id}/export; se procesa en streaming por bloques
+    return await boardio.import_stream(request.stream())
+
+@router.get("/boards/{board_id}/export", summary="Exportar un tablero completo (NDJSON)")
+def export_board(board_id: int = Path(...), db: Session = Depends(get_board_read_db)):
+    if not crud.get_board(db=db, board_id=board_id): raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    return boardio.export_response(board_id, sharding.read_factory(db))
+
+def _etag(board) -> str:
+    # Único por estado: la versión sube con cada escritura y el id no se reutiliza (AUTOINCREMENT)
+    return f'"{board.id}-{board.version}"'
+
+def _not_modified(request: Request, etag: str) -> bool:
+    # If-None-Match: "*" o lista de etiquetas separadas por comas; comparación débil (se ignora W/)
+    tags = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    return "*" in tags or etag in tags
+
+@router.get("/boards/{board_id}/full", response_model=schemas.BoardFull, summary="Tablero completo con grupos y tareas (ETag)")
+def get_board_full(request: Request, board_id: int = Path(...), db: Session = Depends(get_board_read_db)):
+    b = crud.get_board(db=db, board_id=board_id)
+    if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    etag = _etag(b)
+    # Sin cambios desde la última lectura: no se consultan grupos ni tareas
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    r = cached_json(("full", b.id, b.version), lambda: crud.get_board_full(db=db, board=b))
+    r.headers["ETag"] = etag
+    return r
+
+@router.get("/boards/{board_id}/changes", response_model=schemas.BoardChanges, summary="Cambios desde una versión del tablero")
+def get_board_changes(board_id: int = Path(...), since: int = Query(..., ge=0), db: Session = Depends(get_board_read_db)):
+    b = crud.get_board(db=db, board_id=board_id)
+    if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    out = changes.since(db, b, since, settings.CHANGES_MAX_ROWS)
+    # 410: la versión ya no está en el registro (o el delta es demasiado grande); recargar /full
+    if out is None: raise HTTPException(status_code=410, detail="Versión fuera del registro de cambios: recarga el tablero completo")
+    r = lean.JSONBytes(lean.encode(out))
+    r.headers["ETag"] = _etag(b)
+    return r
 
 @router.patch("/boards/{board_id}", response_model=schemas.BoardOut, summary="Actualizar tablero")
-def update_board(board_id: int = Path(...), payload: schemas.BoardUpdate = Body(...), db: Session = Depends(get_db)):
-    b = crud.update_board(db=db, board_id=board_id, payload=payload)
+def update_board(board_id: int = Path(...), payload: schemas.BoardUpdate = Body(...), db: Session = Depends(get_board_db)):
+    b = write(crud.update_board, db, board_id=board_id, payload=payload)
     if not b: raise HTTPException(status_code=404, detail="Tablero no encontrado")
     return b
 
 @router.delete("/boards/{board_id}", status_code=204, summary="Eliminar tablero")
-def delete_board(board_id: int = Path(...), db: Session = Depends(get_db)):
-    ok = crud.delete_board(db=db, board_id=board_id)
+def delete_board(board_id: int = Path(...), db: Session = Depends(get_board_db)):
+    ok = write(crud.delete_board, db, board_id=board_id)
     if not ok: raise HTTPException(status_code=404, detail="Tablero no encontrado")
     return None
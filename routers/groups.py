@@ -1,27 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, Path, Body
 from sqlalchemy.orm import Session
 from typing import List
-import crud, schemas
-from database import get_db
+import crud, lean, schemas
+from sharding import get_board_db, get_board_read_db
+from groupcommit import write
+from listcache import cached_json
+from settings import settings
 
 router = APIRouter()
 
 @router.post("/groups/", response_model=schemas.GroupOut, summary="Crear un grupo dentro de un tablero")
-def create_group(group: schemas.GroupCreate = Body(...), db: Session = Depends(get_db)):
-    return crud.create_group(db=db, group=group)
+def create_group(group: schemas.GroupCreate = Body(...), db: Session = Depends(get_board_db)):
+    return write(crud.create_group, db, group=group)
+
+def _check_bulk_size(items: list):
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {settings.BULK_MAX_ITEMS} elementos por lote")
+
+# Rutas /groups/bulk antes de /groups/{group_id} para que no las capture el parámetro
+@router.post("/groups/bulk", response_model=List[schemas.GroupBulkResult], summary="Crear grupos en lote")
+def bulk_create_groups(items: List[schemas.GroupCreate] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(items)
+    return write(crud.bulk_create_groups, db, items=items)
+
+@router.patch("/groups/bulk", response_model=List[schemas.GroupBulkResult], summary="Actualizar grupos en lote")
+def bulk_update_groups(items: List[schemas.GroupBulkUpdate] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(items)
+    return write(crud.bulk_update_groups, db, items=items)
+
+@router.delete("/groups/bulk", response_model=List[schemas.BulkResult], summary="Eliminar grupos en lote")
+def bulk_delete_groups(ids: List[int] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(ids)
+    return write(crud.bulk_delete_groups, db, ids=ids)
 
 @router.get("/boards/{board_id}/groups", response_model=List[schemas.GroupOut], summary="Listar grupos de un tablero")
-def list_groups(board_id: int = Path(...), db: Session = Depends(get_db)):
-    return crud.list_groups_by_board(db=db, board_id=board_id)
+def list_groups(board_id: int = Path(...), db: Session = Depends(get_board_read_db)):
+    version = crud.board_version(db=db, board_id=board_id)
+    rows = lambda: lean.rows(crud.query_groups_by_board(db, board_id), schemas.GroupOut)
+    if version is None:
+        return lean.json_response(rows(), schemas.GroupOut)
+    return cached_json(("groups", board_id, version), lambda: lean.dicts(rows(), schemas.GroupOut))
 
 @router.patch("/groups/{group_id}", response_model=schemas.GroupOut, summary="Actualizar un grupo")
-def update_group(group_id: int = Path(...), payload: schemas.GroupUpdate = Body(...), db: Session = Depends(get_db)):
-    g = crud.update_group(db=db, group_id=group_id, payload=payload)
+def update_group(group_id: int = Path(...), payload: schemas.GroupUpdate = Body(...), db: Session = Depends(get_board_db)):
+    g = write(crud.update_group, db, group_id=group_id, payload=payload)
     if not g: raise HTTPException(status_code=404, detail="Grupo no encontrado")
     return g
 
 @router.delete("/groups/{group_id}", status_code=204, summary="Eliminar un grupo")
-def delete_group(group_id: int = Path(...), db: Session = Depends(get_db)):
-    ok = crud.delete_group(db=db, group_id=group_id)
+def delete_group(group_id: int = Path(...), db: Session = Depends(get_board_db)):
+    ok = write(crud.delete_group, db, group_id=group_id)
     if not ok: raise HTTPException(status_code=404, detail="Grupo no encontrado")
     return None
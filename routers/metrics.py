@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from metrics import render_prometheus
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False, summary="Métricas en formato Prometheus")
+async def metrics():
+    # async: se sirve desde el event loop aunque el threadpool esté saturado
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,37 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Body
+from contextlib import contextmanager
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-import crud, schemas
-from database import get_db
+from typing import List, Optional
+import archive, crud, lean, schemas, search, sharding
+from sharding import get_board_db, get_board_read_db
+from groupcommit import write
+from listcache import cached_json
+from pagination import parse_cursor, set_next_cursor, wants_ndjson, ndjson_response
+from settings import settings
 
 router = APIRouter()
 
 @router.post("/tasks/", response_model=schemas.TaskOut, summary="Crear una tarea")
-def create_task(task: schemas.TaskCreate = Body(...), db: Session = Depends(get_db)):
-    return crud.create_task(db=db, task=task)
+def create_task(task: schemas.TaskCreate = Body(...), db: Session = Depends(get_board_db)):
+    with _target_errors():
+        return write(crud.create_task, db, task=task)
 
-@router.get("/boards/{board_id}/tasks", response_model=List[schemas.TaskOut], summary="Listar tareas por tablero")
-def list_tasks_by_board(board_id: int = Path(...), db: Session = Depends(get_db)):
-    return crud.list_tasks_by_board(db=db, board_id=board_id)
+def _rows(q) -> list:
+    return lean.rows(q, schemas.TaskOut)
+
+def _page(rows: list, limit: Optional[int], keys):
+    r = lean.json_response(rows, schemas.TaskOut)
+    set_next_cursor(r, rows, limit, keys)
+    return r
+
+@contextmanager
+def _target_errors():
+    # Destino de la escritura inexistente, borrado o de otro tablero (crud.InvalidTarget)
+    try:
+        yield
+    except crud.InvalidTarget as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+def _check_anchor(task_id: int, move: schemas.TaskMove):
+    # Sin esto, crud.move_task no distingue el vecino inválido de una tarea inexistente (404)
+    if task_id in (move.after_id, move.before_id):
+        raise HTTPException(status_code=400, detail="La tarea no puede ser su propio vecino")
+
+def _check_bulk_size(items: list):
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {settings.BULK_MAX_ITEMS} elementos por lote")
+
+# Rutas /tasks/bulk antes de /tasks/{task_id} para que no las capture el parámetro
+@router.post("/tasks/bulk", response_model=List[schemas.TaskBulkResult], summary="Crear tareas en lote")
+def bulk_create_tasks(items: List[schemas.TaskCreate] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(items)
+    return write(crud.bulk_create_tasks, db, items=items)
+
+@router.patch("/tasks/bulk", response_model=List[schemas.TaskBulkResult], summary="Actualizar tareas en lote")
+def bulk_update_tasks(items: List[schemas.TaskBulkUpdate] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(items)
+    return write(crud.bulk_update_tasks, db, items=items)
+
+@router.post("/tasks/bulk-move", response_model=List[schemas.TaskBulkResult], summary="Mover tareas en lote")
+def bulk_move_tasks(items: List[schemas.TaskBulkMove] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(items)
+    return write(crud.bulk_move_tasks, db, items=items)
+
+@router.delete("/tasks/bulk", response_model=List[schemas.BulkResult], summary="Eliminar tareas en lote")
+def bulk_delete_tasks(ids: List[int] = Body(...), db: Session = Depends(get_board_db)):
+    _check_bulk_size(ids)
+    return write(crud.bulk_delete_tasks, db, ids=ids)
+
+@router.get("/boards/{board_id}/tasks", response_model=List[schemas.TaskOut], summary="Listar tareas por tablero (y archivadas)")
+def list_tasks_by_board(
+    request: Request, board_id: int = Path(...),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+    db: Session = Depends(get_board_read_db),
+):
+    cursor = parse_cursor(after, 3)
+    if include_archived:
+        # Las archivadas siguen a las del listado normal, sin orden común con ellas: sin cursor
+        if cursor is not None or limit is not None:
+            raise HTTPException(status_code=400, detail="include_archived no admite limit ni after")
+        return archive.tasks_response(lambda s: crud.query_tasks_by_board(s, board_id), board_id, sharding.read_factory(db), wants_ndjson(request))
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_tasks_by_board(s, board_id, after=cursor, limit=limit), schemas.TaskOut, sessions=[sharding.read_factory(db)])
+    if cursor is None and limit is None:
+        version = crud.board_version(db=db, board_id=board_id)
+        if version is not None:
+            return cached_json(("tasks", board_id, version), lambda: lean.dicts(_rows(crud.query_tasks_by_board(db, board_id)), schemas.TaskOut))
+    rows = _rows(crud.query_tasks_by_board(db, board_id, after=cursor, limit=limit))
+    return _page(rows, limit, lambda t: (t.group_id, t.position, t.id))
+
+@router.get("/boards/{board_id}/tasks/search", response_model=List[schemas.TaskOut], summary="Buscar tareas del tablero")
+def search_tasks(
+    response: Response, board_id: int = Path(...), q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: Session = Depends(get_board_read_db),
+):
+    # Resultados por relevancia (bm25): el cursor es el desplazamiento dentro del ranking
+    offset = (parse_cursor(after, 1) or (0,))[0]
+    if crud.board_version(db=db, board_id=board_id) is None: raise HTTPException(status_code=404, detail="Tablero no encontrado")
+    rows = search.search_tasks(db, board_id, q, limit=limit, offset=offset)
+    set_next_cursor(response, rows, limit, lambda t: (offset + limit,))
+    return rows
 
 @router.get("/groups/{group_id}/tasks", response_model=List[schemas.TaskOut], summary="Listar tareas por grupo")
-def list_tasks_by_group(group_id: int = Path(...), db: Session = Depends(get_db)):
-    return crud.list_tasks_by_group(db=db, group_id=group_id)
+def list_tasks_by_group(
+    request: Request, group_id: int = Path(...),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT), after: Optional[str] = Query(None),
+    db: Session = Depends(get_board_read_db),
+):
+    cursor = parse_cursor(after, 2)
+    if wants_ndjson(request):
+        return ndjson_response(lambda s: crud.query_tasks_by_group(s, group_id, after=cursor, limit=limit), schemas.TaskOut, sessions=[sharding.read_factory(db)])
+    if cursor is None and limit is None:
+        board_version = crud.group_board_version(db=db, group_id=group_id)
+        if board_version is not None:
+            return cached_json(
+                ("group_tasks", *board_version, group_id), lambda: lean.dicts(_rows(crud.query_tasks_by_group(db, group_id)), schemas.TaskOut)
+            )
+    rows = _rows(crud.query_tasks_by_group(db, group_id, after=cursor, limit=limit))
+    return _page(rows, limit, lambda t: (t.position, t.id))
 
 @router.patch("/tasks/{task_id}", response_model=schemas.TaskOut, summary="Actualizar una tarea")
-def update_task(task_id: int = Path(...), payload: schemas.TaskUpdate = Body(...), db: Session = Depends(get_db)):
-    t = crud.update_task(db=db, task_id=task_id, payload=payload)
+def update_task(task_id: int = Path(...), payload: schemas.TaskUpdate = Body(...), db: Session = Depends(get_board_db)):
+    with _target_errors():
+        t = write(crud.update_task, db, task_id=task_id, payload=payload)
     if not t: raise HTTPException(status_code=404, detail="Tarea no encontrada")
     return t
 
 @router.post("/tasks/{task_id}/move", response_model=schemas.TaskOut, summary="Mover una tarea y reordenar")
-def move_task(task_id: int = Path(...), move: schemas.TaskMove = Body(...), db: Session = Depends(get_db)):
-    t = crud.move_task(db=db, task_id=task_id, move=move)
+def move_task(task_id: int = Path(...), move: schemas.TaskMove = Body(...), db: Session = Depends(get_board_db)):
+    _check_anchor(task_id, move)
+    with _target_errors():
+        t = write(crud.move_task, db, task_id=task_id, move=move)
     if not t: raise HTTPException(status_code=404, detail="Tarea no encontrada")
     return t
 
 @router.delete("/tasks/{task_id}", status_code=204, summary="Eliminar una tarea")
-def delete_task(task_id: int = Path(...), db: Session = Depends(get_db)):
-    ok = crud.delete_task(db=db, task_id=task_id)
+def delete_task(task_id: int = Path(...), db: Session = Depends(get_board_db)):
+    ok = write(crud.delete_task, db, task_id=task_id)
     if not ok: raise HTTPException(status_code=404, detail="Tarea no encontrada")
     return None
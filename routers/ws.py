@@ -0,0 +1,30 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from events import broker
+
+router = APIRouter()
+
+@router.websocket("/ws/boards/{board_id}")
+async def board_feed(websocket: WebSocket, board_id: int):
+    await websocket.accept()
+    sub = broker.subscribe(board_id)
+
+    async def pump():
+        while True:
+            await websocket.send_text(await sub.queue.get())
+
+    async def drain():
+        # Solo para detectar la desconexión del cliente
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for t in done:
+            # La desconexión del cliente es el final normal
+            if not isinstance(t.exception(), (WebSocketDisconnect, type(None))):
+                raise t.exception()
+    finally:
+        for t in tasks: t.cancel()
+        broker.unsubscribe(board_id, sub)
@@ -31,6 +31,8 @@ class BoardUpdate(BaseModel):
     name: Optional[str] = None
 class BoardOut(BoardBase):
     id: int
+    class Config:
+        orm_mode = True
 
 # --- Groups ---
 class GroupBase(BaseModel):
@@ -43,6 +45,8 @@ class GroupUpdate(BaseModel):
     position: Optional[int] = None
 class GroupOut(GroupBase):
     id: int
+    class Config:
+        orm_mode = True
 
 # --- Tasks ---
 class TaskBase(BaseModel):
@@ -52,7 +56,9 @@ class TaskBase(BaseModel):
     group_id: Optional[int] = None
     status_id: Optional[int] = None
     position: Optional[int] = 0
-class TaskCreate(TaskBase): pass
+class TaskCreate(TaskBase):
+    # Sin posición: al final del grupo
+    position: Optional[int] = None
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -64,8 +70,74 @@ class TaskMove(BaseModel):
     board_id: Optional[int] = None
     group_id: Optional[int] = None
     position: Optional[int] = None
+    # Vecinos destino: la tarea queda justo antes de before_id y/o justo después de after_id
+    # (con los dos, tienen que ser contiguos)
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
 class TaskOut(TaskBase):
     id: int
+    class Config:
+        orm_mode = True
+
+# --- Operaciones en lote ---
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+class TaskBulkMove(BaseModel):
+    id: int
+    board_id: Optional[int] = None
+    group_id: Optional[int] = None
+    # Sin posición: al final del grupo destino
+    position: Optional[int] = None
+class GroupBulkUpdate(GroupUpdate):
+    id: int
+class BulkResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+class TaskBulkResult(BulkResult):
+    task: Optional[TaskOut] = None
+class GroupBulkResult(BulkResult):
+    group: Optional[GroupOut] = None
+
+# --- Board completo (una sola lectura) ---
+class GroupFull(GroupOut):
+    tasks: List[TaskOut] = []
+class BoardFull(BoardOut):
+    groups: List[GroupFull] = []
+    # Tareas sin grupo
+    tasks: List[TaskOut] = []
+
+# --- Resumen de contadores ---
+class StatusCount(BaseModel):
+    status_id: Optional[int] = None
+    count: int
+class GroupSummary(BaseModel):
+    # None: tareas sin grupo
+    group_id: Optional[int] = None
+    count: int
+    statuses: List[StatusCount] = []
+class BoardSummary(BaseModel):
+    board_id: int
+    count: int
+    statuses: List[StatusCount] = []
+    groups: List[GroupSummary] = []
+
+# --- Sincronización incremental ---
+class BoardChanges(BaseModel):
+    # Versión a enviar como since en la siguiente llamada
+    version: int
+    # Solo si cambió el propio tablero (nombre)
+    board: Optional[BoardOut] = None
+    groups: List[GroupOut] = []
+    tasks: List[TaskOut] = []
+    deleted_groups: List[int] = []
+    deleted_tasks: List[int] = []
+
+class BoardImportResult(BaseModel):
+    board: BoardOut
+    groups: int
+    tasks: int
 
 # --- Users (lectura) ---
 class UserOut(BaseModel):
@@ -73,3 +145,5 @@ class UserOut(BaseModel):
     email: EmailStr
     is_verified: bool
     is_active: bool
+    class Config:
+        orm_mode = True
@@ -0,0 +1,107 @@
+# Búsqueda de tareas: índice FTS5 (título y descripción) mantenido por crud en la misma transacción.
+#   python search.py rebuild   # (re)construye el índice de una BD existente
+import argparse, re
+from typing import Iterable, List, Optional
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from database import IS_SQLITE, board_engines, engine
+import models
+
+# board es una columna más del índice ("b<id>"): el filtro por tablero se resuelve dentro de FTS
+_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, board, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+# Pesos bm25: título, descripción, tablero (no puntúa)
+_RANK = "bm25(tasks_fts, 10.0, 1.0, 0.0)"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_fts: Optional[bool] = None
+
+def fts_enabled() -> bool:
+    # Se comprueba en el primer uso, no al importar: el arranque no abre conexiones
+    global _fts
+    if _fts is None:
+        _fts = False
+        if IS_SQLITE:
+            with engine.connect() as conn:
+                try:
+                    conn.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x)")
+                    conn.exec_driver_sql("DROP TABLE temp.fts_probe")
+                    _fts = True
+                except Exception:
+                    pass
+    return _fts
+
+def ensure_index(conn) -> bool:
+    if fts_enabled():
+        conn.exec_driver_sql(_DDL)
+    return fts_enabled()
+
+def _row(t) -> dict:
+    get = t.get if isinstance(t, dict) else lambda k: getattr(t, k)
+    return {"id": get("id"), "title": get("title"), "description": get("description") or "", "board": f"b{get('board_id')}"}
+
+def index_tasks(db: Session, tasks: Iterable):
+    # Upsert: FTS5 no tiene ON CONFLICT, se borra y se vuelve a insertar por rowid
+    if not fts_enabled(): return
+    rows = [_row(t) for t in tasks]
+    if not rows: return
+    unindex_tasks(db, [r["id"] for r in rows])
+    db.execute(text("INSERT INTO tasks_fts(rowid, title, description, board) VALUES (:id, :title, :description, :board)"), rows)
+
+def unindex_tasks(db: Session, ids: List[int]):
+    if not fts_enabled() or not ids: return
+    db.execute(text("DELETE FROM tasks_fts WHERE rowid = :id"), [{"id": i} for i in ids])
+
+_FROM_TASKS = (
+    "INSERT INTO tasks_fts(rowid, title, description, board) "
+    "SELECT id, title, coalesce(description, ''), 'b' || board_id FROM tasks"
+)
+
+def index_board(db: Session, board_id: int, from_id: int = 0):
+    # Por conjuntos: filas nuevas (id >= from_id) insertadas sin pasar por index_tasks
+    if not fts_enabled(): return
+    db.execute(text(f"{_FROM_TASKS} WHERE board_id = :b AND id >= :f"), {"b": board_id, "f": from_id})
+
+def rebuild(conn) -> int:
+    ensure_index(conn)
+    conn.exec_driver_sql("DELETE FROM tasks_fts")
+    conn.exec_driver_sql(_FROM_TASKS)
+    conn.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('optimize')")
+    return conn.exec_driver_sql("SELECT count(*) FROM tasks_fts").scalar()
+
+def match_expression(q: str) -> Optional[str]:
+    # Cada palabra entre comillas (sin sintaxis FTS del usuario) y como prefijo; todas obligatorias
+    terms = _TERM.findall(q)
+    return " ".join(f'"{t}"*' for t in terms) if terms else None
+
+def search_tasks(db: Session, board_id: int, q: str, limit: int, offset: int = 0):
+    expr = match_expression(q)
+    if expr is None: return []
+    if not fts_enabled():
+        return _search_like(db, board_id, _TERM.findall(q), limit, offset)
+    ids = db.execute(
+        text(f"SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH :m ORDER BY {_RANK}, rowid LIMIT :limit OFFSET :offset"),
+        {"m": f'board:"b{board_id}" AND {{title description}}: ({expr})', "limit": limit, "offset": offset},
+    ).scalars().all()
+    by_id = {t.id: t for t in db.query(models.Task).filter(models.Task.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+def _search_like(db: Session, board_id: int, terms: List[str], limit: int, offset: int = 0):
+    # Sin FTS5 (otros motores): recorrido LIKE, sin ranking
+    T = models.Task
+    q = db.query(T).filter(T.board_id == board_id)
+    for term in terms:
+        q = q.filter(or_(T.title.ilike(f"%{term}%"), T.description.ilike(f"%{term}%")))
+    return q.order_by(T.id.asc()).limit(limit).offset(offset).all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de búsqueda de tareas")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    if not fts_enabled(): raise SystemExit("FTS5 no disponible en esta base de datos")
+    # En modo shard, cada shard tiene su índice
+    for e in board_engines():
+        with e.begin() as conn:
+            print(f"{e.url}: {rebuild(conn)} tareas indexadas")
@@ -1,20 +1,123 @@
 from datetime import datetime, timedelta, timezone
-from typing import Tuple
-import uuid, re, jwt
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+import asyncio, os, threading, uuid, re, anyio, jwt
 from passlib.context import CryptContext
 from fastapi import Response
 from settings import settings
 
 SECRET_KEY = settings.SECRET_KEY
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds: los hashes con menos coste se marcan needs_update y se rehashean en el login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS, bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
-def hash_password(password: str) -> str:
+class HashingBusy(Exception):
+    """El pool de hashing está saturado (o se ha roto dos veces seguidas): el llamador debe responder 503."""
+
+# bcrypt fuera del threadpool de anyio: procesos dedicados y cola acotada
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_workers = settings.HASH_POOL_WORKERS or os.cpu_count() or 1
+_slots = threading.BoundedSemaphore(_workers + settings.HASH_QUEUE_SIZE)
+
+def _init_worker():
+    # Menor prioridad de CPU: el hashing no le quita núcleo a las peticiones normales
+    if hasattr(os, "nice"):
+        os.nice(settings.HASH_POOL_NICE)
+    pwd_context.handler().get_backend()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_workers, initializer=_init_worker)
+        return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # Un proceso murió: el pool queda roto para siempre; el siguiente _get_pool crea otro
+    global _pool
+    with _pool_lock:
+        if _pool is pool: _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit(pool: ProcessPoolExecutor, fn, *args) -> Future:
+    # Sin hueco en la cola se rechaza al instante en lugar de encolar sin límite
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        fut = pool.submit(fn, *args)
+    except Exception:
+        _slots.release(); raise
+    fut.add_done_callback(lambda _: _slots.release())
+    return fut
+
+def _run(fn, *args):
+    if not settings.HASH_POOL_ENABLED:
+        return fn(*args)
+    # Pool roto (BrokenProcessPool): un reintento con uno nuevo; si vuelve a romperse, 503
+    for retry in (True, False):
+        pool = _get_pool()
+        try:
+            return _submit(pool, fn, *args).result()
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if not retry: raise HashingBusy()
+
+async def _run_async(fn, *args):
+    # Rutas async: se espera el proceso sin ocupar un hilo; sin pool, bcrypt va al threadpool
+    if not settings.HASH_POOL_ENABLED:
+        return await anyio.to_thread.run_sync(fn, *args)
+    for retry in (True, False):
+        pool = _get_pool()
+        try:
+            return await asyncio.wrap_future(_submit(pool, fn, *args))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if not retry: raise HashingBusy()
+
+def prewarm_hashing():
+    # Carga el backend bcrypt (y su autotest de passlib) ya en el arranque; con pool, arranca los procesos
+    pwd_context.handler().get_backend()
+    if settings.HASH_POOL_ENABLED:
+        pool = _get_pool()
+        for f in [pool.submit(os.getpid) for _ in range(_workers)]: f.result()
+
+def shutdown_hash_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
+def _verify(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+def verify_password(password: str, hashed: str) -> bool:
+    return _run(_verify, password, hashed)
+
+def verify_and_update_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    # Devuelve un hash nuevo si el actual usa parámetros obsoletos (needs_update)
+    return _run(_verify_and_update, password, hashed)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_async(_hash, password)
+
+async def verify_and_update_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await _run_async(_verify_and_update, password, hashed)
+
 def _token_payload(sub: str, jti: str, scope: str, expires_delta: timedelta):
     now = datetime.now(timezone.utc)
     exp = now + expires_delta
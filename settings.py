@@ -1,6 +1,6 @@
 from pydantic import BaseSettings
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # JWT
@@ -16,8 +16,115 @@ class Settings(BaseSettings):
     # Seguridad
     MAX_FAILED_LOGINS: int = 5
     LOCKOUT_MINUTES: int = 15
+    LOGIN_FAILURE_WINDOW_MINUTES: int = 15
+    # memory: por proceso | sqlite: tabla login_failures compartida por todos los workers
+    LOGIN_THROTTLE_BACKEND: str = "memory"
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
     PASSWORD_MIN_LENGTH: int = 8
+
+    # Hashing (bcrypt en procesos aparte, 0 = un proceso por núcleo)
+    HASH_POOL_ENABLED: bool = True
+    HASH_POOL_WORKERS: int = 0
+    HASH_QUEUE_SIZE: int = 16
+    HASH_POOL_NICE: int = 10
+    BCRYPT_ROUNDS: int = 12
+
+    # Caché del usuario autenticado
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+
+    # Listados
+    PAGE_MAX_LIMIT: int = 1000
+    NDJSON_BATCH_SIZE: int = 500
+    BULK_MAX_ITEMS: int = 5000
+    # Importación NDJSON: filas por transacción y tamaño máximo de una línea
+    IMPORT_CHUNK_SIZE: int = 5000
+    IMPORT_MAX_LINE_BYTES: int = 1048576
+
+    # Caché de listados por versión de tablero
+    LIST_CACHE_ENABLED: bool = True
+    LIST_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LIST_CACHE_MAX_ENTRIES: int = 10000
+
+    # Sincronización incremental: versiones de cada tablero que se conservan en el registro de
+    # cambios y objetos por respuesta (más allá, el cliente recarga el tablero completo)
+    CHANGES_RETENTION_VERSIONS: int = 10000
+    CHANGES_MAX_ROWS: int = 5000
+
+    # WebSocket: mensajes pendientes por cliente antes de pedirle resincronizar
+    WS_QUEUE_SIZE: int = 256
     
+    # Purga en segundo plano de tableros y grupos borrados: filas por lote, pausa entre lotes y sondeo
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_PAUSE_MS: float = 10
+    PURGE_INTERVAL_SECONDS: float = 30
+
+    # Archivo de tareas terminadas: las de ARCHIVE_STATUS_IDS (JSON, p.ej. [4,5]; vacío = cualquier
+    # estado) sin cambios en ARCHIVE_AFTER_DAYS días pasan a task_archive en bloques comprimidos
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_STATUS_IDS: List[int] = []
+    ARCHIVE_AFTER_DAYS: float = 30
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_PAUSE_MS: float = 10
+    ARCHIVE_INTERVAL_SECONDS: float = 3600
+
+    # Arranque: migraciones pendientes en el lifespan y precalentado (conexiones por pool, bcrypt)
+    MIGRATE_ON_STARTUP: bool = True
+    PREWARM_ENABLED: bool = True
+    DB_PREWARM_CONNECTIONS: int = 2
+
+    # Group-commit: un escritor agrupa mutaciones concurrentes en una sola transacción
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_MS: float = 2
+    GROUP_COMMIT_MAX_BATCH: int = 64
+
+    # Límites de ritmo (token bucket): peticiones por segundo y ráfaga por usuario autenticado y por IP
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_PER_SECOND: float = 20
+    RATE_LIMIT_USER_BURST: int = 40
+    RATE_LIMIT_IP_PER_SECOND: float = 50
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100000
+
+    # Control de admisión: peticiones en curso por clase de ruta (su suma, por debajo de los 40 hilos
+    # del threadpool), cola por clase y espera máxima en ella antes de responder 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_AUTH_CONCURRENCY: int = 4
+    ADMISSION_READ_CONCURRENCY: int = 24
+    ADMISSION_WRITE_CONCURRENCY: int = 8
+    ADMISSION_QUEUE_DEPTH: int = 64
+    # Peticiones en curso o en cola de un mismo cliente (usuario o IP)
+    ADMISSION_MAX_PER_CLIENT: int = 16
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Métricas por petición (Server-Timing y /metrics)
+    METRICS_ENABLED: bool = True
+    N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Base de datos: pool y perfil SQLite (se aplica al abrir cada conexión)
+    DB_POOL_SIZE: int = 10
+    DB_READ_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    SQLITE_PRAGMAS_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Negativo = KiB (64 MiB)
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+
+    # Modo shard: tableros (con sus grupos y tareas) repartidos en SHARD_COUNT ficheros SQLite; la
+    # principal guarda usuarios y el catálogo tablero -> shard. 0 = todo en DATABASE_URL.
+    # Plantilla de URL con {n} (1..SHARD_COUNT); vacía = DATABASE_URL con sufijo -shard{n}
+    SHARD_COUNT: int = 0
+    SHARD_URL_TEMPLATE: str = ""
+
+    # Rutas async (routers/aio): AsyncSession sobre aiosqlite en lugar de sesiones síncronas en el
+    # threadpool; mismas rutas, mismos contratos
+    ASYNC_ROUTES_ENABLED: bool = False
+
     #.env
     DATABASE_URL: str
     SECRET_KEY: str
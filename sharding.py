@@ -0,0 +1,319 @@
+# Modo shard (SHARD_COUNT > 0): cada tablero vive con sus grupos, tareas, contadores, índice de búsqueda
+# y registro de cambios en uno de N ficheros SQLite (database.SHARDS). Cada fichero tiene su propio
+# bloqueo de escritura: los escritores de tableros de shards distintos no se esperan entre sí.
+# La BD principal guarda usuarios y el catálogo board_shards (tablero -> shard). Los ids de grupos y
+# tareas llevan su shard en los bits altos (n << ID_BITS, repartidos por new_ids), así /tasks/{id} no
+# consulta el catálogo salvo para filas de tableros movidos (moved_rows).
+#   python sharding.py status
+#   python sharding.py move <board_id> <shard>   # rebalanceo: copia el tablero y purga el origen
+import argparse, asyncio, json
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as upsert
+from sqlalchemy.orm import Session, sessionmaker
+from database import SHARDS, AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal, async_engine, engine
+from settings import settings
+import counters, models, search
+
+# 2^40 ids de grupos y de tareas por shard; con hasta 8191 shards los ids caben en 2^53 (JSON/JS)
+ID_BITS = 40
+BS, MR = models.BoardShard.__table__, models.MovedRow.__table__
+B, G, T, C = models.Board.__table__, models.Group.__table__, models.Task.__table__, models.BoardChange.__table__
+A = models.TaskArchive.__table__
+# Primer segmento de la ruta -> tipo del id de la ruta y de los "id" del cuerpo
+_KINDS = {"boards": "board", "groups": "group", "tasks": "task"}
+_BODY_KEYS = (("board_id", "board"), ("group_id", "group"), ("before_id", "task"), ("after_id", "task"))
+
+def enabled() -> bool:
+    return bool(SHARDS)
+
+def prepare(conn, n: int):
+    # Secuencias de grupos y tareas del shard n, al inicio de su rango (o tras el último id propio)
+    models.ShardSequence.__table__.create(conn, checkfirst=True)
+    floor, ceil = n << ID_BITS, (n + 1) << ID_BITS
+    for table in ("groups", "tasks"):
+        conn.execute(
+            text(
+                f"INSERT INTO shard_sequences (name, next) SELECT :t, coalesce(max(id) + 1, :floor) FROM {table} "
+                "WHERE id >= :floor AND id < :ceil ON CONFLICT (name) DO NOTHING"
+            ),
+            {"t": table, "floor": floor, "ceil": ceil},
+        )
+
+def new_ids(db: Session, table: str, n: int) -> Optional[list]:
+    # Ids de grupos o tareas para n filas nuevas; None para los grupos sin modo shard (los pone la BD).
+    # No se deja a SQLite (max(rowid) + 1): las filas de un tablero movido traen ids de otro rango y
+    # las tareas archivadas ya no están en tasks. En la misma transacción que el INSERT: si se
+    # deshace, la secuencia también
+    if not n: return None
+    if db.info.get("shard") is not None:
+        end = db.scalar(text("UPDATE shard_sequences SET next = next + :n WHERE name = :t RETURNING next"), {"n": n, "t": table})
+    elif table == "tasks":
+        # Por encima de tasks y del archivo aunque alguien haya insertado sin pasar por aquí (seed, import antiguo)
+        end = db.scalar(text(
+            "INSERT INTO shard_sequences (name, next) SELECT 'tasks', max("
+            "coalesce((SELECT max(id) FROM tasks), 0), coalesce((SELECT max(max_id) FROM task_archive), 0)) + 1 + :n "
+            "WHERE true ON CONFLICT (name) DO UPDATE SET next = max(next, excluded.next - :n) + :n RETURNING next"
+        ), {"n": n})
+    else:
+        return None
+    return list(range(end - n, end))
+
+# -------------------------
+# Catálogo (BD principal)
+# -------------------------
+def _assign(conn) -> tuple:
+    # Tablero nuevo: el id sale del catálogo y el shard va por turno; el rebalanceo corrige desequilibrios
+    board_id = conn.scalar(insert(BS).values(shard=0).returning(BS.c.board_id))
+    shard = (board_id - 1) % len(SHARDS) + 1
+    conn.execute(update(BS).where(BS.c.board_id == board_id).values(shard=shard))
+    return board_id, shard
+
+def assign() -> tuple:
+    with engine.begin() as conn:
+        return _assign(conn)
+
+def board_shard(board_id: int) -> Optional[int]:
+    with engine.connect() as conn:
+        return conn.scalar(select(BS.c.shard).where(BS.c.board_id == board_id))
+
+def _lookup(conn, hints: Iterable) -> Optional[int]:
+    # Shard de los (tipo, id) de una petición; None si ninguno existe. Sin caché: tras un move, la
+    # siguiente petición de cualquier worker ya lee el shard nuevo
+    boards, rows = set(), {}
+    for kind, i in hints:
+        if kind == "board": boards.add(i)
+        else: rows.setdefault(kind, set()).add(i)
+    found = set()
+    if boards: found.update(conn.scalars(select(BS.c.shard).where(BS.c.board_id.in_(boards))))
+    for kind, ids in rows.items():
+        moved = dict(conn.execute(select(MR.c.row_id, MR.c.shard).where(MR.c.kind == kind, MR.c.row_id.in_(ids))).all())
+        found.update(moved.values())
+        found.update(i >> ID_BITS for i in ids if i not in moved)
+    found &= SHARDS.keys()
+    if len(found) > 1:
+        raise HTTPException(status_code=400, detail="La operación abarca tableros de shards distintos")
+    return next(iter(found), None)
+
+def resolve(hints: Iterable) -> Optional[int]:
+    with engine.connect() as conn:
+        return _lookup(conn, hints)
+
+async def resolve_async(hints: Iterable) -> Optional[int]:
+    async with async_engine.connect() as conn:
+        return await conn.run_sync(_lookup, hints)
+
+def forget_board(board_id: int, shard: int):
+    # Purga terminada en el shard que figura en el catálogo (no en el origen de un move): fuera del catálogo
+    with engine.begin() as conn:
+        conn.execute(delete(BS).where(BS.c.board_id == board_id, BS.c.shard == shard))
+
+# -------------------------
+# Sesiones por petición
+# -------------------------
+def _body_hints(data, kind: str) -> list:
+    out = []
+    for item in data if isinstance(data, list) else [data]:
+        if isinstance(item, int):
+            out.append((kind, item))
+        elif isinstance(item, dict):
+            out += [(k, item[key]) for key, k in (("id", kind), *_BODY_KEYS) if isinstance(item.get(key), int)]
+    return out
+
+async def _hints(request: Request) -> list:
+    # (tipo, id) de tableros, grupos y tareas de la ruta y del cuerpo JSON. Asíncrona para leer el
+    # cuerpo, que FastAPI ya ha leído y guardado al validar los parámetros
+    if not SHARDS: return []
+    kind = _KINDS.get(request.url.path.split("/")[1], "board")
+    hints = [(name[:-3], int(v)) for name, v in request.path_params.items() if name[:-3] in _KINDS.values() and str(v).isdigit()]
+    body = await request.body()
+    if body:
+        try:
+            hints += _body_hints(json.loads(body), kind)
+        except ValueError:
+            pass  # la validación de la ruta responde 422
+    return hints
+
+def _factory(hints: list, read: bool) -> sessionmaker:
+    if not SHARDS: return ReadSessionLocal if read else SessionLocal
+    # Nada de la petición existe: cualquier shard sirve, crud responde 404
+    shard = SHARDS[resolve(hints) or 1]
+    return shard.ReadSessionLocal if read else shard.SessionLocal
+
+def get_board_db(hints: list = Depends(_hints)):
+    db = _factory(hints, read=False)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_board_read_db(hints: list = Depends(_hints)):
+    db = _factory(hints, read=True)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def new_board() -> tuple:
+    # (id, fábrica de sesiones) de un tablero por crear; sin modo shard el id lo pone la BD
+    if not SHARDS: return None, SessionLocal
+    board_id, n = assign()
+    return board_id, SHARDS[n].SessionLocal
+
+def get_new_board_db():
+    board_id, factory = new_board()
+    db = factory(info={"board_id": board_id})
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Variantes para las rutas async (routers/aio): AsyncSession del mismo shard
+async def _async_factory(hints: list, read: bool):
+    if not SHARDS: return AsyncReadSessionLocal if read else AsyncSessionLocal
+    shard = SHARDS[await resolve_async(hints) or 1]
+    return shard.AsyncReadSessionLocal if read else shard.AsyncSessionLocal
+
+async def get_async_board_db(hints: list = Depends(_hints)):
+    async with (await _async_factory(hints, read=False))() as db:
+        yield db
+
+async def get_async_board_read_db(hints: list = Depends(_hints)):
+    async with (await _async_factory(hints, read=True))() as db:
+        yield db
+
+async def get_async_new_board_db():
+    board_id, factory = None, AsyncSessionLocal
+    if SHARDS:
+        async with async_engine.begin() as conn:
+            board_id, n = await conn.run_sync(_assign)
+        factory = SHARDS[n].AsyncSessionLocal
+    async with factory(info={"board_id": board_id}) as db:
+        yield db
+
+def read_factory(db: Session) -> sessionmaker:
+    # Para lecturas en streaming, que abren su propia sesión: la misma BD que la de la petición
+    n = db.info.get("shard")
+    return ReadSessionLocal if n is None else SHARDS[n].ReadSessionLocal
+
+def read_factories() -> list:
+    return [s.ReadSessionLocal for s in SHARDS.values()] or [ReadSessionLocal]
+
+def write_factories() -> list:
+    return [s.SessionLocal for s in SHARDS.values()] or [SessionLocal]
+
+def gather(db: Session, fn: Callable, key: Callable, limit: Optional[int] = None) -> list:
+    # Listados globales: la misma consulta en cada shard, mezclada por key y recortada a limit
+    if not SHARDS: return fn(db)
+    rows = []
+    for factory in read_factories():
+        with factory() as s:
+            rows += fn(s)
+    rows.sort(key=key)
+    return rows[:limit] if limit else rows
+
+async def gather_async(db, fn: Callable, key: Callable, limit: Optional[int] = None) -> list:
+    # gather() con AsyncSession: fn (síncrona) corre en cada shard con run_sync, todos a la vez
+    if not SHARDS: return await db.run_sync(fn)
+    async def one(shard):
+        async with shard.AsyncReadSessionLocal() as s:
+            return await s.run_sync(fn)
+    rows = [r for part in await asyncio.gather(*(one(s) for s in SHARDS.values())) for r in part]
+    rows.sort(key=key)
+    return rows[:limit] if limit else rows
+
+# -------------------------
+# Rebalanceo
+# -------------------------
+def _forward(conn, kind: str, ids: list, target: int):
+    # Los ids del rango del destino vuelven a resolverse por sus bits; el resto apunta al destino
+    native = [i for i in ids if i >> ID_BITS == target]
+    if native: conn.execute(delete(MR).where(MR.c.kind == kind, MR.c.row_id.in_(native)))
+    rows = [{"kind": kind, "row_id": i, "shard": target} for i in ids if i >> ID_BITS != target]
+    if rows:
+        stmt = upsert(MR)
+        conn.execute(stmt.on_conflict_do_update(index_elements=["kind", "row_id"], set_={"shard": stmt.excluded.shard}), rows)
+
+def move_board(board_id: int, target: int) -> dict:
+    # Copia el tablero al shard target, cambia el catálogo y marca el origen como borrado (purge.py
+    # elimina sus filas). Durante la copia el origen tiene tomado el bloqueo de escritura: las
+    # escrituras de ese shard esperan (busy_timeout) y las que apuntaban al tablero acaban en 404
+    if target not in SHARDS: raise ValueError(f"El shard {target} no existe")
+    source = board_shard(board_id)
+    if source is None: raise ValueError(f"Tablero {board_id} fuera del catálogo")
+    counts = {"groups": 0, "tasks": 0, "archived": 0, "changes": 0}
+    if source == target: return counts
+    chunk = settings.IMPORT_CHUNK_SIZE
+    with SHARDS[source].engine.begin() as src:
+        marked = src.execute(
+            update(B).where(B.c.id == board_id, B.c.deleted_at.is_(None)).values(deleted_at=datetime.now(timezone.utc))
+        )
+        if not marked.rowcount: raise ValueError(f"Tablero {board_id} borrado")
+        ids = {"group": [], "task": []}
+        with SHARDS[target].engine.begin() as dst:
+            board = src.execute(select(B).where(B.c.id == board_id)).mappings().one()
+            dst.execute(insert(B), {**board, "deleted_at": None})
+            # El registro de cambios y el archivo conservan su orden; sus ids son internos y se renumeran.
+            # Las tareas archivadas no se redirigen: no se editan y solo se leen por tablero
+            log_columns = [c for c in C.c if c.name != "id"]
+            archive_columns = [c for c in A.c if c.name != "id"]
+            for name, kind, table, q, size in (
+                ("groups", "group", G, select(G).where(G.c.board_id == board_id), chunk),
+                ("tasks", "task", T, select(T).where(T.c.board_id == board_id), chunk),
+                ("archived", None, A, select(*archive_columns).where(A.c.board_id == board_id).order_by(A.c.id), max(1, chunk // settings.ARCHIVE_BATCH_SIZE)),
+                ("changes", None, C, select(*log_columns).where(C.c.board_id == board_id).order_by(C.c.id), chunk),
+            ):
+                for part in src.execute(q).mappings().partitions(size):
+                    dst.execute(insert(table), [dict(r) for r in part])
+                    if kind: ids[kind] += [r["id"] for r in part]
+                    counts[name] += sum(r["count"] for r in part) if table is A else len(part)
+            search.index_board(dst, board_id)
+            counters.add_board(dst, board_id)
+        try:
+            with engine.begin() as conn:
+                conn.execute(update(BS).where(BS.c.board_id == board_id).values(shard=target))
+                for kind, kind_ids in ids.items():
+                    for i in range(0, len(kind_ids), chunk):
+                        _forward(conn, kind, kind_ids[i:i + chunk], target)
+        except Exception:
+            # El origen sigue siendo el bueno (su marca se deshace): la copia se purga en el destino
+            with SHARDS[target].engine.begin() as dst:
+                dst.execute(update(B).where(B.c.id == board_id).values(deleted_at=datetime.now(timezone.utc)))
+            raise
+    return counts
+
+def status() -> list:
+    # [(shard, tableros en el catálogo, tareas)]
+    with engine.connect() as conn:
+        boards = dict(conn.execute(select(BS.c.shard, func.count()).group_by(BS.c.shard)).all())
+    out = []
+    for n, shard in SHARDS.items():
+        with shard.engine.connect() as conn:
+            # Sin los tableros pendientes de purga (el origen de un move, entre ellos)
+            TC = models.TaskCount.__table__
+            live = TC.join(B, (B.c.id == TC.c.board_id) & B.c.deleted_at.is_(None))
+            tasks = conn.scalar(select(func.coalesce(func.sum(TC.c.count), 0)).select_from(live))
+        out.append((n, boards.get(n, 0), tasks))
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tableros repartidos en shards")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    move = sub.add_parser("move", help="mueve un tablero a otro shard")
+    move.add_argument("board_id", type=int)
+    move.add_argument("shard", type=int)
+    args = parser.parse_args()
+    if not SHARDS: raise SystemExit("Modo shard desactivado (SHARD_COUNT=0)")
+    if args.command == "status":
+        for n, boards, tasks in status():
+            print(f"shard {n}: {boards} tableros, {tasks} tareas")
+    else:
+        try:
+            counts = move_board(args.board_id, args.shard)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"tablero {args.board_id} -> shard {args.shard}: {counts['groups']} grupos, {counts['tasks']} tareas, "
+              f"{counts['archived']} archivadas, {counts['changes']} cambios")
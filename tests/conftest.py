@@ -0,0 +1,28 @@
+# BD SQLite temporal: el entorno se fija antes de importar settings (se lee al importar)
+import os, sys, tempfile
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("SECRET_KEY", "x" * 32)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+import main
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as c:
+        yield c
+
+def ok(r, status_code=200):
+    assert r.status_code == status_code, r.text
+    return r.json() if r.content else None
+
+@pytest.fixture
+def board(client):
+    # Tablero con un grupo y tres tareas en posiciones 0, 1024, 2048
+    b = ok(client.post("/boards/", json={"name": "b"}))
+    g = ok(client.post("/groups/", json={"name": "g", "board_id": b["id"]}))
+    tasks = [ok(client.post("/tasks/", json={"title": f"t{i}", "board_id": b["id"], "group_id": g["id"]})) for i in range(3)]
+    return {"id": b["id"], "group_id": g["id"], "tasks": tasks}
@@ -0,0 +1,28 @@
+import pytest
+from conftest import ok
+
+@pytest.mark.parametrize("header, status_code", [
+    ("{etag}", 304),
+    ("W/{etag}", 304),
+    ('"otra", {etag}', 304),
+    ('"otra",W/{etag} ', 304),
+    ("*", 304),
+    ('"otra"', 200),
+    ("{etag_prefix}", 200),
+    ("{etag}x", 200),
+])
+def test_board_full_if_none_match(client, board, header, status_code):
+    etag = client.get(f"/boards/{board['id']}/full").headers["etag"]
+    header = header.format(etag=etag, etag_prefix=etag[:-2] + '"')
+    r = client.get(f"/boards/{board['id']}/full", headers={"if-none-match": header})
+    assert r.status_code == status_code
+    assert r.headers["etag"] == etag
+
+def test_cached_list_same_bytes_as_uncached(client, board):
+    ok(client.patch(f"/tasks/{board['tasks'][0]['id']}", json={"title": "Revisión de diseño ñandú"}))
+    cached = client.get(f"/boards/{board['id']}/tasks")
+    uncached = client.get(f"/boards/{board['id']}/tasks", params={"limit": 1000})
+    assert cached.content == uncached.content
+    assert "Revisión de diseño ñandú".encode() in cached.content
+    groups = client.get(f"/groups/{board['group_id']}/tasks")
+    assert groups.content == client.get(f"/groups/{board['group_id']}/tasks", params={"limit": 1000}).content
@@ -0,0 +1,43 @@
+import pytest
+import crud, schemas
+from conftest import ok
+from database import SessionLocal
+from groupcommit import GroupCommitter
+
+def _version(board_id):
+    with SessionLocal() as db:
+        return crud.board_version(db, board_id)
+
+def test_rejected_write_leaves_version(client, board):
+    # Ventana larga: las tres mutaciones van en el mismo lote
+    committer = GroupCommitter(window_ms=200, max_batch=8)
+    before = _version(board["id"])
+    def not_found(db):
+        crud._touch_board(db, board["id"])
+        return None
+    try:
+        futures = [
+            committer.enqueue(not_found),
+            committer.enqueue(crud.create_task, task=schemas.TaskCreate(title="x", board_id=board["id"], group_id=10**9)),
+            committer.enqueue(crud.update_board, board_id=10**9, payload=schemas.BoardUpdate(name="x")),
+        ]
+        assert futures[0].result() is None
+        with pytest.raises(crud.InvalidTarget):
+            futures[1].result()
+        assert futures[2].result() is None
+        assert committer.batches == 1
+    finally:
+        committer.stop()
+    assert _version(board["id"]) == before
+
+def test_batch_commits_the_rest(client, board):
+    committer = GroupCommitter(window_ms=200, max_batch=8)
+    before = _version(board["id"])
+    try:
+        rejected = committer.enqueue(lambda db: crud._touch_board(db, board["id"]))
+        created = committer.enqueue(crud.create_task, task=schemas.TaskCreate(title="y", board_id=board["id"]))
+        assert rejected.result() is None and created.result().title == "y"
+    finally:
+        committer.stop()
+    assert _version(board["id"]) == before + 1
+    assert "y" in [t["title"] for t in ok(client.get(f"/boards/{board['id']}/tasks"))]
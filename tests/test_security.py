@@ -0,0 +1,22 @@
+import asyncio
+import security
+
+def _kill_workers():
+    pool = security._get_pool()
+    pool.submit(int).result()  # arranca los procesos
+    for p in list(pool._processes.values()): p.kill()
+    return pool
+
+def test_hash_survives_dead_worker(monkeypatch):
+    monkeypatch.setattr(security.settings, "HASH_POOL_ENABLED", True)
+    broken = _kill_workers()
+    hashed = security.hash_password("Passw0rd!x")
+    assert security.verify_password("Passw0rd!x", hashed)
+    assert security._get_pool() is not broken
+
+def test_hash_async_survives_dead_worker(monkeypatch):
+    monkeypatch.setattr(security.settings, "HASH_POOL_ENABLED", True)
+    broken = _kill_workers()
+    hashed = asyncio.run(security.hash_password_async("Passw0rd!x"))
+    assert asyncio.run(security.verify_and_update_password_async("Passw0rd!x", hashed))[0]
+    assert security._get_pool() is not broken
@@ -0,0 +1,80 @@
+import pytest
+from conftest import ok
+
+def _other_board(client):
+    b = ok(client.post("/boards/", json={"name": "otro"}))
+    g = ok(client.post("/groups/", json={"name": "g", "board_id": b["id"]}))
+    return b["id"], g["id"]
+
+def _version(client, board_id):
+    return client.get(f"/boards/{board_id}/full").headers["etag"]
+
+@pytest.mark.parametrize("method, path", [("PATCH", "/tasks/{}"), ("POST", "/tasks/{}/move")])
+def test_target_board_soft_deleted(client, board, method, path):
+    task = board["tasks"][0]
+    other, _ = _other_board(client)
+    ok(client.delete(f"/boards/{other}"), 204)
+    r = client.request(method, path.format(task["id"]), json={"board_id": other, "group_id": None})
+    assert r.status_code == 404 and r.json()["detail"] == "Tablero no encontrado"
+
+@pytest.mark.parametrize("method, path", [("PATCH", "/tasks/{}"), ("POST", "/tasks/{}/move")])
+@pytest.mark.parametrize("body, detail", [
+    ({"board_id": 10**9}, "Tablero no encontrado"),
+    ({"group_id": 10**9}, "Grupo no encontrado"),
+])
+def test_target_missing(client, board, method, path, body, detail):
+    version = _version(client, board["id"])
+    r = client.request(method, path.format(board["tasks"][0]["id"]), json=body)
+    assert r.status_code == 404 and r.json()["detail"] == detail
+    assert _version(client, board["id"]) == version
+
+@pytest.mark.parametrize("method, path", [("PATCH", "/tasks/{}"), ("POST", "/tasks/{}/move")])
+def test_target_group_soft_deleted(client, board, method, path):
+    g = ok(client.post("/groups/", json={"name": "g2", "board_id": board["id"]}))
+    ok(client.delete(f"/groups/{g['id']}"), 204)
+    r = client.request(method, path.format(board["tasks"][0]["id"]), json={"group_id": g["id"]})
+    assert r.status_code == 404 and r.json()["detail"] == "Grupo no encontrado"
+
+@pytest.mark.parametrize("method, path", [("PATCH", "/tasks/{}"), ("POST", "/tasks/{}/move")])
+def test_target_group_of_another_board(client, board, method, path):
+    other, other_group = _other_board(client)
+    task = board["tasks"][0]
+    # El grupo actual se queda al cambiar solo de tablero
+    r = client.request(method, path.format(task["id"]), json={"board_id": other})
+    assert r.status_code == 400 and r.json()["detail"] == "El grupo no pertenece al tablero"
+    r = client.request(method, path.format(task["id"]), json={"board_id": board["id"], "group_id": other_group})
+    assert r.status_code == 400
+    moved = ok(client.request(method, path.format(task["id"]), json={"board_id": other, "group_id": None}))
+    assert (moved["board_id"], moved["group_id"]) == (other, None)
+
+def test_move_to_group_takes_its_board(client, board):
+    other, other_group = _other_board(client)
+    moved = ok(client.post(f"/tasks/{board['tasks'][0]['id']}/move", json={"group_id": other_group}))
+    assert (moved["board_id"], moved["group_id"]) == (other, other_group)
+
+def test_move_between_both_anchors(client, board):
+    a, b, c = board["tasks"]
+    moved = ok(client.post(f"/tasks/{c['id']}/move", json={"after_id": a["id"], "before_id": b["id"]}))
+    assert a["position"] < moved["position"] < b["position"]
+    ids = [t["id"] for t in ok(client.get(f"/groups/{board['group_id']}/tasks"))]
+    assert ids == [a["id"], c["id"], b["id"]]
+
+def test_move_rejects_non_adjacent_anchors(client, board):
+    a, b, c = board["tasks"]
+    r = client.post(f"/tasks/{b['id']}/move", json={"after_id": c["id"], "before_id": a["id"]})
+    assert r.status_code == 400
+    # Contiguos sin contar la tarea movida: a y c rodean a b
+    ok(client.post(f"/tasks/{b['id']}/move", json={"after_id": a["id"], "before_id": c["id"]}))
+    other = ok(client.post("/groups/", json={"name": "g2", "board_id": board["id"]}))
+    d = ok(client.post("/tasks/", json={"title": "d", "board_id": board["id"], "group_id": other["id"]}))
+    r = client.post(f"/tasks/{b['id']}/move", json={"after_id": a["id"], "before_id": d["id"]})
+    assert r.status_code == 400
+
+def test_move_rejects_self_anchor(client, board):
+    t = board["tasks"][0]
+    r = client.post(f"/tasks/{t['id']}/move", json={"before_id": t["id"]})
+    assert r.status_code == 400
+
+def test_create_appends_to_group(client, board):
+    positions = [t["position"] for t in board["tasks"]]
+    assert positions == sorted(set(positions))
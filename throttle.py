@@ -0,0 +1,133 @@
+import threading, time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects.sqlite import insert
+from database import engine
+import models
+from settings import settings
+
+class LoginThrottle(ABC):
+    """Contador de intentos fallidos por clave (email|ip) con bloqueo temporal."""
+
+    def __init__(self, max_failures: int, window: int, lockout: int):
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout = lockout
+
+    @abstractmethod
+    def register_failure(self, key: str): ...
+
+    @abstractmethod
+    def is_locked(self, key: str) -> Optional[int]:
+        """Hasta cuándo (epoch) está bloqueada la clave, o None."""
+
+    @abstractmethod
+    def clear(self, key: str): ...
+
+class MemoryThrottle(LoginThrottle):
+    """Ventana deslizante por proceso, acotada en tamaño y con expiración por tiempo."""
+
+    def __init__(self, max_failures: int, window: int, lockout: int, maxsize: int):
+        super().__init__(max_failures, window, lockout)
+        self.maxsize = maxsize
+        # clave -> [marcas de tiempo de los últimos fallos, lock_until]; orden = último fallo
+        self._data: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, rec, now: int) -> bool:
+        return rec[1] <= now and (not rec[0] or rec[0][-1] <= now - self.window)
+
+    def _evict(self, now: int):
+        # Las entradas más antiguas están al principio: se purga hasta la primera vigente
+        while self._data:
+            key, rec = next(iter(self._data.items()))
+            if len(self._data) <= self.maxsize and not self._expired(rec, now): break
+            del self._data[key]
+
+    def register_failure(self, key: str):
+        now = int(time.time())
+        with self._lock:
+            rec = self._data.pop(key, None) or [(), 0]
+            rec[0] = (rec[0] + (now,))[-self.max_failures:]
+            # Bloquea si los últimos max_failures fallos caen dentro de la ventana
+            if len(rec[0]) == self.max_failures and rec[0][0] > now - self.window:
+                rec[1] = now + self.lockout
+            self._data[key] = rec
+            self._evict(now)
+
+    def is_locked(self, key: str) -> Optional[int]:
+        with self._lock:
+            rec = self._data.get(key)
+        if rec and rec[1] > int(time.time()):
+            return rec[1]
+        return None
+
+    def clear(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteThrottle(LoginThrottle):
+    """Ventana fija en la tabla login_failures (la crea migrations.py): compartida por todos los workers."""
+
+    # Cada cuántos fallos se borran las filas caducadas
+    PURGE_EVERY = 1000
+
+    def __init__(self, max_failures: int, window: int, lockout: int, bind=engine):
+        super().__init__(max_failures, window, lockout)
+        self.bind = bind
+        self._writes = 0
+
+    def register_failure(self, key: str):
+        now = int(time.time())
+        t = models.LoginFailure.__table__
+        fresh = t.c.window_start > now - self.window
+        count = case((fresh, t.c.count + 1), else_=1)
+        # Un solo UPSERT: reinicia la ventana si caducó y bloquea al llegar al máximo
+        first_lock = now + self.lockout if self.max_failures <= 1 else 0
+        stmt = insert(t).values(key=key, count=1, window_start=now, lock_until=first_lock)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.key],
+            set_={
+                "count": count,
+                "window_start": case((fresh, t.c.window_start), else_=now),
+                "lock_until": case((count >= self.max_failures, now + self.lockout), else_=t.c.lock_until),
+            },
+        )
+        with self.bind.begin() as conn:
+            conn.execute(stmt)
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute(delete(t).where(t.c.window_start <= now - self.window, t.c.lock_until <= now))
+
+    def is_locked(self, key: str) -> Optional[int]:
+        t = models.LoginFailure.__table__
+        with self.bind.connect() as conn:
+            until = conn.execute(select(t.c.lock_until).where(t.c.key == key)).scalar()
+        if until and until > int(time.time()):
+            return until
+        return None
+
+    def clear(self, key: str):
+        t = models.LoginFailure.__table__
+        with self.bind.begin() as conn:
+            conn.execute(delete(t).where(t.c.key == key))
+
+_throttle: Optional[LoginThrottle] = None
+_throttle_lock = threading.Lock()
+
+def get_login_throttle() -> LoginThrottle:
+    # En el primer uso, no al importar: el backend sqlite necesita el esquema ya migrado
+    global _throttle
+    with _throttle_lock:
+        if _throttle is None:
+            args = (settings.MAX_FAILED_LOGINS, settings.LOGIN_FAILURE_WINDOW_MINUTES * 60, settings.LOCKOUT_MINUTES * 60)
+            if settings.LOGIN_THROTTLE_BACKEND == "sqlite":
+                _throttle = SQLiteThrottle(*args)
+            else:
+                _throttle = MemoryThrottle(*args, maxsize=settings.LOGIN_THROTTLE_MAX_KEYS)
+        return _throttle